@@ -8,10 +8,10 @@
 
 import os
 import sys
-import time
 
 import dash
 import dash_bootstrap_components as dbc
+import flask
 from dash import html, dcc
 
 from grid2game._utils import (add_callbacks_temporal, 
@@ -20,9 +20,12 @@ from grid2game._utils import (add_callbacks_temporal,
                               setupLayout,
                               add_callbacks_action_search, 
                               setupLayout_action_search, 
+                              PushChannel,
+                              FramePacer,
                               )
 from grid2game.envs import Env
-from grid2game.plot import PlotGrids, PlotTemporalSeries
+from grid2game.plot import PlotGrids, PlotTemporalSeries, FigureCache, PlotLookahead
+from grid2game.sessions import SessionPool, SessionDispatcher
 
 
 class VizServer:
@@ -108,6 +111,67 @@ class VizServer:
                                 external_scripts=external_scripts)
         self.logger.info("Dash app initialized")
         # self.app.config.suppress_callback_exceptions = True
+        self.build_args = build_args
+
+        # everything that depends on the user (environment, figures etc.)
+        self._init_session(build_args)
+
+        tmp_ = setupLayout(self,
+                           self._layout_temporal_tab,
+                           self._layout_action_search_tab)
+        
+        self.my_app.layout = tmp_
+
+        max_sessions = getattr(build_args, "max_sessions", None)
+        if max_sessions is not None and max_sessions > 0:
+            # each user has its own session (environment, tree, figures etc.)
+            spill_dir = getattr(build_args, "session_spill_dir", None)
+            self.session_pool = SessionPool(self._make_session,
+                                            max_sessions=max_sessions,
+                                            idle_timeout=getattr(build_args, "session_timeout", None) or 1800.,
+                                            spill_dir=spill_dir if spill_dir else None,
+                                            logger=self.logger)
+            self.session_pool.register(self.my_app.server)
+            callbacks_target = SessionDispatcher(self.session_pool)
+            self.logger.info(f"Multi user mode used (at most {max_sessions} sessions)")
+        else:
+            # all the users share the same session
+            self.session_pool = None
+            callbacks_target = self
+
+        add_callbacks_temporal(self.my_app, callbacks_target)
+        add_callbacks_action_search(self.my_app, callbacks_target)
+        add_callbacks(self.my_app, callbacks_target)
+
+        # the browsers are notified (server sent events) when a new state is computed
+        self.my_app.server.add_url_rule(f"{self.my_app.config.routes_pathname_prefix}_grid2game/push",
+                                        "grid2game_push",
+                                        self.push_stream)
+        
+        self.logger.info("Viz server initialized")
+
+    def _make_session(self):
+        """build a new user session: it shares the dash app of this server but has its own environment"""
+        res = object.__new__(type(self))
+        res.logger = self.logger
+        res.my_app = self.my_app
+        res.build_args = self.build_args
+        res._init_session(self.build_args)
+        return res
+
+    def _init_session(self, build_args):
+        """initialize everything that is specific to a user (environment, figures, layout etc.)"""
+        # the server notifies the browser when something changes (instead of the browser polling it)
+        self.push_updates = not getattr(build_args, "polling", False)
+        self.push_channel = PushChannel()
+        # in "go" mode, the steps are computed in the background and only some of them are displayed
+        self.frame_pacer = FramePacer(target_fps=getattr(build_args, "go_fps", None) or 4.)
+        # configuration of the planner (see `Env.plan`)
+        self.plan_kwargs = {"catalogue_kinds": getattr(build_args, "plan_actions", None) or ("line_change", "topo_set"),
+                            "depth": getattr(build_args, "plan_depth", 3),
+                            "time_budget": getattr(build_args, "plan_time_budget", 60.),
+                            "node_budget": getattr(build_args, "plan_node_budget", 100),
+                            "nb_workers": getattr(build_args, "plan_workers", 1)}
 
         # create the grid2op related things
         self.assistant_path = str(build_args.assistant_path)
@@ -124,13 +188,25 @@ class VizServer:
 
         # read the right config
         g2op_config = self._make_glop_env_config(build_args)
+        n1_workers = getattr(build_args, "n1_workers", -1)
+        screening = getattr(build_args, "screening", "none")
+        lookahead_horizon = getattr(build_args, "lookahead", 0)
+        # in multi user mode the grid2op environment is made once and copied for each session
+        warm_start = (getattr(build_args, "max_sessions", None) or 0) > 0
 
         self.env = Env(build_args.env_name,
                        test=build_args.is_test,
                        assistant_path=self.assistant_path,
                        assistant_seed=int(build_args.assistant_seed) if build_args.assistant_seed is not None else None,
                        logger=self.logger,
-                       config_dict=g2op_config)
+                       config_dict=g2op_config,
+                       episode_log_dir=getattr(build_args, "episode_log_dir", None),
+                       assistant_memo_size=getattr(build_args, "assistant_memo_size", 1024),
+                       security_analysis_workers=n1_workers if n1_workers >= 0 else None,
+                       screening_mode=screening if screening != "none" else None,
+                       lookahead_horizon=lookahead_horizon,
+                       warm_start=warm_start,
+                       chronics_cache_size=getattr(build_args, "chronics_cache_size", None) or 0.)
 
         self._style_legal_info = {'color': 'red', "display": "flex", "alignItems": "center", "justifyContent": "center", 'display': 'none'}
         self._style_illegal_info = {'color': 'red', "display": "flex", "alignItems": "center", "justifyContent": "center"}
@@ -146,13 +222,26 @@ class VizServer:
         # chronics part
         self.chronics_id = None  # no chronics are set through the UI yet
 
+        # replay of an episode saved by a grid2op runner
+        load_episode = getattr(build_args, "load_episode", None)
+        if load_episode:
+            agent_path, episode_name = os.path.split(os.path.abspath(load_episode))
+            self.env.load_episode(agent_path, episode_name)
+
         self.logger.info("Environment initialized")
         self.plot_grids = PlotGrids(self.env.observation_space)
         self.fig_timeline = self.env.get_timeline_figure()
 
-        self.plot_temporal = PlotTemporalSeries(self.env.env_tree)
+        self.plot_temporal = PlotTemporalSeries(self.env.env_tree,
+                                                max_points_per_trace=getattr(build_args, "temporal_max_points",
+                                                                             None) or 1000,
+                                                downsampling=getattr(build_args, "temporal_downsampling",
+                                                                     None) or "lttb")
         self.fig_load_gen = self.plot_temporal.fig_load_gen
         self.fig_line_cap = self.plot_temporal.fig_line_cap
+        # next steps of the current state (see `Env.lookahead`)
+        self.plot_lookahead = PlotLookahead()
+        self.fig_lookahead = self.plot_lookahead.update(self.env.snapshot.lookahead)
 
         # internal members
         self.step_clicks = 0
@@ -187,6 +276,10 @@ class VizServer:
         self.plot_grids.init_figs(self.env.obs, self.env.sim_obs)
         self.real_time = self.plot_grids.figure_rt
         self.forecast = self.plot_grids.figure_forecat
+
+        # cache of the already rendered figures (to navigate quickly in the timeline)
+        fig_cache_size = getattr(build_args, "fig_cache_size", None)
+        self.fig_cache = FigureCache(max_size_mb=float(fig_cache_size) if fig_cache_size is not None else 64.)
         
         # initialize the layout
         self._layout_temporal = html.Div(setupLayout_temporal(self),
@@ -201,26 +294,53 @@ class VizServer:
                                                  value='tab-explore-action',
                                                  children=self._layout_action_search)
         
-        tmp_ = setupLayout(self,
-                           self._layout_temporal_tab,
-                           self._layout_action_search_tab)
-        
-        self.my_app.layout = tmp_
-        
-        add_callbacks_temporal(self.my_app, self)
-        add_callbacks_action_search(self.my_app, self)
-        add_callbacks(self.my_app, self)
-        
-        self.logger.info("Viz server initialized")
-
         # last node id (to not plot twice the same stuff to gain time)
         self._last_node_id = -1
+        # risks computed in the background already displayed in the timeline (see `update_rt_fig`)
+        self._last_screening_version = 0
 
         # last action taken
         self._last_action = "assistant"      
         self._do_display_action = True
         self._dropdown_value = "assistant"
 
+    def push_stream(self):
+        """flask endpoint streaming (server sent events) the notifications of the session of the user"""
+        if self.session_pool is None:
+            session = self
+        else:
+            # the stream does not keep the session in memory (it can be evicted while the tab is open, the stream
+            # is then closed), and it does not create it: the browser retries until a callback created it
+            session_id = flask.request.cookies.get(SessionPool.COOKIE_NAME)
+            session = self.session_pool.get(session_id, create=False)
+            if session is None:
+                return flask.Response("retry: 2000\n\n",
+                                      mimetype="text/event-stream",
+                                      headers={"Cache-Control": "no-cache"})
+            self.session_pool.release(session_id)
+        if not session.push_updates:
+            # the browser uses timers instead, "204: no content" prevents it from reconnecting
+            return flask.Response(status=204)
+        return flask.Response(flask.stream_with_context(session.push_channel.stream()),
+                              mimetype="text/event-stream",
+                              headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    def close(self):
+        """free the resources used by this session"""
+        self.push_channel.close()
+        self.env.close()
+
+    def save_session(self, path):
+        """save (on the hard drive) what is needed to restore this session later on"""
+        self.env.save_tree(path)
+
+    def restore_session(self, path):
+        """restore a session previously saved with `save_session`"""
+        self.env.restore_tree(path)
+        self.update_obs_fig()
+        self.fig_timeline = self.env.get_timeline_figure()
+        self.need_update_figures = True
+
     def _make_glop_env_config(self, build_args):
         g2op_config = {}
         cont_ = True
@@ -265,6 +385,10 @@ class VizServer:
         """handle the click to all button to change the units"""
         trigger_rt_graph = 0
         trigger_for_graph = 0
+        if self.plot_grids.figs_outdated():
+            # figures have been retrieved from the cache, i need to draw them entirely before modifying them
+            self.plot_grids.update_rt(self.plot_grids.obs_rt)
+            self.plot_grids.update_forecat(self.plot_grids.obs_forecast)
         # controls the panels of the main graph of the grid
         if line_unit != self.plot_grids.line_info:
             self.plot_grids.line_info = line_unit
@@ -291,6 +415,8 @@ class VizServer:
             self.plot_grids.update_storages_info()
             trigger_rt_graph = 1
             trigger_for_graph = 1
+        self.real_time = self.plot_grids.figure_rt
+        self.forecast = self.plot_grids.figure_forecat
         return [trigger_rt_graph, trigger_for_graph]
 
     def _reset_action_to_assistant_if_not_prev(self):
@@ -311,7 +437,8 @@ class VizServer:
                           state_trigger_rt,
                           state_trigger_for,
                           state_trigger_self_loop,
-                          timer):
+                          timer,
+                          push):
         """
         dash do not make "synch" callbacks (two callbacks can be called at the same time),
         however, grid2op environments are not "thread safe": accessing them from different "thread"
@@ -346,56 +473,61 @@ class VizServer:
         update_progress_bar = 1
 
         # now register the next computation to do, based on the button triggerd
-        if button_id == "step-button":
-            self.env.start_computation()
-            self.env.next_computation = "step"
-            self.env.next_computation_kwargs = {}
-            self.need_update_figures = False
-        elif button_id == "go_till_game_over-button":
-            self.env.start_computation()
-            self.env.next_computation = "step_end"
-            self.env.next_computation_kwargs = {}
-            self.need_update_figures = True
-        elif button_id == "reset-button":
-            self.env.start_computation()
-            self.env.next_computation = "reset"
-            self.env.next_computation_kwargs = {"chronics_id": self.chronics_id, "seed": self.seed}
-            self.need_update_figures = False
-            change_graph_title = 1
-            self._next_action_is_assistant()
-        elif button_id == "simulate-button":
-            self.env.start_computation()
-            self.env.next_computation = "simulate"
-            self.env.next_computation_kwargs = {}
-            self.need_update_figures = False
-        elif button_id == "back-button":
-            self.env.start_computation()
-            self.env.next_computation = "back"
-            self.env.next_computation_kwargs = {}
-            self.need_update_figures = False
-        elif button_id == "gofast-button":
-            # this button is off now !
-            self.env.start_computation()
-            self.env.next_computation = "step_rec_fast"
-            self.env.next_computation_kwargs = {"nb_step_gofast": self.nb_step_gofast}
-        elif button_id == "go-button":
-            self.go_clicks += 1
-            if self.go_clicks % 2:
-                # i clicked on gofast an even number of times, i need to stop computation
-                self.env.stop_computation()
-                self._button_shape = "btn btn-primary"
-                self._gofast_button_shape = "btn btn-primary"
-            else:
-                # i clicked on gofast an odd number of times, i need to start computation
+        with self.env.exclusive():
+            if button_id == "step-button":
                 self.env.start_computation()
-                self._button_shape = "btn btn-secondary"
-                self._gofast_button_shape = "btn btn-secondary"
-            self.env.next_computation = "step_rec"
-            self.env.next_computation_kwargs = {}
-            self.need_update_figures = False
-            display_new_state = 1  # in this mode, even though I am computing, I need to update the graphs live
-        else:
-            something_clicked = False
+                self.env.next_computation = "step"
+                self.env.next_computation_kwargs = {}
+                self.need_update_figures = False
+            elif button_id == "go_till_game_over-button":
+                self.env.start_computation()
+                self.env.next_computation = "step_end"
+                self.env.next_computation_kwargs = {}
+                self.need_update_figures = True
+            elif button_id == "reset-button":
+                self.env.start_computation()
+                self.env.next_computation = "reset"
+                self.env.next_computation_kwargs = {"chronics_id": self.chronics_id, "seed": self.seed}
+                self.need_update_figures = False
+                change_graph_title = 1
+                self._next_action_is_assistant()
+            elif button_id == "simulate-button":
+                self.env.start_computation()
+                self.env.next_computation = "simulate"
+                self.env.next_computation_kwargs = {}
+                self.need_update_figures = False
+            elif button_id == "back-button":
+                self.env.start_computation()
+                self.env.next_computation = "back"
+                self.env.next_computation_kwargs = {}
+                self.need_update_figures = False
+            elif button_id == "gofast-button":
+                # this button is off now !
+                self.env.start_computation()
+                self.env.next_computation = "step_rec_fast"
+                self.env.next_computation_kwargs = {"nb_step_gofast": self.nb_step_gofast}
+            elif button_id == "go-button":
+                self.go_clicks += 1
+                if self.go_clicks % 2:
+                    # i clicked on gofast an even number of times, i need to stop computation
+                    self.env.stop_computation()
+                    self._button_shape = "btn btn-primary"
+                    self._gofast_button_shape = "btn btn-primary"
+                else:
+                    # i clicked on gofast an odd number of times, i need to start computation
+                    self.env.start_computation()
+                    self._button_shape = "btn btn-secondary"
+                    self._gofast_button_shape = "btn btn-secondary"
+                self.env.next_computation = "step_rec"
+                self.env.next_computation_kwargs = {}
+                self.need_update_figures = False
+                display_new_state = 1  # in this mode, even though I am computing, I need to update the graphs live
+                if self.env.needs_compute():
+                    # the steps are computed in the background, the display shows the last one when it can
+                    self.frame_pacer.reset()
+                    self.env.compute_in_background(on_computed=self._go_state_computed, on_over=self._go_over)
+            else:
+                something_clicked = False
 
         if not self.env.needs_compute():
             # don't start the computation if not needed
@@ -414,6 +546,8 @@ class VizServer:
             # so i need to force update the figures
             display_new_state = 0
             self.need_update_figures = False
+            # and the figures will be updated at the next call
+            self.push_channel.notify()
             # I need that to the proper update of the progress bar
             self._last_step = self.env.obs.current_step
             self._last_max_step = self.env.obs.max_step
@@ -448,19 +582,16 @@ class VizServer:
                 change_graph_title,
                 update_progress_bar]
 
-    def _wait_for_computing_over(self):
-        i = 0
-        while self.env.is_computing():
-            time.sleep(0.1)
-            i += 1
-            if i >= 20:
-                # in this case, the environment has not finished running for 2s, I stop here
-                # in this case the user should probably call reset another time !
-                raise dash.exceptions.PreventUpdate
-
     def change_graph_title(self, change_graph_title):
-        # make sure that the environment has done computing
-        self._wait_for_computing_over()
+        # the reset registered by `handle_act_on_env` is done here, once the computation running (if any) is over,
+        # unless another thread has already started it
+        with self.env.exclusive():
+            has_computed = self.env.needs_compute()
+            self.env.heavy_compute()
+        self.env.wait_computation_over()
+        if has_computed:
+            # the new state can be displayed
+            self.push_channel.notify()
 
         # reset the elements !
         self.seed = None
@@ -472,6 +603,8 @@ class VizServer:
     def set_chronics(self, chronics):
         if chronics is not None:
             self.chronics_id = chronics
+            # it is likely to be played soon
+            self.env.prefetch_chronics([chronics])
         return [1]
 
     def set_seed(self, seed):
@@ -479,10 +612,31 @@ class VizServer:
             self.seed = int(seed)
         return [1]
 
+    def _go_state_computed(self, compute_time):
+        """a step has been computed in "go" mode, the browser is notified if it can display it"""
+        if self.frame_pacer.state_computed(compute_time):
+            self.push_channel.notify()
+
+    def _go_over(self):
+        """the "go" mode is over (stopped by the user, an alarm or a game over)"""
+        pacer = self.frame_pacer
+        if pacer.compute_time is not None:
+            render_time = pacer.render_time if pacer.render_time is not None else 0.
+            self.logger.info(f"go mode: {pacer.nb_frames} frames displayed, {pacer.nb_skipped} states skipped "
+                             f"(compute: {1000. * pacer.compute_time:.0f}ms / step, "
+                             f"render: {1000. * render_time:.0f}ms / frame)")
+        # the last state is always displayed
+        self.push_channel.notify()
+
     def computation_wrapper(self, display_new_state, recompute_rt_from_timeline):
         # simulate a "state" of the application that depends on the computation
-        if not self.env.is_computing():
+        # (in "go" mode, the computations are done in the background, see `handle_act_on_env`)
+        if not self.env.is_computing() and display_new_state != type(self).GO_MODE:
+            has_computed = self.env.needs_compute()
             self.env.heavy_compute()
+            if has_computed:
+                # a new state is available (or the next step in "go" mode can be computed)
+                self.push_channel.notify()
         
         if self.env.is_computing() and display_new_state != type(self).GO_MODE:
             # environment is computing I do not update anything
@@ -493,19 +647,49 @@ class VizServer:
             trigger_for = 1
 
             # update the state only if needed
-            if self.env.get_current_node_id() == self._last_node_id:
+            node_id = self.env.snapshot.node_id
+            if node_id == self._last_node_id:
                 # the state did not change, i do not update anything
                 raise dash.exceptions.PreventUpdate
             else:
-                self._last_node_id = self.env.get_current_node_id()
+                self._last_node_id = node_id
+            if display_new_state == type(self).GO_MODE:
+                self.frame_pacer.frame_sent()
         else:
             trigger_rt = dash.no_update
             trigger_for = dash.no_update
         return [trigger_rt, trigger_for]
 
     # handle the layout
-    def update_rt_fig(self, env_act):
+    def update_rt_fig(self, env_act, timeline_relayout, screening_timer, lookahead_policy):
         """the real time figures need to be updated"""
+        ctx = dash.callback_context
+        if ctx.triggered and ctx.triggered[0]['prop_id'].split('.')[0] == "screening_timer":
+            # new risks have been computed in the background, only the timeline is updated (if needed)
+            if self.env.screening_version == self._last_screening_version or self.env.is_computing():
+                raise dash.exceptions.PreventUpdate
+            self._last_screening_version = self.env.screening_version
+            self.fig_timeline = self.env.get_timeline_figure()
+            return [dash.no_update, dash.no_update, dash.no_update, self.fig_timeline, dash.no_update, dash.no_update]
+        if ctx.triggered and ctx.triggered[0]['prop_id'].split('.')[0] == "lookahead-policy-dropdown":
+            # another policy is followed for the next steps, only the forecast strip is updated
+            if lookahead_policy == self.env.lookahead_policy or self.env.is_computing():
+                raise dash.exceptions.PreventUpdate
+            with self.env.exclusive():
+                self.env.lookahead_policy = lookahead_policy
+                results = self.env.lookahead() if not self.env.is_done else None
+            self.fig_lookahead = self.plot_lookahead.update(results)
+            return [dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update,
+                    self.fig_lookahead]
+        if ctx.triggered and ctx.triggered[0]['prop_id'].split('.')[0] == "timeline_graph":
+            # the user zoomed in the timeline, only the timeline is updated (if needed)
+            range_changed = self.env.env_tree.set_timeline_range(timeline_relayout)
+            if not range_changed or self.env.is_computing() or self.env.env_tree.current_node is None:
+                raise dash.exceptions.PreventUpdate
+            self.fig_timeline = self.env.get_timeline_figure()
+            return [dash.no_update, dash.no_update, dash.no_update, self.fig_timeline, dash.no_update,
+                    dash.no_update]
+
         if env_act is not None and env_act > 0:
             self.update_obs_fig()
             trigger_temporal_figs = 1
@@ -517,19 +701,23 @@ class VizServer:
         if trigger_rt_graph == 1:
             self.fig_timeline = self.env.get_timeline_figure()
 
+        if self.env.lookahead_horizon > 0:
+            self.fig_lookahead = self.plot_lookahead.update(self.env.snapshot.lookahead)
         update_progress_bar = 1
         return [trigger_temporal_figs,
                 trigger_rt_graph,
                 trigger_for_graph,
                 self.fig_timeline,
-                update_progress_bar]
+                update_progress_bar,
+                self.fig_lookahead if self.env.lookahead_horizon > 0 else dash.no_update]
 
     def update_progress_bar(self, from_act, from_figs):
         """update the progress bar"""
         # if from_act is None and from_figs is None:
             # raise dash.exceptions.PreventUpdate
-        if self.env.env_tree.current_node is None:
-            # A reset has just been called and the grid2op env is not reset yet
+        snapshot = self.env.snapshot
+        if snapshot is None:
+            # the grid2op env is not reset yet
             self._progress_color = "primary"
             self._last_step = 0
             self._last_done = False
@@ -537,17 +725,17 @@ class VizServer:
         else:
             # scenario progress bar
             self._progress_color = "primary"
-            if not self.env.is_done:
+            if not snapshot.done:
                 # if from_act == 1:
                 #     self._last_step = max(self.env.obs.current_step, self._last_step)
                 #     self._last_max_step = max(self.env.obs.max_step, self._last_max_step)
                 # elif from_figs == 1:
-                self._last_step = self.env.obs.current_step
-                self._last_max_step = self.env.obs.max_step
+                self._last_step = snapshot.obs.current_step
+                self._last_max_step = snapshot.obs.max_step
                 self._last_done = False
             else:
-                self._last_step = self.env.obs.current_step
-                self._last_max_step = self.env.obs.max_step
+                self._last_step = snapshot.obs.current_step
+                self._last_max_step = snapshot.obs.max_step
                 # if not self._last_done:
                 #     self._last_done = True
                 #     if self._last_step != self._last_max_step:
@@ -570,8 +758,14 @@ class VizServer:
         """the simulate figures need to updated"""
         if env_act is not None and env_act > 0:
             trigger_for_graph = 1
-            self.plot_grids.update_forecat(self.env.sim_obs, self.env)
-            self.for_datetime = f"{self.env.sim_obs.get_time_stamp():%Y-%m-%d %H:%M}"
+            snapshot = self.env.snapshot
+            if self.plot_grids.figs_outdated():
+                # real time figure has been retrieved from the cache and is not drawn
+                self.plot_grids.update_rt(snapshot.obs, self.env)
+            self.plot_grids.update_forecat(snapshot.sim_obs, self.env)
+            self.real_time = self.plot_grids.figure_rt
+            self.forecast = self.plot_grids.figure_forecat
+            self.for_datetime = f"{snapshot.sim_obs.get_time_stamp():%Y-%m-%d %H:%M}"
         else:
             raise dash.exceptions.PreventUpdate
         return [trigger_for_graph]
@@ -592,23 +786,38 @@ class VizServer:
         return [display_mode, 1]
 
     # end point of the trigger stuff: what is displayed on the page !
-    def update_temporal_figs(self, figrt_trigger, showhide_trigger):
-        if (figrt_trigger is None or figrt_trigger == 0) and \
-                (showhide_trigger is None or showhide_trigger == 0):
+    def update_temporal_figs(self, figrt_trigger, showhide_trigger, relayout_load_gen, relayout_line_cap):
+        ctx = dash.callback_context
+        trigger_id = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+        if trigger_id in ("graph_gen_load", "graph_flow_cap"):
+            # the user zoomed in (or out) one of the graph, data are downsampled again if needed
+            if not self.plot_temporal.set_zoom(relayout_load_gen, relayout_line_cap):
+                raise dash.exceptions.PreventUpdate
+            force_redraw = True
+        else:
+            if (figrt_trigger is None or figrt_trigger == 0) and \
+                    (showhide_trigger is None or showhide_trigger == 0):
+                raise dash.exceptions.PreventUpdate
+            force_redraw = trigger_id == "showtempo_trigger_rt_graph"
+        with self.env.exclusive():
+            # the tree might be growing in the background (in "go" mode)
+            res = self.plot_temporal.get_update(self.env, self.env.env_tree, force_redraw=force_redraw)
+        if all(el is None for el in res):
             raise dash.exceptions.PreventUpdate
-        self.fig_load_gen, self.fig_line_cap = self.plot_temporal.update_trace(self.env, self.env.env_tree)
-        return [self.fig_load_gen, self.fig_line_cap]
+        return [el if el is not None else dash.no_update for el in res]
 
     def update_rt_graph_figs(self, figrt_trigger, unit_trigger):
         if (figrt_trigger is None or figrt_trigger == 0) and \
                 (unit_trigger is None or unit_trigger == 0):
             # nothing really triggered this call
             raise dash.exceptions.PreventUpdate
-        self._wait_for_computing_over()
-        if self.env.env_tree.current_node.prev_action_is_illegal:
+        if self.env.snapshot.prev_action_is_illegal:
             is_illegal = 1
         else:
             is_illegal = 0
+        if self.frame_pacer.frame_rendered():
+            # some states have been computed (in "go" mode) while this frame was rendered
+            self.push_channel.notify()
         return [self.real_time,  self.rt_datetime, is_illegal]
 
     def update_if_rt_illegal(self, trigger_rt_extra_info):
@@ -621,8 +830,7 @@ class VizServer:
                 (unit_trigger is None or unit_trigger == 0):
             # nothing really triggered this call
             raise dash.exceptions.PreventUpdate
-        self._wait_for_computing_over()
-        if self.env.is_assistant_illegal():
+        if self.env.snapshot.assistant_is_illegal:
             is_illegal = 1
         else:
             is_illegal = 0
@@ -644,10 +852,25 @@ class VizServer:
 
     # auxiliary functions
     def update_obs_fig(self):
-        self.plot_grids.update_rt(self.env.obs, self.env)
-        self.rt_datetime = f"{self.env.obs.get_time_stamp():%Y-%m-%d %H:%M}"
-        self.plot_grids.update_forecat(self.env.sim_obs, self.env)
-        self.for_datetime = f"{self.env.sim_obs.get_time_stamp():%Y-%m-%d %H:%M}"
+        # consistent state of the environment, even if a computation is running
+        snapshot = self.env.snapshot
+        display_key = snapshot.display_key
+        if display_key is not None:
+            display_key = (*display_key, *self.plot_grids.units_key())
+        cached_figs = self.fig_cache.get(display_key)
+        if cached_figs is not None:
+            # this node has already been displayed, i reuse the figures
+            self.plot_grids.set_observations(snapshot.obs, snapshot.sim_obs)
+            self.real_time, self.forecast = cached_figs
+        else:
+            self.plot_grids.update_rt(snapshot.obs, self.env)
+            self.plot_grids.update_forecat(snapshot.sim_obs, self.env)
+            self.real_time = self.plot_grids.figure_rt
+            self.forecast = self.plot_grids.figure_forecat
+            if self.env.do_i_display():
+                self.fig_cache.put(display_key, self.real_time, self.forecast)
+        self.rt_datetime = f"{snapshot.obs.get_time_stamp():%Y-%m-%d %H:%M}"
+        self.for_datetime = f"{snapshot.sim_obs.get_time_stamp():%Y-%m-%d %H:%M}"
 
     def _next_action_is_manual(self):
         self.env.next_action_copy()
@@ -686,27 +909,28 @@ class VizServer:
         else:
             button_id = ctx.triggered[0]['prop_id'].split('.')[0]
 
-        if button_id == "which_action_button":
-            # the "base action" has been modified, so i need to change it here
-            if which_action_button == "dn":
-                self.env.next_action_is_dn()
-                self._last_action = "dn"
-                self._do_display_action = False
-                self._dropdown_value = "dn"
-            elif which_action_button == "assistant":
-                self._next_action_is_assistant()
-            elif which_action_button == "prev":
-                self.env.next_action_is_previous()
-                self._last_action = "prev"
-                self._do_display_action = False
-                self._dropdown_value = "prev"
-            elif which_action_button == "manual":
-                self._next_action_is_manual()
-            else:
-                # nothing is done
-                pass
-            res = [f"{self.env.current_action}", dropdown_value, update_substation_layout_clicked_from_sub]
-            return res
+        with self.env.exclusive():
+            if button_id == "which_action_button":
+                # the "base action" has been modified, so i need to change it here
+                if which_action_button == "dn":
+                    self.env.next_action_is_dn()
+                    self._last_action = "dn"
+                    self._do_display_action = False
+                    self._dropdown_value = "dn"
+                elif which_action_button == "assistant":
+                    self._next_action_is_assistant()
+                elif which_action_button == "prev":
+                    self.env.next_action_is_previous()
+                    self._last_action = "prev"
+                    self._do_display_action = False
+                    self._dropdown_value = "prev"
+                elif which_action_button == "manual":
+                    self._next_action_is_manual()
+                else:
+                    # nothing is done
+                    pass
+                res = [f"{self.env.current_action}", dropdown_value, update_substation_layout_clicked_from_sub]
+                return res
 
         if not self._do_display_action:
             # i should not display the action
@@ -718,33 +942,34 @@ class VizServer:
         # dropdown_value = "manual"
         # self.env.next_action_is_manual()
         is_modif = False
-        if gen_id != "":
-            try:
-                gen_id_int = int(gen_id)
-                if self.env.glop_env.gen_renewable[gen_id_int]:
-                    self.env._current_action.curtail_mw = [(int(gen_id), float(redisp))]
-
-                else:
-                    self.env._current_action.redispatch = [(int(gen_id), float(redisp))]
+        with self.env.exclusive():
+            if gen_id != "":
+                try:
+                    gen_id_int = int(gen_id)
+                    if self.env.glop_env.gen_renewable[gen_id_int]:
+                        self.env._current_action.curtail_mw = [(int(gen_id), float(redisp))]
+
+                    else:
+                        self.env._current_action.redispatch = [(int(gen_id), float(redisp))]
+                    is_modif = True
+                except Exception as exc_:
+                    # either initialization of something else
+                    self.logger.error(f"Error in display_action_fun: {exc_}")
+                    pass
+            if stor_id != "":
+                self.env._current_action.storage_p = [(int(stor_id), float(storage_p))]
+                is_modif = True
+            if line_id != "" and line_status is not None:
+                self.env._current_action.line_set_status = [(int(line_id), int(line_status))]
                 is_modif = True
-            except Exception as exc_:
-                # either initialization of something else
-                self.logger.error(f"Error in display_action_fun: {exc_}")
-                pass
-        if stor_id != "":
-            self.env._current_action.storage_p = [(int(stor_id), float(storage_p))]
-            is_modif = True
-        if line_id != "" and line_status is not None:
-            self.env._current_action.line_set_status = [(int(line_id), int(line_status))]
-            is_modif = True
-        if sub_id != "":
-            is_modif = True
-            update_substation_layout_clicked_from_sub = 1
-            if clicked_sub_fig is not None:
-                # i modified a substation topology
-                obj_id, new_bus = self.plot_grids.get_object_clicked_sub(clicked_sub_fig)
-                if obj_id is not None:
-                    self.env._current_action.set_bus = [(obj_id, new_bus)]
+            if sub_id != "":
+                is_modif = True
+                update_substation_layout_clicked_from_sub = 1
+                if clicked_sub_fig is not None:
+                    # i modified a substation topology
+                    obj_id, new_bus = self.plot_grids.get_object_clicked_sub(clicked_sub_fig)
+                    if obj_id is not None:
+                        self.env._current_action.set_bus = [(obj_id, new_bus)]
 
         if not is_modif:
             raise dash.exceptions.PreventUpdate
@@ -881,6 +1106,8 @@ class VizServer:
         except Exception as exc_:
             self.logger.error(f"Error in load_assistant: {exc_}")
             return [f"❌ {exc_}", dash.no_update, loader_state]
+        # the forecasts of the figures already cached were computed with the action of the previous assistant
+        self.fig_cache.clear()
         clear = 0
         if properly_loaded:
             res = self.format_path(os.path.abspath(self.assistant_path))
@@ -898,11 +1125,9 @@ class VizServer:
 
     def save_expe(self, button, save_expe_path):
         """
-        This callback save the experiment using a grid2op runner.
-
-        work in progress !
+        This callback save the experiment, in the same format as a grid2op runner.
 
-        TODO: reuse the computation of the environment instead of creating a runner for such purpose !
+        The observations, actions etc. already computed (stored in the tree) are written, nothing is simulated again.
         """
         loader_state = ""
         ctx = dash.callback_context
@@ -933,29 +1158,7 @@ class VizServer:
         self.logger.info(f"saving experiment in {self.save_expe_path}")
         self.env.start_computation()  # prevent other type of computation
         try:
-            env = self.env.glop_env.copy()
-            nb_step = self.env.obs.current_step
-            chro_id = env.chronics_handler.get_id()
-            from grid2op.Agent import FromActionsListAgent
-            from grid2op.Runner import Runner
-            list_action = self.env.get_current_action_list()
-            agent = FromActionsListAgent(env.action_space, list_action)
-            dict_ = env.get_params_for_runner()
-            if "logger" in dict_:
-                # don't use the logger of the grid2op environment
-                del dict_["logger"]
-            runner = Runner(**dict_,
-                            agentClass=None,
-                            agentInstance=agent,
-                            logger=self.logger,
-                            )
-            runner.run(nb_episode=1,
-                       path_save=self.save_expe_path,
-                       episode_id=[chro_id],
-                       max_iter=max(nb_step + 1, 2),
-                       env_seeds=[self.env.glop_env.seed_used],  # TODO. in case of "reset" this might not work
-                       # agent_seeds=[self.], TODO... This might require deep rework of this function !
-                       pbar=True)
+            self.env.save_episode(self.save_expe_path)
             res = f"✅ saved in \"{self.save_expe_path}\""
         except Exception as exc_:
             self.logger.error(f"save_expe exception while trying to save the experiment: {exc_}")
@@ -983,6 +1186,9 @@ class VizServer:
         
         if tab == 'tab-temporal-view':
             self.need_update_figures = True
+            # the temporal figures are sent entirely with the layout
+            self.plot_temporal.reset_display()
+            self.plot_temporal.update_trace(self.env, self.env.env_tree)
             return [self._layout_temporal]
         elif tab == 'tab-explore-action':
             self.need_update_figures = True
@@ -1004,13 +1210,39 @@ class VizServer:
         fig_timeline = self.fig_timeline
         dt_label = self.rt_datetime
         fig_rt = self.real_time
+        n1_table = []
+        n1_results = self.env.security_analysis(compute=False)
+        if n1_results is not None:
+            # the grid is colored by the highest flows after an outage
+            fig_rt = self.plot_grids.get_figure_contingencies(n1_results.worst_rho_per_line())
+            n1_table = self._get_n1_table(n1_results)
         return (pbar_value, pbar_label, pbar_color, fig_timeline,
-                dt_label, fig_rt)
+                dt_label, fig_rt, n1_table)
+
+    def _get_n1_table(self, n1_results, nb_max=10):
+        """the worst single powerline outages of the current state"""
+        name_line = self.env.glop_env.name_line
+        header = html.Tr([html.Th("Outage"), html.Th("Max flow"), html.Th("On line"), html.Th("# overloads")])
+        rows = []
+        for line_out, max_rho, worst_line, nb_overloaded in n1_results.ranking(nb_max):
+            if worst_line == -1:
+                cells = [html.Td(name_line[line_out]), html.Td("diverged"), html.Td("-"), html.Td("-")]
+            else:
+                cells = [html.Td(name_line[line_out]), html.Td(f"{100. * max_rho:.1f}%"),
+                         html.Td(name_line[worst_line]), html.Td(f"{nb_overloaded}")]
+            rows.append(html.Tr(cells, style={'color': 'red'} if max_rho > 1. else {}))
+        return [html.H6(f"N-1: {n1_results.line_ids.shape[0]} outages computed in "
+                        f"{1000. * n1_results.compute_time:.0f}ms"),
+                html.Table([html.Thead(header), html.Tbody(rows)], className="table table-sm")]
             
     def main_action_search(self,
                            refresh_button,
                            explore_butt_pressed,
-                           timer):
+                           plan_butt_pressed,
+                           n1_butt_pressed,
+                           timer,
+                           timeline_relayout,
+                           push):
         ctx = dash.callback_context
         if not ctx.triggered:
             # no click have been made yet
@@ -1028,6 +1260,7 @@ class VizServer:
         fig_timeline = dash.no_update
         dt_label = dash.no_update
         fig_rt = dash.no_update
+        n1_table = dash.no_update
         start_computation = 1
         
         if button_id == "refresh-button_as":
@@ -1036,10 +1269,33 @@ class VizServer:
             start_computation = dash.no_update
             # hack for it to resynch everything
             self.need_update_figures = True
+        elif button_id == "timeline_graph_as":
+            # the user zoomed in the timeline, only the timeline is updated (if needed)
+            range_changed = self.env.env_tree.set_timeline_range(timeline_relayout)
+            if not range_changed or self.env.is_computing():
+                raise dash.exceptions.PreventUpdate
+            self.fig_timeline = self.env.get_timeline_figure()
+            return [dash.no_update, dash.no_update, dash.no_update, dash.no_update, self.fig_timeline,
+                    dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update,
+                    dash.no_update]
         elif button_id == "explore-button_as":        
-            self.env.next_computation = "explore"
+            with self.env.exclusive():
+                self.env.next_computation = "explore"
+                self.env.next_computation_kwargs = {}
+                self.env.start_computation()
+            self.need_update_figures = True
+        elif button_id == "plan-button_as":
+            with self.env.exclusive():
+                self.env.next_computation = "plan"
+                self.env.next_computation_kwargs = dict(self.plan_kwargs)
+                self.env.start_computation()
+            self.need_update_figures = True
+        elif button_id == "n1-button_as":
+            with self.env.exclusive():
+                self.env.next_computation = "security_analysis"
+                self.env.next_computation_kwargs = {}
+                self.env.start_computation()
             self.need_update_figures = True
-            self.env.start_computation()
         else:
             something_clicked = False
       
@@ -1057,7 +1313,7 @@ class VizServer:
             i_am_computing_state = {'display': 'none'}  # deactivate the "i am computing button"
 
             (pbar_value, pbar_label, pbar_color, fig_timeline,
-                dt_label, fig_rt) = self._aux_tab_as_retrieve_updated_figs()
+                dt_label, fig_rt, n1_table) = self._aux_tab_as_retrieve_updated_figs()
         
         return [start_computation,
                 pbar_value,
@@ -1068,4 +1324,5 @@ class VizServer:
                 fig_rt,
                 1,
                 i_am_computing_state,
-                i_am_computing_state]
+                i_am_computing_state,
+                n1_table]
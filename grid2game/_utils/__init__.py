@@ -10,6 +10,8 @@ __all__ = [
     "setupLayout", "add_callbacks",
     "setupLayout_temporal", "add_callbacks_temporal",
     "setupLayout_action_search", "add_callbacks_action_search",
+    "PushChannel",
+    "FramePacer",
            ]
 
 from .main_callbacks import add_callbacks
@@ -18,3 +20,5 @@ from ._temporal_layout import setupLayout as setupLayout_temporal
 from ._temporal_callbacks import add_callbacks as add_callbacks_temporal
 from ._action_search_layout import setupLayout as setupLayout_action_search
 from ._action_search_callbacks import add_callbacks as add_callbacks_action_search
+from .push_channel import PushChannel
+from .frame_pacer import FramePacer
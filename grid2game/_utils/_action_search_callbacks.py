@@ -21,10 +21,15 @@ def add_callbacks(dash_app, viz_server):
                        dash.dependencies.Output("real-time-graph_as", "figure"),
                        dash.dependencies.Output("hidden_output_explore", "n_clicks"),
                        dash.dependencies.Output("is_computing_left_as", "style"),
-                       dash.dependencies.Output("is_computing_right_as", "style"),],
+                       dash.dependencies.Output("is_computing_right_as", "style"),
+                       dash.dependencies.Output("n1_table_as", "children"),],
                       [dash.dependencies.Input('refresh-button_as', "n_clicks"),
                        dash.dependencies.Input('explore-button_as', "n_clicks"),
-                       dash.dependencies.Input("timer_as", "n_intervals")]
+                       dash.dependencies.Input('plan-button_as', "n_clicks"),
+                       dash.dependencies.Input('n1-button_as', "n_clicks"),
+                       dash.dependencies.Input("timer_as", "n_intervals"),
+                       dash.dependencies.Input("timeline_graph_as", "relayoutData"),
+                       dash.dependencies.Input("push_trigger_as", "n_clicks")]
                       )(viz_server.main_action_search)
     
     dash_app.callback([dash.dependencies.Output("main_action_search_trigger_rt", "n_clicks"),
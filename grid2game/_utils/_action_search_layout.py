@@ -20,6 +20,16 @@ def setupLayout(viz_server):
                                 n_clicks=0,
                                 className="btn btn-primary")
     
+    plan_button = html.Label("Plan",
+                             id="plan-button_as",
+                             n_clicks=0,
+                             className="btn btn-primary")
+
+    n1_button = html.Label("N-1",
+                           id="n1-button_as",
+                           n_clicks=0,
+                           className="btn btn-primary")
+
     is_computing_left = html.Div(children=[html.P("⏳ Computing ⏳", style={'color': 'red', "fontSize": "x-large"})],
                                  id="is_computing_left_as",
                                  style={'display': 'none'})
@@ -61,6 +71,16 @@ def setupLayout(viz_server):
                                "height": viz_server._graph_height
                               }
                         )
+
+    # results of the N-1 analysis of the current state
+    n1_div = html.Div(id="n1_table_as",
+                      children=[],
+                      style={'display': 'inline-block',
+                             "verticalAlign": "top",
+                             'width': '45%',
+                             "marginLeft": "5%"
+                             }
+                      )
     
     # progress in the scenario (progress bar and timeline)
     progress_bar_for_scenario = html.Div(children=[html.Div(dbc.Progress(id="scenario_progression_as",
@@ -89,8 +109,11 @@ def setupLayout(viz_server):
     recompute_rt_from_timeline_as = html.Label("",  id="recompute_rt_from_timeline_as",  n_clicks=0)
     
     timer_callbacks = dcc.Interval(id="timer_as",
-                                   interval=500.  # in ms
+                                   interval=500.,  # in ms
+                                   disabled=viz_server.push_updates
                                    )
+    # "clicked" by the browser when the server notifies that something changed (see assets/push.js)
+    push_trigger_as = html.Label("", id="push_trigger_as", n_clicks=0, className="grid2game-push-trigger")
         
     update_state_from_tab_switch = html.Label("",
                                               id="as_update_state_from_tab_switch",
@@ -104,7 +127,8 @@ def setupLayout(viz_server):
                                     main_action_search_trigger_rt,
                                     main_action_search_trigger_for,
                                     trigger_computation_as,
-                                    recompute_rt_from_timeline_as],
+                                    recompute_rt_from_timeline_as,
+                                    push_trigger_as],
                                    id="as_hidden_buttons_for_callbacks",
                                    style={'display': 'none'})
     
@@ -113,11 +137,14 @@ def setupLayout(viz_server):
                          children=[is_computing_left,
                                    refresh_button,
                                    explore_button,
+                                   plan_button,
+                                   n1_button,
                                    is_computing_right],
                          style={'justifyContent': 'space-between',
                                 "display": "flex"}),
                 progress_bar_for_scenario,
                 rt_graph_div,
+                n1_div,
                 hidden_interactions
             ])
     return graph_tmp
@@ -123,7 +123,8 @@ def add_callbacks(dash_app, viz_server):
                        dash.dependencies.Input("go_till_game_over-button", "n_clicks"),
                        dash.dependencies.Input("untilgo_butt_call_act_on_env", "value"),
                        dash.dependencies.Input("selfloop_call_act_on_env", "value"),
-                       dash.dependencies.Input("timer", "n_intervals")
+                       dash.dependencies.Input("timer", "n_intervals"),
+                       dash.dependencies.Input("push_trigger", "n_clicks")
                       ],
                       [dash.dependencies.State("act_on_env_trigger_rt", "n_clicks"),
                        dash.dependencies.State("act_on_env_trigger_for", "n_clicks"),
@@ -144,9 +145,14 @@ def add_callbacks(dash_app, viz_server):
                        dash.dependencies.Output("figrt_trigger_rt_graph", "n_clicks"),
                        dash.dependencies.Output("figrt_trigger_for_graph", "n_clicks"),
                        dash.dependencies.Output("timeline_graph", "figure"),
-                       dash.dependencies.Output("update_progress_bar_from_figs", "n_clicks")
+                       dash.dependencies.Output("update_progress_bar_from_figs", "n_clicks"),
+                       dash.dependencies.Output("lookahead_strip", "figure")
                       ],
-                      [dash.dependencies.Input("act_on_env_trigger_rt", "n_clicks")],
+                      [dash.dependencies.Input("act_on_env_trigger_rt", "n_clicks"),
+                       # zooming in the timeline expands the collapsed part of the tree
+                       dash.dependencies.Input("timeline_graph", "relayoutData"),
+                       dash.dependencies.Input("screening_timer", "n_intervals"),
+                       dash.dependencies.Input("lookahead-policy-dropdown", "value")],
                       []
                      )(viz_server.update_rt_fig)
 
@@ -166,11 +172,17 @@ def add_callbacks(dash_app, viz_server):
 
     # final graph display
     # handle triggers: refresh the figures (temporal series part)
+    # only the new points are sent (with "extendData") if possible
     dash_app.callback([dash.dependencies.Output("graph_gen_load", "figure"),
                        dash.dependencies.Output("graph_flow_cap", "figure"),
+                       dash.dependencies.Output("graph_gen_load", "extendData"),
+                       dash.dependencies.Output("graph_flow_cap", "extendData"),
                       ],
                       [dash.dependencies.Input("figrt_trigger_temporal_figs", "n_clicks"),
-                       dash.dependencies.Input("showtempo_trigger_rt_graph", "n_clicks")
+                       dash.dependencies.Input("showtempo_trigger_rt_graph", "n_clicks"),
+                       # zooming in a graph refines the (downsampled) data displayed
+                       dash.dependencies.Input("graph_gen_load", "relayoutData"),
+                       dash.dependencies.Input("graph_flow_cap", "relayoutData")
                       ],
                      )(viz_server.update_temporal_figs)
 
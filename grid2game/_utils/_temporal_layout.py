@@ -423,6 +423,25 @@ def setupLayout(viz_server):
                          style={},  #  'height': '80vh'},
                          )
 
+    # forecast strip: next steps of the current state (only displayed with --lookahead)
+    lookahead_policy = dcc.Dropdown(id="lookahead-policy-dropdown",
+                                    options=[
+                                        {'label': 'do nothing', 'value': 'do_nothing'},
+                                        {'label': 'assistant', 'value': 'assistant'},
+                                    ],
+                                    value=viz_server.env.lookahead_policy,
+                                    clearable=False,
+                                    style={"minWidth": "150px"})
+    lookahead_strip = dcc.Graph(id="lookahead_strip",
+                                config={'displayModeBar': False,
+                                        "responsive": True},
+                                figure=viz_server.fig_lookahead)
+    lookahead_div = html.Div(id="lookahead_div",
+                             children=[html.Div([html.Label("Next steps with:"), lookahead_policy],
+                                                style={"display": "flex", "alignItems": "center"}),
+                                       lookahead_strip],
+                             style={} if viz_server.env.lookahead_horizon > 0 else {'display': 'none'})
+
     # page to click the data
     # see https://dash.plotly.com/interactive-graphing
 
@@ -584,10 +603,6 @@ def setupLayout(viz_server):
                                 id="temporal_graphs")
 
     # hidden control button, hack for having same output for multiple callbacks
-    interval_object = dcc.Interval(id='interval-component',
-                                   interval=viz_server.time_refresh * 1000,  # in milliseconds
-                                   n_intervals=0
-                                  )
     figrt_trigger_temporal_figs = html.Label("",
                                              id="figrt_trigger_temporal_figs",
                                              n_clicks=0)
@@ -695,6 +710,8 @@ def setupLayout(viz_server):
     set_seed_dummy_output = html.Label("", id="set_seed_dummy_output", n_clicks=0)
     update_progress_bar_from_act = html.Label("", id="update_progress_bar_from_act", n_clicks=0)
     update_progress_bar_from_figs = html.Label("", id="update_progress_bar_from_figs", n_clicks=0)
+    # "clicked" by the browser when the server notifies that something changed (see assets/push.js)
+    push_trigger = html.Label("", id="push_trigger", n_clicks=0, className="grid2game-push-trigger")
     hidden_interactions = html.Div([figrt_trigger_temporal_figs,
                                     unit_trigger_rt_graph, unit_trigger_for_graph, figrt_trigger_for_graph,
                                     figfor_trigger_for_graph, figrt_trigger_rt_graph,
@@ -711,15 +728,22 @@ def setupLayout(viz_server):
                                     chronic_names_dummy_output, set_seed_dummy_output,
                                     update_substation_layout_clicked_from_sub, update_substation_layout_clicked_from_grid,
                                     trigger_rt_extra_info, trigger_for_extra_info,
-                                    update_progress_bar_from_act, update_progress_bar_from_figs
+                                    update_progress_bar_from_act, update_progress_bar_from_figs,
+                                    push_trigger
                                    ],
                                    id="hidden_buttons_for_callbacks",
                                    style={'display': 'none'})
 
-    # timer for the automatic callbacks
+    # timer for the automatic callbacks (only used if the server does not push the updates)
     timer_callbacks = dcc.Interval(id="timer",
-                                   interval=500.  # in ms
+                                   interval=500.,  # in ms
+                                   disabled=viz_server.push_updates
                                   )
+    # the timeline is redrawn when the risks of the states of the current branch are computed (see BranchScreener)
+    screening_timer = dcc.Interval(id="screening_timer",
+                                   interval=2000.,  # in ms
+                                   disabled=viz_server.env.screener is None
+                                   )
 
     # Final page
     layout_css = "container-fluid h-100 d-md-flex d-xl-flex flex-md-column flex-xl-column"
@@ -734,13 +758,14 @@ def setupLayout(viz_server):
                             html.Br(),
                             # state_row,  # the two graphs of the grid
                             graph_col,  # the two graphs of the grid
+                            lookahead_div,
                             html.Br(),
                             interaction_and_action,
                             html.Br(),
                             temporal_graphs,
-                            interval_object,
                             hidden_interactions,
-                            timer_callbacks
+                            timer_callbacks,
+                            screening_timer
                         ])
 
     return layout
@@ -0,0 +1,84 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import threading
+import time
+
+
+class FramePacer(object):
+    """
+    Decides which of the states computed in "go" mode are displayed.
+
+    In "go" mode the steps are computed in the background, independently of the display. A new frame is shown
+    only when the previous one has been rendered and at most `target_fps` times per second. The intermediate
+    states are skipped, the frame displayed is always the last state computed.
+
+    The time to compute a step and the time to render a frame are measured (exponential moving averages).
+    """
+    def __init__(self, target_fps=4., smoothing=0.3, frame_timeout=5.):
+        if target_fps <= 0.:
+            raise RuntimeError(f"FramePacer: target_fps should be > 0, found {target_fps}")
+        self.frame_period = 1. / float(target_fps)  # in seconds
+        self.smoothing = float(smoothing)
+        self.frame_timeout = float(frame_timeout)  # a frame not rendered after that is considered lost
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """forget everything (called when the "go" mode starts)"""
+        with self._lock:
+            self.compute_time = None  # average time to compute a step (in seconds)
+            self.render_time = None  # average time to render a frame (in seconds)
+            self._frame_start = None  # time at which the frame being rendered has been sent, None if none
+            self._last_frame = None  # time at which the last frame has been sent
+            self._nb_pending = 0  # number of states computed and not displayed
+            self.nb_frames = 0
+            self.nb_skipped = 0
+
+    def _average(self, average, value):
+        if average is None:
+            return value
+        return (1. - self.smoothing) * average + self.smoothing * value
+
+    def _can_send_frame(self, now):
+        """whether a new frame can be sent, lock must be held"""
+        if self._frame_start is not None and now - self._frame_start < self.frame_timeout:
+            # the previous frame is still being rendered
+            return False
+        if self._last_frame is None:
+            return True
+        min_interval = max(self.frame_period, self.render_time or 0.)
+        return now - self._last_frame >= min_interval
+
+    def state_computed(self, compute_time) -> bool:
+        """a new state has been computed (in `compute_time` seconds), returns whether a frame should be sent"""
+        with self._lock:
+            self.compute_time = self._average(self.compute_time, compute_time)
+            self._nb_pending += 1
+            return self._can_send_frame(time.perf_counter())
+
+    def frame_sent(self):
+        """the last state computed is sent to the browser"""
+        with self._lock:
+            now = time.perf_counter()
+            self.nb_skipped += max(self._nb_pending - 1, 0)
+            self._nb_pending = 0
+            self._frame_start = now
+            self._last_frame = now
+            self.nb_frames += 1
+
+    def frame_rendered(self) -> bool:
+        """the frame has been rendered, returns whether a new one (with the states computed meanwhile) should be sent"""
+        with self._lock:
+            if self._frame_start is None:
+                return False
+            now = time.perf_counter()
+            self.render_time = self._average(self.render_time, now - self._frame_start)
+            self._frame_start = None
+            return self._nb_pending > 0 and self._can_send_frame(now)
+
@@ -0,0 +1,73 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import queue
+import threading
+
+
+class PushChannel(object):
+    """
+    Notifies the browsers displaying a session that something changed on the server side (for example a new
+    state has been computed), using "server sent events".
+
+    On the browser side (see "assets/push.js"), each notification "clicks" on all the (hidden) components with the
+    class "grid2game-push-trigger", which triggers the dash callbacks that were previously triggered by timers.
+    """
+    def __init__(self, keepalive=15.):
+        self.keepalive = float(keepalive)  # in seconds
+        self._subscribers = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def notify(self, event="update"):
+        """send a notification to all the browsers (notifications not yet received are merged)"""
+        with self._lock:
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    # the browser has not yet received the previous notification
+                    pass
+
+    def close(self):
+        """stop the streams (the browsers reconnect after the `retry` delay), eg when the session is evicted"""
+        with self._lock:
+            self._closed = True
+            for subscriber in self._subscribers:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber.put_nowait(None)
+
+    def stream(self):
+        """generator of the server sent events, for one browser"""
+        subscriber = queue.Queue(maxsize=1)
+        with self._lock:
+            if self._closed:
+                subscriber.put_nowait(None)
+            self._subscribers.append(subscriber)
+        try:
+            yield "retry: 1000\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=self.keepalive)
+                    if event is None:
+                        # the channel is closed
+                        return
+                    yield f"data: {event}\n\n"
+                except queue.Empty:
+                    # comment, only used to detect that the browser disconnected
+                    yield ": keepalive\n\n"
+        finally:
+            with self._lock:
+                self._subscribers.remove(subscriber)
+
+    @property
+    def nb_subscribers(self):
+        return len(self._subscribers)
@@ -0,0 +1,14 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+__all__ = ["SecurityAnalysis", "ContingencyResults", "BranchScreener",
+           "ForecastLookahead", "LookaheadResults"]
+
+from grid2game.analysis.securityAnalysis import SecurityAnalysis, ContingencyResults
+from grid2game.analysis.branchScreener import BranchScreener
+from grid2game.analysis.forecastLookahead import ForecastLookahead, LookaheadResults
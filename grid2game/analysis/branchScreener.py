@@ -0,0 +1,130 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import copy
+import logging
+import threading
+
+import numpy as np
+from grid2op.Exceptions import NoForecastAvailable
+
+
+class BranchScreener(object):
+    """
+    Screens, in a background thread, the states of the current branch of the tree of an `Env` (from the root to the
+    current node, and then the states already computed after it) and gives a risk to each of them (see
+    `EnvTree.set_risk`), the risky ones are highlighted in the timeline.
+
+    The risk of a state is its highest flow (relative to the thermal limit):
+
+    - "n1": after any single powerline outage (see `Env.security_analysis`, the results are shared)
+    - "forecast": forecast for the next step, if nothing is done
+
+    It is incremental: a state is screened only once. The states after the current node are screened first.
+    The lock of the environment is only held to read the tree and to store the risks: the simulations are made
+    on a copy of the "simulate" environment of the observations, so that they can run while the environment is
+    computing (eg in "go" mode).
+    """
+    MODES = ("n1", "forecast")
+
+    def __init__(self, env, mode="forecast", interval=1., logger=None):
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger.getChild("BranchScreener")
+        if mode not in type(self).MODES:
+            msg_ = f"BranchScreener: unknown mode \"{mode}\", available modes are {type(self).MODES}"
+            self.logger.error(msg_)
+            raise RuntimeError(msg_)
+        self.env = env
+        self.mode = mode
+        self.interval = float(interval)  # the branch is screened at least this often (in seconds)
+        self.version = 0  # incremented each time a risk is stored
+        self._obs_env = None  # copy of the "simulate" environment, only used by the screening thread
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """start the screening thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """something changed in the tree, the branch is screened again as soon as possible"""
+        self._wake.set()
+
+    def stop(self, timeout=None) -> None:
+        """stop the screening thread (the current simulation is finished first)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.screen()
+            except Exception as exc_:
+                self.logger.error(f"_loop: impossible to screen the current branch: {exc_}")
+
+    def _get_nodes_to_screen(self):
+        """nodes of the current branch not screened yet, the ones closest to the future first"""
+        env_tree = self.env.env_tree
+        current_node = env_tree.current_node
+        if current_node is None:
+            return []
+        branch = env_tree.get_current_branch(with_future=True)
+        current_pos = branch.index(current_node)
+        ordered = branch[current_pos + 1:] + branch[current_pos::-1]
+        return [node for node in ordered if np.isnan(env_tree.get_risk(node))]
+
+    def screen(self) -> int:
+        """screen the nodes of the current branch not screened yet, returns the number of nodes screened"""
+        with self.env.exclusive():
+            nb_reset = self.env._nb_reset
+            to_screen = self._get_nodes_to_screen()
+            if to_screen and self._obs_env is None:
+                self._obs_env = to_screen[0].obs._obs_env.copy()
+        nb_screened = 0
+        for node in to_screen:
+            if self._stop.is_set() or self._wake.is_set() or self.env._nb_reset != nb_reset:
+                # the branch changed (or the screener is stopped)
+                break
+            risk = self.get_risk(node, nb_reset)
+            with self.env.exclusive():
+                if self.env._nb_reset != nb_reset or not self.env.env_tree.set_risk(node, risk):
+                    break
+            self.version += 1
+            nb_screened += 1
+        return nb_screened
+
+    def get_risk(self, node, nb_reset) -> float:
+        """risk of the state of a node"""
+        obs, reward, done, info = node.get_obs_rewar_done_info()
+        if done:
+            # nothing to screen, the game over is already displayed
+            return 0.
+        # the observation is shared with the other threads, its "simulate" environment is not used
+        obs = copy.copy(obs)
+        obs._obs_env = self._obs_env
+        if self.mode == "n1":
+            glop_env = node._glop_env if node.has_glop_env else None
+            res = self.env._security_analysis.analyse((nb_reset, node.id), obs, glop_env=glop_env)
+            return float(res.worst_rho_per_line().max())
+        try:
+            sim_obs, sim_reward, sim_done, sim_info = obs.simulate(obs.action_helper(), time_step=1)
+        except NoForecastAvailable:
+            return float(obs.rho.max())
+        return np.inf if sim_done else float(sim_obs.rho.max())
@@ -0,0 +1,127 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from grid2op.Exceptions import NoForecastAvailable
+
+
+class LookaheadResults(object):
+    """what happens in the next steps of a state when a policy is followed"""
+    __slots__ = ("policy", "horizon", "max_rho", "time_stamps", "actions", "game_over", "compute_time")
+
+    def __init__(self, policy, horizon, max_rho, time_stamps, actions, game_over, compute_time=0.):
+        self.policy = policy
+        self.horizon = horizon
+        self.max_rho = max_rho  # highest flow at each step (inf for a game over)
+        self.time_stamps = time_stamps  # of each step
+        self.actions = actions  # performed to reach each step
+        self.game_over = game_over  # the last step is a game over
+        self.compute_time = compute_time
+
+    @property
+    def survival(self) -> int:
+        """number of steps before a game over (or number of steps computed if there is none)"""
+        return len(self.max_rho) - 1 if self.game_over else len(self.max_rho)
+
+
+class ForecastLookahead(object):
+    """
+    Follows a policy ("do_nothing" or "assistant") during the next `horizon` steps of a state and records the
+    highest flow at each step and when a game over happens.
+
+    The next steps are simulated with the forecasts of the state (`obs.simulate(..., time_step=k)`), so they are
+    limited to the horizon of these forecasts and they do not know the future outages (maintenance, opponent).
+    Each simulation starts from the state itself: the actions of the previous steps are added to the one of
+    the current step. The assistant followed is a copy of the one given, made once per assistant (the state of the
+    real assistant is not modified, the copy keeps its own state). The results are kept (by key, eg the id of the node in the tree, the policy and the horizon).
+    """
+    POLICIES = ("do_nothing", "assistant")
+
+    def __init__(self, cache_size=256, logger=None):
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger.getChild("ForecastLookahead")
+        self.cache_size = max(int(cache_size), 1)
+        self._cache = OrderedDict()  # key -> LookaheadResults
+        self._lock = threading.Lock()
+        self._assistant = None  # assistant given to `run` and its copy
+        self._assistant_copy = None
+
+    def get(self, key):
+        """results already computed for this key (None if they are not known)"""
+        with self._lock:
+            res = self._cache.get(key)
+            if res is not None:
+                self._cache.move_to_end(key)
+            return res
+
+    def _copy_assistant(self, policy, assistant):
+        """the assistant followed (None to do nothing), a copy so that the real one is not modified"""
+        if policy != "assistant" or assistant is None:
+            return None
+        if assistant is not self._assistant:
+            try:
+                self._assistant_copy = copy.deepcopy(assistant)
+            except Exception as exc_:
+                msg_ = f"ForecastLookahead: impossible to copy the assistant: {exc_}"
+                self.logger.error(msg_)
+                raise RuntimeError(msg_) from exc_
+            self._assistant = assistant
+        return self._assistant_copy
+
+    def run(self, key, action_space, obs, reward, done, policy="do_nothing", horizon=12, assistant=None):
+        """
+        results of following `policy` during `horizon` steps from the state `obs` (with the forecasts of this
+        state), computed only if they are not already known for this key.
+        """
+        if policy not in type(self).POLICIES:
+            msg_ = f"ForecastLookahead: unknown policy \"{policy}\", available policies are {type(self).POLICIES}"
+            self.logger.error(msg_)
+            raise RuntimeError(msg_)
+        res = self.get(key)
+        if res is not None:
+            return res
+        beg_ = time.perf_counter()
+        assistant = self._copy_assistant(policy, assistant)
+        max_rho, time_stamps, actions = [], [], []
+        game_over = False
+        total_action = action_space()  # actions performed since the state `obs`
+        obs_, reward_, done_ = obs, reward, done
+        for time_step in range(1, horizon + 1):
+            act = assistant.act(obs_, reward_, done_) if assistant is not None else action_space()
+            total_action = total_action + act
+            try:
+                obs_, reward_, done_, info_ = obs.simulate(total_action, time_step=time_step)
+            except NoForecastAvailable:
+                # the end of the forecasts (or of the scenario)
+                break
+            game_over = done_
+            max_rho.append(np.inf if game_over else float(obs_.rho.max()))
+            time_stamps.append(obs_.get_time_stamp())
+            actions.append(act)
+            if game_over:
+                break
+        res = LookaheadResults(policy, horizon, np.array(max_rho), time_stamps, actions, game_over,
+                               compute_time=time.perf_counter() - beg_)
+        with self._lock:
+            self._cache[key] = res
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return res
+
+    def clear(self) -> None:
+        """forget all the results"""
+        with self._lock:
+            self._cache.clear()
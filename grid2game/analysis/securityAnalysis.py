@@ -0,0 +1,214 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from grid2op.Rules import AlwaysLegal, RulesChecker
+
+from grid2game.worker_pool import get_shared_pool, get_worker_env
+
+
+def _simulate_outages(obs, line_ids, action_space=None):
+    """
+    flows (in A) after the disconnection of each powerline of `line_ids` (with the injections of `obs`),
+    and whether the powerflow diverged
+    """
+    if action_space is None:
+        action_space = obs.action_helper
+    amps = np.zeros((len(line_ids), obs.n_line), dtype=float)
+    diverged = np.zeros(len(line_ids), dtype=bool)
+    obs_env = obs._obs_env
+    game_rules = obs_env._game_rules
+    # a powerline in cooldown can still trip
+    obs_env._game_rules = RulesChecker(legalActClass=AlwaysLegal)
+    try:
+        for row, line_id in enumerate(line_ids):
+            act = action_space({"set_line_status": [(int(line_id), -1)]})
+            sim_obs, sim_reward, sim_done, sim_info = obs.simulate(act, time_step=0)
+            if sim_done:
+                diverged[row] = True
+            else:
+                amps[row] = sim_obs.a_or
+    finally:
+        obs_env._game_rules = game_rules
+    return amps, diverged
+
+
+def _simulate_outages_worker(task):
+    """simulate some outages in a worker process"""
+    obs_bytes, line_ids = task
+    return _simulate_outages(pickle.loads(obs_bytes), line_ids, get_worker_env().action_space)
+
+
+class ContingencyResults(object):
+    """
+    Flows after each single powerline outage (contingency) of a state: row `i` of `rho` is the state of the grid
+    once the powerline `line_ids[i]` is disconnected (the flows are those of the origin side).
+    """
+    __slots__ = ("line_ids", "rho", "diverged", "compute_time")
+
+    def __init__(self, line_ids, rho, diverged, compute_time=0.):
+        self.line_ids = line_ids  # powerline disconnected in each contingency
+        self.rho = rho  # shape (nb contingencies, nb powerlines)
+        self.diverged = diverged  # the powerflow diverged (eg the grid is split in two)
+        self.compute_time = compute_time
+
+    @property
+    def max_rho(self) -> np.ndarray:
+        """highest flow after each contingency (inf if the powerflow diverged)"""
+        if not self.line_ids.shape[0]:
+            return np.zeros(0, dtype=float)
+        return np.where(self.diverged, np.inf, self.rho.max(axis=1))
+
+    @property
+    def worst_line(self) -> np.ndarray:
+        """powerline with the highest flow after each contingency (-1 if the powerflow diverged)"""
+        if not self.line_ids.shape[0]:
+            return np.zeros(0, dtype=int)
+        return np.where(self.diverged, -1, self.rho.argmax(axis=1))
+
+    def worst_rho_per_line(self) -> np.ndarray:
+        """highest flow of each powerline among all the contingencies (that did not diverge)"""
+        converged = self.rho[~self.diverged]
+        if not converged.shape[0]:
+            return np.zeros(self.rho.shape[1], dtype=float)
+        return converged.max(axis=0)
+
+    def ranking(self, nb_max=None) -> list:
+        """
+        the contingencies, worst first: a list of (disconnected powerline, highest flow, powerline with this
+        flow, number of powerlines overloaded)
+        """
+        max_rho = self.max_rho
+        worst_line = self.worst_line
+        nb_overloaded = np.sum(self.rho > 1., axis=1)
+        order = np.argsort(-max_rho, kind="stable")
+        if nb_max is not None:
+            order = order[:nb_max]
+        return [(int(self.line_ids[row]), float(max_rho[row]), int(worst_line[row]), int(nb_overloaded[row]))
+                for row in order]
+
+
+class SecurityAnalysis(object):
+    """
+    Computes the flows after each single powerline outage ("N-1" analysis) of a state.
+
+    With lightsim2grid, all the contingencies are computed in one call to its `ContingencyAnalysis`. With the
+    other backends, they are simulated (with the injections of the state) in `nb_workers` worker processes
+    (created the first time they are needed and shared by all the analyses of this process with the same
+    environment, see `grid2game.worker_pool.get_shared_pool`) or sequentially if `nb_workers` is 0.
+
+    The results of the last `cache_size` states analysed are kept, by key (eg the id of the node in the tree).
+    """
+    def __init__(self, env_path=None, backend_cls=None, nb_workers=0, cache_size=256, logger=None):
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger.getChild("SecurityAnalysis")
+        self.nb_workers = int(nb_workers) if env_path is not None and backend_cls is not None else 0
+        self.cache_size = max(int(cache_size), 1)
+        self._env_path = env_path
+        self._backend_cls = backend_cls
+        self._pool = None
+        self._cache = OrderedDict()  # key -> ContingencyResults
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_lightsim(backend) -> bool:
+        """whether the contingencies are computed by lightsim2grid with this backend"""
+        try:
+            from lightsim2grid import LightSimBackend
+        except ImportError:
+            return False
+        return isinstance(backend, LightSimBackend)
+
+    def get(self, key):
+        """results already computed for this key (None if they are not known)"""
+        with self._lock:
+            res = self._cache.get(key)
+            if res is not None:
+                self._cache.move_to_end(key)
+            return res
+
+    def analyse(self, key, obs, glop_env=None) -> ContingencyResults:
+        """
+        results of the N-1 analysis of `obs`, computed only if they are not already known for this key.
+
+        `glop_env` is the grid2op environment in the state of `obs` (lightsim2grid can only be used with it), if
+        it is not given the contingencies are simulated with `obs`.
+        """
+        res = self.get(key)
+        if res is not None:
+            return res
+        beg_ = time.perf_counter()
+        line_ids = np.flatnonzero(obs.line_status)
+        if glop_env is not None and self.is_lightsim(glop_env.backend):
+            amps, diverged = self._analyse_lightsim(glop_env, line_ids)
+        elif self.nb_workers > 0 and line_ids.shape[0] > self.nb_workers:
+            amps, diverged = self._analyse_parallel(obs, line_ids)
+        else:
+            amps, diverged = _simulate_outages(obs, line_ids)
+        rho = amps / obs._thermal_limit
+        rho[diverged] = 0.
+        res = ContingencyResults(line_ids, rho, diverged, compute_time=time.perf_counter() - beg_)
+        self.logger.info(f"analyse: {line_ids.shape[0]} contingencies computed in {res.compute_time:.3f}s")
+        with self._lock:
+            self._cache[key] = res
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return res
+
+    @staticmethod
+    def _analyse_lightsim(glop_env, line_ids):
+        """all the contingencies in one call to lightsim2grid"""
+        try:
+            from lightsim2grid import ContingencyAnalysis
+        except ImportError:
+            # older versions of lightsim2grid
+            from lightsim2grid import SecurityAnalysis as ContingencyAnalysis
+        analysis = ContingencyAnalysis(glop_env)
+        try:
+            analysis.add_multiple_contingencies(*[int(line_id) for line_id in line_ids])
+            # depending on the version: (amps, voltages) or (active powers, amps, voltages)
+            amps = np.array(analysis.get_flows()[-2], dtype=float)
+        finally:
+            if hasattr(analysis, "close"):
+                analysis.close()
+        # the flows are all 0. (or nan) when the powerflow diverged
+        diverged = ~np.all(np.isfinite(amps), axis=1) | np.all(amps == 0., axis=1)
+        amps[diverged] = 0.
+        return amps, diverged
+
+    def _analyse_parallel(self, obs, line_ids):
+        """the contingencies are dealt to the worker processes (sequentially if they cannot be used)"""
+        if self._pool is None:
+            self._pool = get_shared_pool(self.nb_workers, self._env_path, self._backend_cls, logger=self.logger)
+        obs_bytes = pickle.dumps(obs)
+        chunks = np.array_split(line_ids, max(self._pool.nb_workers, 1))
+        results = self._pool.map(_simulate_outages_worker, [(obs_bytes, chunk) for chunk in chunks])
+        if results is None:
+            # the worker processes cannot be used
+            self.close()
+            self.nb_workers = 0
+            return _simulate_outages(obs, line_ids)
+        return (np.concatenate([amps for amps, _ in results]),
+                np.concatenate([diverged for _, diverged in results]))
+
+    def clear(self) -> None:
+        """forget all the results"""
+        with self._lock:
+            self._cache.clear()
+
+    def close(self) -> None:
+        """stop using the worker processes (they are shared, they are not stopped)"""
+        self._pool = None
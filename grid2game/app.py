@@ -10,8 +10,12 @@
 
 
 import argparse
+import sys
+import time
 
-from grid2game.VizServer import VizServer
+# the other modules of grid2game (dash, grid2op...) are slow to import: they are only imported once the arguments
+# are parsed (so that eg "grid2game --help" is fast)
+from grid2game.startup_profile import StartupProfiler
 
 
 def cli():
@@ -46,6 +50,110 @@ def cli():
                     default="", type=str,
                     help="path to look for grid2op config parameters (used in env.make(..., **g2op_config)).")
 
+    parser.add_argument("--fig_cache_size", required=False,
+                        default=64., type=float,
+                        help="Maximum memory (in MB) used to cache the figures of the already visited states.")
+
+    parser.add_argument("--temporal_max_points", required=False,
+                        default=1000, type=int,
+                        help="Maximum number of points displayed for each curve of the temporal series (long "
+                             "series are downsampled for the display only).")
+
+    parser.add_argument("--temporal_downsampling", required=False,
+                        default="lttb", type=str, choices=["lttb", "minmax"],
+                        help="Method used to downsample the long temporal series for the display.")
+
+    parser.add_argument("--max_sessions", required=False,
+                        default=0, type=int,
+                        help="Maximum number of users, each with its own environment, the app can handle at the "
+                             "same time (0 means all the users share the same environment).")
+
+    parser.add_argument("--session_timeout", required=False,
+                        default=1800., type=float,
+                        help="Time (in seconds) after which the session of an inactive user is removed "
+                             "(only used if --max_sessions > 0).")
+
+    parser.add_argument("--session_spill_dir", required=False,
+                        default="", type=str,
+                        help="Directory where the sessions of the inactive users are saved before being removed "
+                             "from memory (only used if --max_sessions > 0). If empty, these sessions are lost.")
+
+    parser.add_argument("--go_fps", required=False,
+                        default=4., type=float,
+                        help="Maximum number of states displayed per second in \"go\" mode (the intermediate "
+                             "states are computed but not displayed).")
+
+    parser.add_argument("--episode_log_dir", required=False,
+                        default="", type=str,
+                        help="Directory where all the states computed are saved while playing (compressed chunks, "
+                             "see grid2game.tree.EpisodeLogger). Nothing is saved if empty.")
+
+    parser.add_argument("--load_episode", required=False,
+                        default="", type=str,
+                        help="Path of an episode saved by a grid2op runner (eg \"path_save/0000\") to replay in the "
+                             "interface. The states are read from the logs, they are not simulated again.")
+
+    parser.add_argument("--assistant_memo_size", required=False,
+                        default=1024, type=int,
+                        help="Number of actions of the assistant remembered for the states already seen, so that "
+                             "the assistant is not called again when a state is reached twice (only for the "
+                             "assistants with \"is_deterministic = True\"). 0 to disable.")
+
+    parser.add_argument("--plan_actions", required=False,
+                        default=["line_change", "topo_set"], type=str, nargs="+",
+                        help="Kinds of unitary actions the planner (\"Plan\" button) can use, among \"line_change\", "
+                             "\"line_set\", \"topo_set\" and \"redispatch\".")
+
+    parser.add_argument("--plan_depth", required=False,
+                        default=3, type=int,
+                        help="Number of steps the planner looks ahead.")
+
+    parser.add_argument("--plan_time_budget", required=False,
+                        default=60., type=float,
+                        help="Maximum time (in seconds) the planner can use.")
+
+    parser.add_argument("--plan_node_budget", required=False,
+                        default=100, type=int,
+                        help="Maximum number of states the planner can add to the tree.")
+
+    parser.add_argument("--plan_workers", required=False,
+                        default=1, type=int,
+                        help="Number of threads used by the planner to simulate / compute the states.")
+
+    parser.add_argument("--n1_workers", required=False,
+                        default=-1, type=int,
+                        help="Number of worker processes used for the N-1 analysis (\"N-1\" button) when the "
+                             "backend is not lightsim2grid (-1: one less than the number of CPUs, at most 4; "
+                             "0: computed in the main process). The workers are shared by all the sessions.")
+
+    parser.add_argument("--screening", required=False,
+                        default="none", type=str, choices=["none", "n1", "forecast"],
+                        help="Risk of the states of the current branch computed in the background (the risky ones "
+                             "are highlighted in the timeline): \"n1\" for the highest flow after any single "
+                             "powerline outage, \"forecast\" for the highest flow forecast for the next step.")
+
+    parser.add_argument("--lookahead", required=False,
+                        default=0, type=int,
+                        help="Number of steps after the current state displayed in the \"forecast strip\" (highest "
+                             "flow at each step when doing nothing or following the assistant, simulated with the "
+                             "forecasts). 0 to disable.")
+
+    parser.add_argument("--profile_startup", "--profile-startup", required=False,
+                        action="store_true", default=False,
+                        help="Print the time taken by each phase of the startup and by the imports of each "
+                             "package (similar to \"python -X importtime\").")
+
+    parser.add_argument("--chronics_cache_size", required=False,
+                        default=0., type=float,
+                        help="Maximum memory (in MB) used to keep the scenarios in memory. The next scenarios (and "
+                             "the one selected in the dropdown) are loaded in the background so that resetting to a "
+                             "new scenario is faster. 0 to disable.")
+
+    parser.add_argument("--polling", required=False,
+                        action="store_true", default=False,
+                        help="The browser periodically asks the server for updates instead of being notified "
+                             "by the server (server sent events).")
+
     # TODO for backend too
 
     # TODO add an option to change the parameters of the environment
@@ -58,12 +166,23 @@ def cli():
 
 
 def get_viz_server(server=None):
+    beg_ = time.perf_counter()
     args = cli()
-    viz_server = VizServer(build_args=args, server=server)
+    with StartupProfiler(enabled=args.profile_startup) as profiler:
+        profiler.record("parse the arguments", time.perf_counter() - beg_)
+        with profiler.phase("import the modules"):
+            from grid2game.VizServer import VizServer
+        with profiler.phase("create the environment and the app"):
+            viz_server = VizServer(build_args=args, server=server)
     return args.dev, viz_server
 
 
 def start_cli():
+    if len(sys.argv) > 1 and sys.argv[1] == "evaluate":
+        # headless evaluation of assistants, eg "grid2game evaluate --assistant_path xxx --nb_process 8"
+        from grid2game.evaluation.batchEvaluation import main
+        main(sys.argv[2:])
+        return
     debug, viz_server = get_viz_server()
     viz_server.run_server(debug=debug)
 
@@ -0,0 +1,24 @@
+// Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+// See AUTHORS.txt
+// This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+// If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+// you can obtain one at http://mozilla.org/MPL/2.0/.
+// SPDX-License-Identifier: MPL-2.0
+// This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+// the server notifies the browser (with server sent events) when something changed, for example when a new
+// state has been computed. This "clicks" on the hidden components that trigger the relevant dash callbacks.
+// (if the server uses polling instead, the endpoint answers "204: no content" and the connection is not retried,
+// otherwise the browser reconnects when the server closes the stream, eg when the session is evicted)
+(function () {
+    if (typeof EventSource === "undefined") {
+        return;
+    }
+    var source = new EventSource("_grid2game/push");
+    source.onmessage = function () {
+        var triggers = document.getElementsByClassName("grid2game-push-trigger");
+        for (var i = 0; i < triggers.length; i++) {
+            triggers[i].click();
+        }
+    };
+})();
@@ -1 +1,2 @@
-from grid2game.envs.env import Env
\ No newline at end of file
+from grid2game.envs.env import Env
+from grid2game.envs.envSnapshot import EnvSnapshot
\ No newline at end of file
@@ -0,0 +1,238 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import copy
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from grid2op.Chronics import Multifolder, MultifolderWithCache
+from grid2op.Exceptions import ChronicsError
+
+
+class ChronicsCache(object):
+    """
+    Scenarios (grid2op `GridValue` already initialized) kept in memory, the least recently used ones are removed
+    when they use more than `max_memory` bytes. They can be loaded in a background thread (see `prefetch`).
+
+    The data stored are never modified (see `PrefetchMultifolder.initialize`) so it can be shared by all the copies
+    of an environment.
+    """
+    def __init__(self, max_memory=256 * 1024 ** 2, idle_timeout=10., logger=None):
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger.getChild("ChronicsCache")
+        self.max_memory = int(max_memory)
+        self.idle_timeout = float(idle_timeout)  # the loading thread stops after this time without anything to load
+        self.memory_used = 0
+        self._data = OrderedDict()  # key -> (data, size in bytes), least recently used first
+        self._loading = {}  # key -> event set once the data is loaded
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # the copies of an environment share the scenarios in memory
+        return self
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    @staticmethod
+    def get_size(data) -> int:
+        """memory (in bytes) used by the arrays of a scenario"""
+        return sum(val.nbytes for val in vars(data).values() if isinstance(val, np.ndarray))
+
+    def get(self, key):
+        """data of a scenario if it is in memory (None otherwise)"""
+        with self._lock:
+            res = self._data.get(key)
+            if res is None:
+                return None
+            self._data.move_to_end(key)
+            return res[0]
+
+    def get_or_load(self, key, load_fn):
+        """data of a scenario, loaded with `load_fn(key)` if it is not in memory"""
+        res = self.get(key)
+        if res is None:
+            res = self._load(key, load_fn)
+        return res
+
+    def _load(self, key, load_fn):
+        """load a scenario, or wait for it if another thread is loading it"""
+        with self._lock:
+            event = self._loading.get(key)
+            if event is None:
+                event = threading.Event()
+                self._loading[key] = event
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            event.wait()
+            res = self.get(key)
+            if res is not None:
+                return res
+            # it failed in the other thread, try again here (and raise the error)
+            return load_fn(key)
+        try:
+            beg_ = time.perf_counter()
+            res = load_fn(key)
+            size = self.get_size(res)
+            with self._lock:
+                self._data[key] = (res, size)
+                self.memory_used += size
+                self._evict()
+            self.logger.info(f"_load: scenario \"{key[0]}\" loaded in {time.perf_counter() - beg_:.3f}s "
+                             f"({len(self._data)} scenarios in memory, {self.memory_used / 1024 ** 2:.1f}MB)")
+            return res
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def set_max_memory(self, max_memory) -> None:
+        """change the maximum memory used (in bytes)"""
+        with self._lock:
+            self.max_memory = int(max_memory)
+            self._evict()
+
+    def _evict(self):
+        """remove the least recently used scenarios (but the last one) until the memory cap is met, lock must be held"""
+        while self.memory_used > self.max_memory and len(self._data) > 1:
+            _, (_, size_removed) = self._data.popitem(last=False)
+            self.memory_used -= size_removed
+
+    def prefetch(self, keys, load_fn) -> None:
+        """load these scenarios in the background (if they are not already in memory)"""
+        for key in keys:
+            self._queue.put((key, load_fn))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                key, load_fn = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            with self._lock:
+                if key in self._data or key in self._loading:
+                    continue
+            try:
+                self._load(key, load_fn)
+            except Exception as exc_:
+                self.logger.error(f"_loop: impossible to load the scenario \"{key[0]}\": {exc_}")
+
+    def clear(self) -> None:
+        """remove all the scenarios from memory"""
+        with self._lock:
+            self._data.clear()
+            self.memory_used = 0
+
+
+class PrefetchMultifolder(MultifolderWithCache):
+    """
+    Same as the `MultifolderWithCache` of grid2op (the scenarios are kept in memory) except that:
+
+    - all the scenarios can be played, they are only loaded (synchronously) when they are played for the first time
+    - they can be loaded in advance, in a background thread, with `prefetch`
+    - the memory used is limited (see `ChronicsCache`)
+    - the copies of the environment (eg the ones stored in the tree) share the same scenarios in memory
+
+    It is used if the environment is created with `chronics_class=PrefetchMultifolder`.
+    """
+    def __init__(self, *args, **kwargs):
+        MultifolderWithCache.__init__(self, *args, **kwargs)
+        self.chronics_cache = ChronicsCache()
+
+    def _default_filter(self, x):
+        """all the scenarios are kept (contrary to the `MultifolderWithCache`, they are not all loaded at once)"""
+        return True
+
+    def reset(self):
+        """select the scenarios to play (they are loaded when played or prefetched)"""
+        return Multifolder.reset(self)
+
+    def _load_data(self, key):
+        """read a scenario from the hard drive"""
+        path, max_iter = key
+        data = self.gridvalueClass(time_interval=self.time_interval,
+                                   sep=self.sep,
+                                   path=path,
+                                   max_iter=max_iter,
+                                   chunk_size=None)
+        # the random part of the scenario (if any) does not depend on when it is loaded
+        data.seed(zlib.crc32(os.path.basename(path).encode()) % np.iinfo(np.int32).max)
+        data.initialize(self._order_backend_loads,
+                        self._order_backend_prods,
+                        self._order_backend_lines,
+                        self._order_backend_subs,
+                        self._names_chronics_to_backend)
+        return data
+
+    def initialize(self,
+                   order_backend_loads,
+                   order_backend_prods,
+                   order_backend_lines,
+                   order_backend_subs,
+                   names_chronics_to_backend=None):
+        self._order_backend_loads = order_backend_loads
+        self._order_backend_prods = order_backend_prods
+        self._order_backend_lines = order_backend_lines
+        self._order_backend_subs = order_backend_subs
+        self._names_chronics_to_backend = names_chronics_to_backend
+        self.n_gen = len(order_backend_prods)
+        self.n_load = len(order_backend_loads)
+        self.n_line = len(order_backend_lines)
+        if self._order is None:
+            self.reset()
+        key = (self.subpaths[self._order[self._prev_cache_id]], self.max_iter)
+        # the data in memory are not modified, the scenario is played on a copy
+        self.data = copy.deepcopy(self.chronics_cache.get_or_load(key, self._load_data))
+        # same random numbers drawn as the grid2op `Multifolder`
+        self.data.seed(self.space_prng.randint(np.iinfo(np.int32).max))
+        self.data.next_chronics()
+
+    def get_next_ids(self, nb) -> list:
+        """names of the `nb` scenarios played after this one (if the environment is reset without setting an id)"""
+        nb = min(int(nb), len(self._order) - 1)
+        res = []
+        for delta in range(1, nb + 1):
+            path = self.subpaths[self._order[(self._prev_cache_id + delta) % len(self._order)]]
+            res.append(os.path.basename(path))
+        return res
+
+    def prefetch(self, chronics_ids) -> None:
+        """load these scenarios (their name or path) in the background"""
+        if getattr(self, "_order_backend_loads", None) is None:
+            # not initialized yet
+            return
+        keys = []
+        for chronics_id in chronics_ids:
+            path = next((self.subpaths[number] for number in self._order
+                         if chronics_id in (self.subpaths[number], os.path.basename(self.subpaths[number]))), None)
+            if path is None:
+                raise ChronicsError(f"PrefetchMultifolder: impossible to find the scenario \"{chronics_id}\"")
+            keys.append((path, self.max_iter))
+        self.chronics_cache.prefetch(keys, self._load_data)
@@ -6,41 +6,107 @@
 # SPDX-License-Identifier: MPL-2.0
 # This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
 import time
+import threading
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 
 
 class ComputeWrapper(ABC):
     """simple class to wrapper the logic of an heavy computation going on.
 
      For the computation itself, please override `do_computation`
+
+     All the computations (and everything that modifies the state, see `exclusive`) are serialized by a lock.
+     Threads can wait for the end of a computation with `wait_computation_over` (without polling).
      """
     def __init__(self):
         self.__is_computing = False  # whether or not something is being computed
         self.__computation_started = False  # whether or not something needs to be computed
         self.count = 0
+        self._compute_lock = threading.RLock()  # serializes everything that modifies the state
+        self._state_changed = threading.Condition()  # protects the flags above
+        self._worker = None  # thread running the computations in the background (see `compute_in_background`)
 
     @abstractmethod
     def do_computation(self):
         pass
 
+    def after_computation(self):
+        """called at the end of each computation, with the computation lock held"""
+        pass
+
     def heavy_compute(self):
-        if not self.__computation_started:
-            return None
-        if self.__is_computing:
-            return None
-        self.__is_computing = True
-        res = self.do_computation()
-        self.__is_computing = False
+        with self._state_changed:
+            if not self.__computation_started:
+                return None
+            if self.__is_computing:
+                return None
+            self.__is_computing = True
+        try:
+            with self._compute_lock:
+                res = self.do_computation()
+                self.after_computation()
+        finally:
+            with self._state_changed:
+                self.__is_computing = False
+                self._state_changed.notify_all()
         return res
 
+    def compute_in_background(self, on_computed=None, on_over=None) -> bool:
+        """
+        run the computations in a thread, until `stop_computation` is called. `on_computed(duration)` is called
+        after each of them and `on_over()` when the thread stops. Returns False if such a thread is already running.
+        """
+        with self._state_changed:
+            if self._worker is not None and self._worker.is_alive():
+                return False
+            self._worker = threading.Thread(target=self._background_loop,
+                                            args=(on_computed, on_over),
+                                            daemon=True)
+            self._worker.start()
+        return True
+
+    def _background_loop(self, on_computed, on_over):
+        try:
+            while self.needs_compute():
+                # another thread might be computing
+                self.wait_computation_over()
+                beg_ = time.perf_counter()
+                self.heavy_compute()
+                if on_computed is not None:
+                    on_computed(time.perf_counter() - beg_)
+        finally:
+            if on_over is not None:
+                on_over()
+
+    @contextmanager
+    def exclusive(self):
+        """context manager to modify the state outside of `do_computation` (no computation can run meanwhile)"""
+        with self._compute_lock:
+            yield
+
+    def wait_computation_over(self, timeout=None, include_pending=False) -> bool:
+        """
+        wait until the current computation (and the one requested but not started yet if `include_pending`)
+        is over. Returns False if this did not happen in `timeout` seconds.
+        """
+        with self._state_changed:
+            return self._state_changed.wait_for(lambda: not (self.__is_computing or
+                                                             (include_pending and self.__computation_started)),
+                                                timeout=timeout)
+
     def is_computing(self):
         return self.__is_computing
 
     def start_computation(self):
-        self.__computation_started = True
+        with self._state_changed:
+            self.__computation_started = True
+            self._state_changed.notify_all()
 
     def stop_computation(self):
-        self.__computation_started = False
+        with self._state_changed:
+            self.__computation_started = False
+            self._state_changed.notify_all()
 
     def needs_compute(self):
         return self.__computation_started
@@ -16,17 +16,24 @@ from grid2op.Backend import PandaPowerBackend
 from grid2op.Exceptions import NoForecastAvailable
 from grid2op.Chronics import Multifolder
 
-try:
-    from lightsim2grid import LightSimBackend
-    bkClass = LightSimBackend
-except ImportError:
-    # TODO: logger here
-    bkClass = PandaPowerBackend
-
-
 from grid2game.agents import load_assistant
+from grid2game.analysis import BranchScreener, ForecastLookahead, SecurityAnalysis
+from grid2game.envs.chronicsPrefetch import PrefetchMultifolder
 from grid2game.envs.computeWrapper import ComputeWrapper
-from grid2game.tree import EnvTree
+from grid2game.envs.envSnapshot import EnvSnapshot
+from grid2game.envs.warmStart import make_glop_env, preload_glop_env
+from grid2game.planning import BeamSearchPlanner, make_catalogue
+from grid2game.tree import EnvTree, EpisodeLogger, export_current_branch, export_tree
+
+
+def _get_backend_class():
+    """lightsim2grid if it is installed (it is only imported when an environment is created), pandapower otherwise"""
+    try:
+        from lightsim2grid import LightSimBackend
+        return LightSimBackend
+    except ImportError:
+        # TODO: logger here
+        return PandaPowerBackend
 
 
 class Env(ComputeWrapper):
@@ -45,6 +52,14 @@ class Env(ComputeWrapper):
                  assistant_seed=0,
                  logger=None,
                  config_dict=None,
+                 episode_log_dir=None,
+                 assistant_memo_size=1024,
+                 security_analysis_workers=None,
+                 screening_mode=None,
+                 lookahead_horizon=0,
+                 lookahead_policy="do_nothing",
+                 warm_start=False,
+                 chronics_cache_size=0.,
                  **kwargs):
         ComputeWrapper.__init__(self)
 
@@ -56,25 +71,73 @@ class Env(ComputeWrapper):
 
         if config_dict is None:
             config_dict = {}
+        if chronics_cache_size > 0 and "chronics_class" not in config_dict and "chronics_class" not in kwargs:
+            # the scenarios are kept in memory, the next ones are loaded in the background (see `prefetch_chronics`)
+            kwargs["chronics_class"] = PrefetchMultifolder
 
         # TODO some configuration here
-        self.glop_env = grid2op.make(env_name,
-                                     backend=bkClass(),
-                                     action_class=PlayableAction,
-                                     logger=self.logger,
-                                     **config_dict,
-                                     **kwargs)
+        if warm_start:
+            # copy of an environment already made in this process (or in its parent, see `Env.preload`)
+            self.glop_env = make_glop_env(env_name,
+                                          _get_backend_class(),
+                                          action_class=PlayableAction,
+                                          logger=self.logger,
+                                          **config_dict,
+                                          **kwargs)
+        else:
+            self.glop_env = grid2op.make(env_name,
+                                         backend=_get_backend_class()(),
+                                         action_class=PlayableAction,
+                                         logger=self.logger,
+                                         **config_dict,
+                                         **kwargs)
         self.logger.info("Grid2op environment initialized")
+        if isinstance(self.glop_env.chronics_handler.real_data, PrefetchMultifolder):
+            self.glop_env.chronics_handler.real_data.chronics_cache.set_max_memory(chronics_cache_size * 1024 ** 2)
+        self.nb_chronics_prefetch = 2  # number of scenarios loaded in advance after each reset
         self.do_stop_if_alarm = True  # I stop if an alarm is raised by the assistant, by default
         # TODO have a way to change self.do_stop_if_alarm easily from the UI
 
-        self.env_tree = EnvTree()
+        self.env_tree = EnvTree(assistant_memo_size=assistant_memo_size)
+        # all the states computed can be streamed on the hard drive, while playing
+        self.episode_logger = None
+        if episode_log_dir:
+            self.episode_logger = EpisodeLogger(episode_log_dir, logger=self.logger)
+            self.env_tree.set_episode_logger(self.episode_logger)
+            self.logger.info(f"the episodes are logged in \"{self.episode_logger.run_dir}\"")
+        # N-1 analysis of the states (see `security_analysis`), the worker processes are shared by all the `Env`
+        if security_analysis_workers is None:
+            security_analysis_workers = min(4, (os.cpu_count() or 1) - 1)
+        backend_cls = type(self.glop_env.backend)
+        self._security_analysis = SecurityAnalysis(env_path=self.glop_env.get_path_env(),
+                                                   backend_cls=getattr(backend_cls, "_INIT_GRID_CLS", backend_cls),
+                                                   nb_workers=security_analysis_workers,
+                                                   logger=self.logger)
+        # next steps of the current state, displayed if `lookahead_horizon` > 0 (see `lookahead`)
+        self._lookahead = ForecastLookahead(logger=self.logger)
+        self.lookahead_horizon = int(lookahead_horizon)
+        self.lookahead_policy = lookahead_policy
+        # risk of the states of the current branch, computed in the background (None to disable)
+        self.screener = None
+        if screening_mode:
+            self.screener = BranchScreener(self, mode=screening_mode, logger=self.logger)
         self._current_action = None
         self._sim_obs = None
         self._sim_reward = None
         self._sim_done = None
         self._sim_info = None
         self._current_assistant_action = None
+        # whether self._sim_obs is the forecast "by default" of the current node (and not the result of
+        # a call to "simulate" for example)
+        self._sim_obs_is_default = False
+        self._nb_reset = 0  # number of times the environment has been reset (node ids are reset too)
+        self._last_seed = None  # last seed given to the environment (None if not seeded)
+        # when the environment has been seeded, each episode is seeded (see `init_state`) to be able to replay it
+        self._seed_prng = None
+        self._next_episode_seed = None
+        self._episode_seed = None  # seed of the current episode (None if not seeded)
+        self._snapshot = None  # read only view of the current state, see `snapshot`
+        self._snapshot_version = 0
 
         # define variables
         self._should_display = True
@@ -96,6 +159,28 @@ class Env(ComputeWrapper):
         
         # actions to explore
         self.all_topo_actions = None
+        # actions the planner can use (for each kind of catalogue) and last plan found
+        self._plan_catalogues = {}
+        self.last_plan = None
+
+        if self.screener is not None:
+            self.screener.start()
+
+    @staticmethod
+    def preload(env_name, config_dict=None, logger=None, **kwargs):
+        """
+        make the grid2op environment once, the `Env` created later with `warm_start=True` (and the same arguments)
+        copy it instead of making it again. Made before forking (eg in a gunicorn app loaded with "--preload") it
+        is shared by all the worker processes.
+        """
+        if config_dict is None:
+            config_dict = {}
+        preload_glop_env(env_name,
+                         _get_backend_class(),
+                         action_class=PlayableAction,
+                         logger=logger,
+                         **config_dict,
+                         **kwargs)
 
     def is_assistant_illegal(self):
         if "is_illegal" in self._sim_info:
@@ -112,11 +197,56 @@ class Env(ComputeWrapper):
         return self._should_display
 
     def get_timeline_figure(self):
-        return self.env_tree.plot_plotly()
+        with self.exclusive():
+            # the tree might be growing in the background (in "go" mode)
+            return self.env_tree.plot_plotly()
 
     def get_current_node_id(self):
         return self.env_tree.current_node.id
 
+    @property
+    def snapshot(self) -> EnvSnapshot:
+        """last consistent (read only) state of the environment, can be read while a computation is running"""
+        return self._snapshot
+
+    def _publish_snapshot(self):
+        """make the current state visible to the readers of `snapshot`"""
+        obs, reward, done, info = self.env_tree.current_node.get_obs_rewar_done_info()
+        lookahead = None
+        if self.lookahead_horizon > 0 and self.do_i_display() and not done:
+            try:
+                lookahead = self.lookahead()
+            except Exception as exc_:
+                self.logger.error(f"_publish_snapshot: impossible to look ahead: {exc_}")
+        self._snapshot_version += 1
+        self._snapshot = EnvSnapshot(version=self._snapshot_version,
+                                     nb_reset=self._nb_reset,
+                                     node_id=self.env_tree.current_node.id,
+                                     obs=obs,
+                                     reward=reward,
+                                     done=done,
+                                     info=info,
+                                     prev_action_is_illegal=self.env_tree.current_node.prev_action_is_illegal,
+                                     sim_obs=self._sim_obs,
+                                     sim_info=self._sim_info,
+                                     sim_obs_is_default=self._sim_obs_is_default,
+                                     lookahead=lookahead)
+        if self.screener is not None:
+            # the current branch might have changed
+            self.screener.wake()
+
+    def after_computation(self):
+        if self.env_tree.current_node is not None:
+            self._publish_snapshot()
+
+    def get_display_key(self):
+        """return a key uniquely identifying what is displayed for the current node (real time
+        and forecast observations), or None if the forecast has been modified (for example after a call to
+        "simulate") """
+        if not self._sim_obs_is_default:
+            return None
+        return (self._nb_reset, self.get_current_node_id())
+
     def scenario_id(self):
         return os.path.split(self.glop_env.chronics_handler.get_id())[-1]
 
@@ -132,6 +262,18 @@ class Env(ComputeWrapper):
             res = [os.path.split(el)[-1] for el in res]
         return res
 
+    def prefetch_chronics(self, chronics_ids=None):
+        """
+        load these scenarios (by default the next ones played) in the background, so that resetting the environment
+        to one of them is faster. Only used if the environment has been created with `chronics_cache_size` > 0.
+        """
+        chron = self.glop_env.chronics_handler.real_data
+        if not isinstance(chron, PrefetchMultifolder):
+            return
+        if chronics_ids is None:
+            chronics_ids = chron.get_next_ids(self.nb_chronics_prefetch)
+        chron.prefetch(chronics_ids)
+
     def load_assistant(self, assistant_path):
         self.logger.info(f"attempt to load assistant with path : \"{assistant_path}\"")
         has_been_loaded = False
@@ -140,6 +282,7 @@ class Env(ComputeWrapper):
             tmp = load_assistant(assistant_path, self._assistant_seed, self.glop_env.copy(), logger=self.logger)
             if tmp is not None:
                 # it means the agent has been loaded
+                self._close_assistant()
                 self.assistant = tmp
                 has_been_loaded = True
             else:
@@ -148,6 +291,7 @@ class Env(ComputeWrapper):
         else:
             # cancel the assistant
             from grid2op.Agent import DoNothingAgent  # TODO do nothing here
+            self._close_assistant()
             self.assistant = DoNothingAgent(self.glop_env.action_space)
             if self._assistant_seed is not None:
                 self.assistant.seed(int(self._assistant_seed))
@@ -155,6 +299,11 @@ class Env(ComputeWrapper):
         self.logger.info(f"assistant loaded with class {type(self.assistant)}")
         return has_been_loaded
 
+    def _close_assistant(self):
+        """release what the assistant uses (eg worker processes), if it can be closed"""
+        if self.assistant is not None and hasattr(self.assistant, "close"):
+            self.assistant.close()
+
     def do_computation(self):
         if self.next_computation is None:
             return
@@ -217,6 +366,14 @@ class Env(ComputeWrapper):
         elif self.next_computation == "explore":
             self.explore()
             self.stop_computation()
+        elif self.next_computation == "plan":
+            res = self.plan(**self.next_computation_kwargs)
+            self.stop_computation()
+            return res
+        elif self.next_computation == "security_analysis":
+            res = self.security_analysis(**self.next_computation_kwargs)
+            self.stop_computation()
+            return res
         else:
             msg_ = f"Unknown method to call: {self.next_computation = }"
             self.logger.error(msg_)
@@ -254,7 +411,76 @@ class Env(ComputeWrapper):
             if not till_the_end:
                 till_the_end = self._donothing_until_end()
             self.env_tree.go_to_node(init_node)
+        # the forecast is the one of the last explored node
+        self._sim_obs_is_default = False
     
+    def plan(self, catalogue_kinds=("line_change", "topo_set"), **planner_kwargs):
+        """
+        look for a sequence of actions several steps ahead (see `grid2game.planning.BeamSearchPlanner`), the
+        states explored are added to the tree and the current node becomes the last state of the best plan found
+        """
+        catalogue_kinds = tuple(catalogue_kinds)
+        if catalogue_kinds not in self._plan_catalogues:
+            self._plan_catalogues[catalogue_kinds] = make_catalogue(self.glop_env.action_space, catalogue_kinds)
+        planner = BeamSearchPlanner(self.env_tree,
+                                    self._plan_catalogues[catalogue_kinds],
+                                    assistant=self.assistant,
+                                    logger=self.logger,
+                                    **planner_kwargs)
+        actions, value, last_node = planner.run(self.env_tree.current_node)
+        self.last_plan = actions
+        self.env_tree.go_to_node(last_node)
+        self._update_after_move()
+        return actions, value
+
+    def security_analysis(self, node=None, compute=True):
+        """
+        flows after each single powerline outage in the state of a node (the current one by default), see
+        `grid2game.analysis.SecurityAnalysis`. The results are kept for each node: if `compute` is False, they
+        are returned only if they are already known (None otherwise).
+        """
+        if node is None:
+            node = self.env_tree.current_node
+        key = (self._nb_reset, node.id)
+        if not compute:
+            return self._security_analysis.get(key)
+        obs, reward, done, info = node.get_obs_rewar_done_info()
+        if done:
+            # there is no grid to analyse
+            return None
+        glop_env = None
+        if self._security_analysis.is_lightsim(self.glop_env.backend):
+            # only lightsim2grid uses the environment (the other backends simulate the outages from the observation)
+            glop_env = self.env_tree.restore_env(node)
+        return self._security_analysis.analyse(key, obs, glop_env=glop_env)
+
+    def lookahead(self, node=None, policy=None, horizon=None, compute=True):
+        """
+        what happens in the next `horizon` steps of the state of a node (the current one by default) if `policy`
+        is followed (`lookahead_horizon` and `lookahead_policy` by default), see
+        `grid2game.analysis.ForecastLookahead`. The results are kept for each node, policy and horizon: if `compute`
+        is False, they are returned only if they are already known (None otherwise).
+        """
+        if node is None:
+            node = self.env_tree.current_node
+        policy = policy if policy is not None else self.lookahead_policy
+        horizon = int(horizon) if horizon is not None else self.lookahead_horizon
+        if horizon <= 0:
+            return None
+        key = (self._nb_reset, node.id, policy, horizon)
+        if not compute:
+            return self._lookahead.get(key)
+        obs, reward, done, info = node.get_obs_rewar_done_info()
+        if done:
+            return None
+        return self._lookahead.run(key, self.glop_env.action_space, obs, reward, done,
+                                   policy=policy, horizon=horizon, assistant=self.assistant)
+
+    @property
+    def screening_version(self) -> int:
+        """changes each time the risk of a node is computed by the screener (always 0 without screener)"""
+        return self.screener.version if self.screener is not None else 0
+
     def _donothing_until_end(self):
         obs, reward, done, info = self.env_tree.current_node.get_obs_rewar_done_info()
         while not done:
@@ -326,12 +552,20 @@ class Env(ComputeWrapper):
     def seed(self, seed, reset=True):
         """seed and reset the environment"""
         self.logger.info(f"Setting env seed {seed} and resetting the environment.")
-        seeds = self.glop_env.seed(seed)
+        seeds = self._set_seed(seed)
         if reset:
             self.logger.info(f"seed: resetting the environment")
             self.init_state()
         return seeds
 
+    def _set_seed(self, seed):
+        """seed the grid2op environment, the next episode uses `seed` and the following ones seeds drawn from it"""
+        seeds = self.glop_env.seed(seed)
+        self._last_seed = seed
+        self._seed_prng = np.random.default_rng(seed)
+        self._next_episode_seed = seed
+        return seeds
+
     def step(self, action=None):
         obs, reward, done, info = self.env_tree.current_node.get_obs_rewar_done_info()
         if done:
@@ -361,14 +595,18 @@ class Env(ComputeWrapper):
             self.logger.info("step: done is False")
             try:
                 self._sim_obs, self._sim_reward, self._sim_done, self._sim_info = obs.simulate(self._assistant_action)
+                self._sim_obs_is_default = True
             except NoForecastAvailable:
                 self.logger.warn("step: no forecast seems to be available for the current observation.")
-                pass
+                self._sim_obs_is_default = False
         else:
             self._sim_done = True
             self._sim_reward = self.glop_env.reward_range[0]
             self._sim_info = {}
+            # the previous forecast might still be displayed (see `snapshot`), it is not modified inplace
+            self._sim_obs = copy.deepcopy(self._sim_obs)
             self._sim_obs.set_game_over(self.glop_env)
+            self._sim_obs_is_default = True
         # print(f"step: {np.any(self._assistant_action.raise_alarm)}") 
         return obs, reward, done, info
 
@@ -392,10 +630,13 @@ class Env(ComputeWrapper):
 
         obs, reward, done, info = self.env_tree.current_node.get_obs_rewar_done_info()
         self._sim_obs, self._sim_reward, self._sim_done, self._sim_info = obs.simulate(action)
+        self._sim_obs_is_default = False
         return self._sim_obs, self._sim_obs, self._sim_reward, self._sim_done, self._sim_info
 
     def back(self):
         self.env_tree.back_one_step()
+        # the forecast has not been recomputed
+        self._sim_obs_is_default = False
 
     def reset(self, chronics_id=None, seed=None):
         if chronics_id is not None:
@@ -407,19 +648,34 @@ class Env(ComputeWrapper):
                 self.logger.warn("Please upgrade to grid2op >= 1.6.5 to benefit from the functionality to set chronics with directory id")
                 self.glop_env.set_id(os.path.join(chron.path, chronics_id))
         if seed is not None:
-            self.glop_env.seed(seed)
+            self._set_seed(seed)
         self.init_state()
 
     def init_state(self):
+        self._nb_reset += 1
         self.env_tree.clear()
-        obs = self.glop_env.reset()            
+        self._security_analysis.clear()
+        self._lookahead.clear()
+        if self._seed_prng is not None:
+            # a reset only depends on the last seed if it is the first one after it, so each episode is seeded
+            if self._next_episode_seed is None:
+                self._episode_seed = int(self._seed_prng.integers(np.iinfo(np.int32).max))
+                self.glop_env.seed(self._episode_seed)
+            else:
+                self._episode_seed = self._next_episode_seed
+                self._next_episode_seed = None
+        obs = self.glop_env.reset()
         self.env_tree.root(assistant=self.assistant, obs=obs, env=self.glop_env)
+        self.prefetch_chronics()
 
         self._current_action = self.glop_env.action_space()
         if self.assistant is not None:
             self.next_action_is_assistant()
         obs, reward, done, info = self.env_tree.current_node.get_obs_rewar_done_info()
         self._sim_obs, self._sim_reward, self._sim_done, self._sim_info = obs.simulate(self.current_action)
+        # this forecast is computed with the "do nothing" action, and not the assistant action
+        self._sim_obs_is_default = False
+        self._publish_snapshot()
 
     def next_action_is_dn(self):
         """or do nothing if first step"""
@@ -467,8 +723,14 @@ class Env(ComputeWrapper):
         """handles the interaction from the timeline"""
         if "points" not in time_line_graph_clcked:
             return 0
-        self.is_computing()
-        res = self.env_tree.move_from_click(time_line_graph_clcked)
+        with self.exclusive():
+            res = self.env_tree.move_from_click(time_line_graph_clcked)
+            self._update_after_move()
+        self.stop_computation()  # this is a "one time" call
+        return res
+
+    def _update_after_move(self):
+        """the current node of the tree has been changed (without a step), update the action and the forecast"""
         self._current_action = copy.deepcopy(self.env_tree.get_last_action())
         
         obs, reward, done, info = self.env_tree.current_node.get_obs_rewar_done_info()
@@ -477,11 +739,140 @@ class Env(ComputeWrapper):
             self.logger.info("step: done is False")
             try:
                 self._sim_obs, self._sim_reward, self._sim_done, self._sim_info = obs.simulate(self._assistant_action)
+                self._sim_obs_is_default = True
             except NoForecastAvailable:
                 self.logger.warn("handle_click_timeline: no forecast seems to be available for the current observation.")
-                pass
-        self.stop_computation()  # this is a "one time" call
-        return res
+                self._sim_obs_is_default = False
+        else:
+            # the forecast displayed is not the one of this node
+            self._sim_obs_is_default = False
+        self._publish_snapshot()
+
+    def save_tree(self, path):
+        """
+        save the tree in a (compressed) numpy file, to be able to restore it later with `restore_tree`.
+
+        Only the actions (and the scenario id and seed of the episode) are saved: the observations are recomputed
+        when the tree is restored.
+        """
+        with self.exclusive():
+            nodes = self.env_tree._all_nodes
+            father_ids = np.array(self.env_tree._father_ids, dtype=int)
+            actions = np.zeros((len(nodes), self.glop_env.action_space.n), dtype=np.float64)
+            for node in nodes[1:]:
+                actions[node.id] = node.father.get_actions_to_sons()[node.father_id].action.to_vect()
+            current_node = self.get_current_node_id()
+        np.savez_compressed(path,
+                            father_ids=father_ids,
+                            actions=actions,
+                            current_node=np.array(current_node),
+                            chronics_id=np.array(self.scenario_id() if self.list_chronics() else ""),
+                            seed=np.array(self._episode_seed if self._episode_seed is not None else -1))
+
+    def restore_tree(self, path):
+        """restore a tree saved with `save_tree` by replaying all the actions stored in it"""
+        if not os.path.exists(path):
+            msg = f"restore_tree: {path} does not exists"
+            self.logger.error(msg)
+            raise RuntimeError(msg)
+        with np.load(path, allow_pickle=False) as data:
+            father_ids = data["father_ids"]
+            actions = data["actions"]
+            current_node = int(data["current_node"])
+            chronics_id = str(data["chronics_id"])
+            seed = int(data["seed"])
+        if seed < 0:
+            self.logger.warning(f"restore_tree: no seed used for the tree saved in {path}, the states might not "
+                                f"be the same as the ones saved")
+        with self.exclusive():
+            self.reset(chronics_id=chronics_id if chronics_id else None,
+                       seed=seed if seed >= 0 else None)
+            nodes = self.env_tree._all_nodes
+            for node_id in range(1, father_ids.shape[0]):
+                self.env_tree.go_to_node(nodes[father_ids[node_id]])
+                action = self.glop_env.action_space.from_vect(actions[node_id], check_legit=False)
+                self.env_tree.make_step(assistant=self.assistant, chosen_action=action)
+            self.env_tree.go_to_node(nodes[current_node])
+            self._update_after_move()
+
+    def close(self):
+        """close the environment (and all the environments stored in the tree)"""
+        if self.screener is not None:
+            # it needs the lock to finish what it is doing
+            self.screener.stop()
+        with self.exclusive():
+            self.env_tree.clear()
+            self.glop_env.close()
+            self._close_assistant()
+            self._security_analysis.close()
+            self._lookahead.clear()
+        if self.episode_logger is not None:
+            self.episode_logger.close()
+
+    def save_episode(self, path_save):
+        """save the current episode (from the root of the tree to the current node) as a grid2op runner would"""
+        if self.episode_logger is not None:
+            self.episode_logger.flush()
+        with self.exclusive():
+            return export_current_branch(self.env_tree,
+                                         path_save,
+                                         env_seed=self.glop_env.seed_used,
+                                         agent_seed=self._assistant_seed,
+                                         logger=self.logger)
+
+    def export_tree(self, path, format="npy", with_observations=False):
+        """export all the explored states in a columnar format (see `grid2game.tree.export_tree`)"""
+        with self.exclusive():
+            return export_tree(self.env_tree, path, format=format, with_observations=with_observations)
+
+    def load_episode(self, agent_path, episode_name):
+        """
+        load an episode saved by a grid2op runner (or by `save_episode`) in the tree, without simulating it.
+
+        The environment is reset with the scenario and the seed of the episode, then all the states of the episode
+        are added after the root. The grid2op environment of a state is only restored (by replaying the actions)
+        if a new action is performed from this state.
+        """
+        from grid2op.Episode import EpisodeData
+        episode = EpisodeData.from_disk(agent_path, episode_name)
+        if episode.observations.collection.shape[1] != self.glop_env.observation_space.n:
+            msg_ = (f"load_episode: the episode \"{episode_name}\" has not been generated with this environment "
+                    f"(observations have a size of {episode.observations.collection.shape[1]} instead of "
+                    f"{self.glop_env.observation_space.n})")
+            self.logger.error(msg_)
+            raise RuntimeError(msg_)
+        chronics_id = os.path.split(episode.meta["chronics_path"])[-1]
+        env_seed = episode.meta["env_seed"]
+        if env_seed is None:
+            self.logger.warning(f"load_episode: no seed used for \"{episode_name}\", new actions might not "
+                                f"be simulated on the same states")
+        nb_step = int(episode.meta["nb_timestep_played"])
+
+        # actions and observations are converted to the classes of this environment
+        action_space = self.glop_env.action_space
+        observation_space = self.glop_env.observation_space
+        actions = [action_space(episode.actions[i].as_serializable_dict()) for i in range(nb_step)]
+        observations = [observation_space.from_vect(episode.observations.collection[i + 1]) for i in range(nb_step)]
+        rewards = [float(episode.rewards[i]) for i in range(nb_step)]
+        # a runner only stops when the episode is over (or after `max_iter` steps, which it does not save): its last
+        # step is done. `save_episode` can stop anywhere in the episode, so it saves whether its last step is done.
+        dones = [False] * nb_step
+        if nb_step:
+            dones[-1] = bool(episode.meta.get("grid2game_done", True))
+        # the `EpisodeData` of grid2op does not store whether the actions were illegal or ambiguous
+        infos = [{"is_illegal": False,
+                  "is_ambiguous": False,
+                  "disc_lines": episode.disc_lines[i],
+                  "exception": []} for i in range(nb_step)]
+
+        with self.exclusive():
+            self.reset(chronics_id=chronics_id, seed=env_seed)
+            if not np.allclose(episode.observations.collection[0], self.obs.to_vect(), equal_nan=True):
+                self.logger.warning(f"load_episode: the first state of \"{episode_name}\" does not match the state of "
+                                    f"the environment after a reset")
+            self.env_tree.add_computed_steps(self.assistant, actions, observations, rewards, dones, infos)
+            self._update_after_move()
+        self.logger.info(f"load_episode: {nb_step} steps loaded from \"{os.path.join(agent_path, episode_name)}\"")
 
     def get_current_action_list(self):
         """return the list of actions from the current point in the tree up to the root"""
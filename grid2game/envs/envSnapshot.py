@@ -0,0 +1,46 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+from typing import NamedTuple, Union
+
+from grid2op.Observation import BaseObservation
+
+
+class EnvSnapshot(NamedTuple):
+    """
+    Read only view of the state of the environment (current node of the tree and its forecast).
+
+    A new snapshot is published (with a greater `version`) each time the state changes, so that the
+    display can read a consistent state without waiting for the computations to be over.
+    """
+    version: int
+    nb_reset: int
+    node_id: int
+    obs: BaseObservation
+    reward: Union[float, None]
+    done: bool
+    info: Union[dict, None]
+    prev_action_is_illegal: bool
+    sim_obs: BaseObservation
+    sim_info: Union[dict, None]
+    sim_obs_is_default: bool
+    lookahead: Union["LookaheadResults", None] = None  # see `Env.lookahead`
+
+    @property
+    def display_key(self):
+        """key identifying what is displayed (see `Env.get_display_key`)"""
+        if not self.sim_obs_is_default:
+            return None
+        return self.nb_reset, self.node_id
+
+    @property
+    def assistant_is_illegal(self) -> bool:
+        """whether the action simulated (for the forecast) is illegal"""
+        if self.sim_info is not None and "is_illegal" in self.sim_info:
+            return self.sim_info["is_illegal"]
+        return False
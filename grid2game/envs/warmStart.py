@@ -0,0 +1,68 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import logging
+import threading
+import time
+
+import grid2op
+import numpy as np
+
+# grid2op environments already made in this process ("templates"), they are only copied, never used directly
+_TEMPLATES = {}
+# also protects the copies: copying a grid2op environment is not thread safe
+_LOCK = threading.Lock()
+
+
+def _get_key(env_name, backend_cls, kwargs):
+    """environments made with the same arguments (compared with their repr) are the same"""
+    return env_name, backend_cls, repr(sorted(kwargs.items()))
+
+
+def make_glop_env(env_name, backend_cls, logger=None, **kwargs):
+    """
+    same as `grid2op.make(env_name, backend=backend_cls(), **kwargs)` but the environment is only made once per
+    process: the next environments with the same arguments are copies of the first one (which is much faster than
+    making them).
+
+    If the first one has been made before the process was forked (eg by `preload_glop_env` in a gunicorn app
+    loaded with "--preload"), the workers do not make it again.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    key = _get_key(env_name, backend_cls, kwargs)
+    beg_ = time.perf_counter()
+    with _LOCK:
+        template = _TEMPLATES.get(key)
+        if template is None:
+            template = grid2op.make(env_name, backend=backend_cls(), logger=logger, **kwargs)
+            _TEMPLATES[key] = template
+        res = template.copy()
+    if template.seed_used is None:
+        # the copies of the template would otherwise all draw the same random numbers (eg for the opponent). This
+        # seed is not chosen by the user: the environment is still considered as not seeded (eg in the saved episodes)
+        res.seed(int(np.random.default_rng().integers(np.iinfo(np.int32).max)))
+        res.seed_used = None
+    logger.info(f"make_glop_env: environment \"{env_name}\" ready in {time.perf_counter() - beg_:.3f}s")
+    return res
+
+
+def preload_glop_env(env_name, backend_cls, logger=None, **kwargs) -> None:
+    """make the environment (see `make_glop_env`) so that the next ones, in this process or in its children, are copies"""
+    key = _get_key(env_name, backend_cls, kwargs)
+    with _LOCK:
+        if key not in _TEMPLATES:
+            _TEMPLATES[key] = grid2op.make(env_name, backend=backend_cls(), logger=logger, **kwargs)
+
+
+def clear_templates() -> None:
+    """close all the environments kept by `make_glop_env`"""
+    with _LOCK:
+        for template in _TEMPLATES.values():
+            template.close()
+        _TEMPLATES.clear()
@@ -0,0 +1,278 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import argparse
+import csv
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+
+STEP_COLUMNS = ["assistant", "chronics_id", "env_seed", "step", "reward", "max_rho", "nb_overflow",
+                "nb_disconnected", "alarm", "illegal", "ambiguous", "do_nothing"]
+SUMMARY_COLUMNS = ["assistant", "chronics_id", "env_seed", "survival_time", "max_step", "completed", "total_reward",
+                   "nb_alarms", "nb_illegal", "nb_ambiguous", "nb_do_nothing", "nb_overflow_steps", "mean_max_rho",
+                   "duration", "error"]
+
+
+def _run_episode(glop_env, assistant, assistant_name, chronics_id, env_seed, max_step=-1):
+    """run the assistant on one scenario, returns the summary and the kpis of each step"""
+    beg_ = time.perf_counter()
+    # the grid2op environment is used directly: nothing but the kpis of each step is kept in memory
+    chron = glop_env.chronics_handler
+    if hasattr(chron, "available_chronics"):  # "proxy" for "grid2op >= 1.6.5" (see `Env.reset`)
+        glop_env.set_id(chronics_id)
+    else:
+        glop_env.set_id(os.path.join(chron.path, chronics_id))
+    glop_env.seed(env_seed)
+    obs = glop_env.reset()
+    reward, done = glop_env.reward_range[0], False
+    steps = []
+    while not done and (max_step < 0 or obs.current_step < max_step):
+        action = assistant.act(obs, reward, done)
+        obs, reward, done, info = glop_env.step(action)
+        alarm = hasattr(obs, "time_since_last_alarm") and bool(np.any(obs.time_since_last_alarm == 0))
+        steps.append({"assistant": assistant_name,
+                      "chronics_id": chronics_id,
+                      "env_seed": env_seed,
+                      "step": obs.current_step,
+                      "reward": float(reward),
+                      "max_rho": float(obs.rho.max()) if not done else np.nan,
+                      "nb_overflow": int((obs.rho > 1.).sum()) if not done else 0,
+                      "nb_disconnected": int((~obs.line_status).sum()) if not done else 0,
+                      "alarm": alarm,
+                      "illegal": bool(info["is_illegal"]),
+                      "ambiguous": bool(info["is_ambiguous"]),
+                      "do_nothing": action is None or not action.can_affect_something()})
+
+    completed = obs.current_step == obs.max_step
+    max_rhos = np.array([el["max_rho"] for el in steps], dtype=float)
+    summary = {"assistant": assistant_name,
+               "chronics_id": chronics_id,
+               "env_seed": env_seed,
+               # the last step is not survived if the episode is over before the end of the scenario
+               "survival_time": len(steps) - int(done and not completed),
+               "max_step": obs.max_step if max_step < 0 else min(max_step, obs.max_step),
+               "completed": completed or (not done and max_step >= 0),
+               "total_reward": float(sum(el["reward"] for el in steps)),
+               "nb_alarms": sum(el["alarm"] for el in steps),
+               "nb_illegal": sum(el["illegal"] for el in steps),
+               "nb_ambiguous": sum(el["ambiguous"] for el in steps),
+               "nb_do_nothing": sum(el["do_nothing"] for el in steps),
+               "nb_overflow_steps": sum(el["nb_overflow"] > 0 for el in steps),
+               "mean_max_rho": float(np.nanmean(max_rhos)) if np.any(np.isfinite(max_rhos)) else np.nan,
+               "duration": time.perf_counter() - beg_,
+               "error": ""}
+    return summary, steps
+
+
+def _run_episodes(task):
+    """
+    run all the episodes of a task (one assistant, several scenarios / seeds), in a worker process
+
+    The environment (and the assistant) is created only once per task.
+    """
+    import grid2op
+    from grid2op.Action import PlayableAction
+    from grid2op.Agent import DoNothingAgent
+    from grid2game.agents import load_assistant
+    from grid2game.envs.env import _get_backend_class
+
+    logger = logging.getLogger("grid2game.evaluation")
+    glop_env = grid2op.make(task["env_name"],
+                            test=task["is_test"],
+                            backend=_get_backend_class()(),
+                            action_class=PlayableAction,
+                            logger=logger)
+    if task["g2op_param"]:
+        param = glop_env.parameters
+        param.init_from_json(task["g2op_param"])
+        glop_env.change_parameters(param)
+    if task["assistant_path"]:
+        assistant = load_assistant(task["assistant_path"], task["assistant_seed"], glop_env.copy(), logger=logger)
+    else:
+        assistant = DoNothingAgent(glop_env.action_space)
+        assistant.seed(int(task["assistant_seed"]))
+
+    res = []
+    for chronics_id, env_seed in task["episodes"]:
+        try:
+            summary, steps = _run_episode(glop_env, assistant, task["assistant_name"], chronics_id, env_seed,
+                                          task["max_step"])
+        except Exception as exc_:
+            logger.error(f"_run_episodes: error for assistant \"{task['assistant_name']}\", "
+                         f"chronics \"{chronics_id}\" and seed {env_seed}: {exc_}")
+            summary = {col: np.nan for col in SUMMARY_COLUMNS}
+            summary.update({"assistant": task["assistant_name"], "chronics_id": chronics_id, "env_seed": env_seed,
+                            "error": repr(exc_)})
+            steps = []
+        res.append((summary, steps))
+    if hasattr(assistant, "close"):
+        assistant.close()
+    glop_env.close()
+    return res
+
+
+class BatchEvaluation(object):
+    """
+    Evaluate some assistants on many scenarios (chronics id x environment seeds), without any display.
+
+    Each combination is run in parallel in `nb_process` worker processes. The results are written in two csv files:
+    "summary.csv" (one line per episode: survival time, number of alarms, of illegal actions etc.) and "steps.csv"
+    (one line per step of each episode).
+
+    Notes
+    -----
+    An assistant is imported as the "submission" module of its directory, so a worker process only ever
+    runs one assistant.
+    """
+    def __init__(self,
+                 env_name,
+                 assistant_paths,
+                 chronics_ids=None,
+                 env_seeds=(0,),
+                 assistant_seed=0,
+                 is_test=False,
+                 g2op_param=None,
+                 nb_process=1,
+                 max_step=-1,
+                 logger=None):
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger.getChild("BatchEvaluation")
+
+        self.env_name = env_name
+        self.assistant_paths = list(assistant_paths) if assistant_paths else [""]
+        self.env_seeds = [int(el) for el in env_seeds]
+        self.assistant_seed = assistant_seed
+        self.is_test = is_test
+        self.g2op_param = g2op_param
+        self.nb_process = max(int(nb_process), 1)
+        self.max_step = int(max_step)
+        self.chronics_ids = list(chronics_ids) if chronics_ids else self._all_chronics()
+        if not self.chronics_ids:
+            msg_ = f"BatchEvaluation: no scenario found for environment \"{env_name}\""
+            self.logger.error(msg_)
+            raise RuntimeError(msg_)
+
+    def _all_chronics(self):
+        import grid2op
+        with grid2op.make(self.env_name, test=self.is_test) as env:
+            chron = env.chronics_handler
+            if not hasattr(chron, "available_chronics"):
+                return []
+            return [os.path.split(el)[-1] for el in chron.available_chronics()]
+
+    @staticmethod
+    def assistant_name(assistant_path):
+        """name used for the assistant in the results"""
+        if assistant_path in ("", None):
+            return "do_nothing"
+        return os.path.basename(os.path.normpath(assistant_path))
+
+    def _make_tasks(self):
+        """split the episodes in tasks: one assistant each, and enough tasks to use all the processes"""
+        episodes = list(itertools.product(self.chronics_ids, self.env_seeds))
+        nb_chunks = max(self.nb_process // len(self.assistant_paths), 1)
+        tasks = []
+        for assistant_path in self.assistant_paths:
+            for chunk in np.array_split(np.arange(len(episodes)), min(nb_chunks, len(episodes))):
+                tasks.append({"env_name": self.env_name,
+                              "is_test": self.is_test,
+                              "assistant_path": assistant_path,
+                              "assistant_name": self.assistant_name(assistant_path),
+                              "assistant_seed": self.assistant_seed,
+                              "g2op_param": self.g2op_param,
+                              "max_step": self.max_step,
+                              "episodes": [episodes[i] for i in chunk]})
+        return tasks
+
+    def run(self, output_dir):
+        """run all the episodes and write the results in `output_dir`, returns the summary of each episode"""
+        os.makedirs(output_dir, exist_ok=True)
+        tasks = self._make_tasks()
+        nb_episodes = sum(len(task["episodes"]) for task in tasks)
+        self.logger.info(f"run: {nb_episodes} episodes to run ({len(tasks)} tasks, {self.nb_process} processes)")
+
+        summaries = []
+        with open(os.path.join(output_dir, "summary.csv"), "w", newline="") as f_summary, \
+                open(os.path.join(output_dir, "steps.csv"), "w", newline="") as f_steps:
+            summary_writer = csv.DictWriter(f_summary, fieldnames=SUMMARY_COLUMNS)
+            summary_writer.writeheader()
+            steps_writer = csv.DictWriter(f_steps, fieldnames=STEP_COLUMNS)
+            steps_writer.writeheader()
+            # each task runs in a new process (the "submission" module of an assistant cannot be unloaded)
+            with multiprocessing.get_context("spawn").Pool(self.nb_process, maxtasksperchild=1) as pool:
+                for res in pool.imap_unordered(_run_episodes, tasks):
+                    for summary, steps in res:
+                        summary_writer.writerow(summary)
+                        steps_writer.writerows(steps)
+                        summaries.append(summary)
+                        self.logger.info(f"run: {len(summaries)} / {nb_episodes} episodes done "
+                                         f"(last: \"{summary['assistant']}\" on \"{summary['chronics_id']}\", "
+                                         f"survived {summary['survival_time']} steps)")
+                    f_summary.flush()
+                    f_steps.flush()
+        return summaries
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Grid2Game headless evaluation of assistants",
+                                     prog="grid2game evaluate")
+    parser.add_argument("--env_name", required=False,
+                        default="rte_case14_realistic", type=str,
+                        help="Name of the environment to create")
+    parser.add_argument("--is_test", required=False,
+                        action="store_true", default=False,
+                        help="Create and environment with keyword argument \"test=True\"")
+    parser.add_argument("--assistant_path", required=False,
+                        default=[""], type=str, nargs="+",
+                        help="path(s) where the \"make_agent\" function is defined (empty string: do nothing agent)")
+    parser.add_argument("--assistant_seed", required=False,
+                        default=0, type=int,
+                        help="Seed of the assistant(s)")
+    parser.add_argument("--chronics", required=False,
+                        default=None, type=str, nargs="+",
+                        help="Id of the scenarios to evaluate (all the scenarios of the environment by default)")
+    parser.add_argument("--env_seed", required=False,
+                        default=[0], type=int, nargs="+",
+                        help="Seed(s) of the environment")
+    parser.add_argument("--g2op_param", required=False,
+                    default="", type=str,
+                    help="path to look for grid2op environment parameters (used in env.change_parameters(g2op_param)).")
+    parser.add_argument("--max_step", required=False,
+                        default=-1, type=int,
+                        help="Maximum number of steps of each episode (-1: until the end of the scenario)")
+    parser.add_argument("--nb_process", required=False,
+                        default=1, type=int,
+                        help="Number of worker processes")
+    parser.add_argument("--output", required=False,
+                        default="grid2game_evaluation", type=str,
+                        help="Directory where the results (\"summary.csv\" and \"steps.csv\") are written")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = cli(argv)
+    logging.basicConfig(level=logging.INFO)
+    evaluation = BatchEvaluation(args.env_name,
+                                 assistant_paths=args.assistant_path,
+                                 chronics_ids=args.chronics,
+                                 env_seeds=args.env_seed,
+                                 assistant_seed=args.assistant_seed,
+                                 is_test=args.is_test,
+                                 g2op_param=args.g2op_param,
+                                 nb_process=args.nb_process,
+                                 max_step=args.max_step,
+                                 logger=logging.getLogger("grid2game"))
+    evaluation.run(args.output)
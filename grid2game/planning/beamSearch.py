@@ -0,0 +1,190 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+CATALOGUE_KINDS = ("line_change", "line_set", "topo_set", "redispatch")
+
+
+def make_catalogue(action_space, kinds=("line_change", "topo_set")) -> list:
+    """
+    the actions the planner can use: do nothing and all the unitary actions of the given kinds
+    (see `CATALOGUE_KINDS`)
+    """
+    res = [action_space()]
+    for kind in kinds:
+        if kind == "line_change":
+            res += action_space.get_all_unitary_line_change(action_space)
+        elif kind == "line_set":
+            res += action_space.get_all_unitary_line_set(action_space)
+        elif kind == "topo_set":
+            res += action_space.get_all_unitary_topologies_set(action_space)
+        elif kind == "redispatch":
+            res += action_space.get_all_unitary_redispatch(action_space)
+        else:
+            raise RuntimeError(f"make_catalogue: unknown kind of actions \"{kind}\", available kinds are "
+                               f"{CATALOGUE_KINDS}")
+    return res
+
+
+class BeamSearchPlanner(object):
+    """
+    Looks for a sequence of actions, several steps ahead, that keeps the grid safe. The states explored are
+    added to the `EnvTree` (they appear as new branches in the timeline).
+
+    At each depth, for each of the `beam_width` best states kept so far (the "beam"):
+
+    - all the actions of the catalogue are ranked by simulating them (with the forecasts of this state)
+    - the `nb_expand` best ones are performed (a son that already exists in the tree is reused)
+    - each new state is evaluated with its max rho and the one forecast for the next step (if nothing is done)
+
+    The states are evaluated with their max rho (the lower the better, inf if the game is over). The search
+    stops after `depth` steps, or before when `time_budget` seconds have elapsed or when `node_budget` nodes have
+    been added to the tree.
+
+    The action of the `assistant` in the states added to the tree is computed only when needed.
+
+    With `nb_workers` > 1 the simulations and the steps of different states are made in parallel (in threads: it is
+    only faster if the backend releases the GIL).
+    """
+    def __init__(self,
+                 env_tree,
+                 catalogue,
+                 depth=3,
+                 beam_width=3,
+                 nb_expand=3,
+                 time_budget=60.,
+                 node_budget=100,
+                 nb_workers=1,
+                 assistant=None,
+                 logger=None):
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger.getChild("BeamSearchPlanner")
+        if not catalogue:
+            msg_ = "BeamSearchPlanner: the catalogue of actions is empty"
+            self.logger.error(msg_)
+            raise RuntimeError(msg_)
+        self.env_tree = env_tree
+        self.catalogue = list(catalogue)
+        self.depth = int(depth)
+        self.beam_width = max(int(beam_width), 1)
+        self.nb_expand = max(int(nb_expand), 1)
+        self.time_budget = float(time_budget)
+        self.node_budget = int(node_budget)
+        self.nb_workers = max(int(nb_workers), 1)
+        self.assistant = assistant  # its action in the new states is only computed if needed
+
+        self._deadline = None
+        self._nb_new_nodes = 0
+        self._values = {}  # node id -> value of the state
+
+    def _map(self, fun, iterable, executor):
+        if executor is None:
+            return [fun(el) for el in iterable]
+        return list(executor.map(fun, iterable))
+
+    def _out_of_budget(self) -> bool:
+        return time.perf_counter() >= self._deadline or self._nb_new_nodes >= self.node_budget
+
+    @staticmethod
+    def _state_value(obs, done) -> float:
+        if done:
+            # reaching the end of the scenario is a success, not a game over
+            return float(obs.rho.max()) if obs.current_step == obs.max_step else np.inf
+        return float(obs.rho.max())
+
+    def evaluate(self, node) -> float:
+        """value of the state of a node (the lower the better): worst of the max rho now and in the next step"""
+        if node.id in self._values:
+            return self._values[node.id]
+        obs, reward, done, info = node.get_obs_rewar_done_info()
+        res = self._state_value(obs, done)
+        if not done:
+            # what happens if nothing is done, according to the forecasts
+            try:
+                sim_obs, sim_reward, sim_done, sim_info = obs.simulate(obs.action_helper())
+                res = max(res, self._state_value(sim_obs, sim_done))
+            except Exception as exc_:
+                self.logger.error(f"evaluate: impossible to use the forecasts of node {node.id}: {exc_}")
+        self._values[node.id] = res
+        return res
+
+    def _screen(self, node) -> list:
+        """the `nb_expand` most promising actions from this node, according to the forecasts"""
+        obs, reward, done, info = node.get_obs_rewar_done_info()
+        scores = np.full(len(self.catalogue), fill_value=np.inf)
+        for act_id, act in enumerate(self.catalogue):
+            if time.perf_counter() >= self._deadline:
+                break
+            sim_obs, sim_reward, sim_done, sim_info = obs.simulate(act)
+            if not sim_info["is_illegal"] and not sim_info["is_ambiguous"]:
+                scores[act_id] = self._state_value(sim_obs, sim_done)
+        best = np.argsort(scores, kind="stable")[:self.nb_expand]
+        return [self.catalogue[act_id] for act_id in best if np.isfinite(scores[act_id])]
+
+    def run(self, start_node):
+        """
+        look for a plan from `start_node`, returns the actions of the best plan found, its value (the worst value of
+        the states of the plan) and the last node of this plan (the current node of the tree is not modified)
+
+        The best plan is the best one among the deepest ones found within the budget.
+        """
+        self._deadline = time.perf_counter() + self.time_budget
+        self._nb_new_nodes = 0
+        self._values = {}
+        # (value of the plan, last node of the plan, actions of the plan)
+        beam = [(-np.inf, start_node, [])]
+        best = (self.evaluate(start_node), start_node, [])
+        executor = ThreadPoolExecutor(self.nb_workers) if self.nb_workers > 1 else None
+        try:
+            for depth in range(self.depth):
+                if self._out_of_budget():
+                    break
+                to_expand = [el for el in beam if not el[1].done]
+                screened = self._map(lambda el: self._screen(el[1]), to_expand, executor)
+                sons = self._expand([(el, act) for el, acts in zip(to_expand, screened) for act in acts], executor)
+                if not sons:
+                    break
+                beam = sorted(sons, key=lambda el: el[0])[:self.beam_width]
+                best = beam[0]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.env_tree.go_to_node(start_node)
+        self.logger.info(f"run: {self._nb_new_nodes} nodes added, best plan has {len(best[2])} action(s) "
+                         f"and a value of {best[0]:.3f}")
+        return best[2], best[0], best[1]
+
+    def _expand(self, to_perform, executor) -> list:
+        """perform the actions (sons already in the tree are reused), returns the value, node and plan of each son"""
+        sons = {}  # node id -> (value of the plan of the father, son, plan)
+        to_compute = []
+        for (plan_value, father, actions), act in to_perform:
+            link = father.son_for_this_action(act)
+            if link is not None:
+                sons.setdefault(link.son.id, (plan_value, link.son, actions + [act]))
+            elif self._nb_new_nodes + len(to_compute) < self.node_budget:
+                to_compute.append((plan_value, father, act, actions + [act]))
+        # the environments are copied sequentially (a father can have several sons), then the steps run in parallel
+        envs = [self.env_tree.restore_env(father).copy() for _, father, _, _ in to_compute]
+        steps = self._map(lambda el: el[0].step(el[1]), zip(envs, [act for _, _, act, _ in to_compute]), executor)
+        for (plan_value, father, act, actions), glop_env, (obs, reward, done, info) in zip(to_compute, envs, steps):
+            son = self.env_tree.add_computed_son(father, act, glop_env, obs, reward, done, info,
+                                                 assistant=self.assistant)
+            self._nb_new_nodes += 1
+            sons.setdefault(son.id, (plan_value, son, actions))
+        sons = list(sons.values())
+        values = self._map(lambda el: self.evaluate(el[1]), sons, executor)
+        # a plan is as good as its worst state
+        return [(max(plan_value, value), son, actions) for value, (plan_value, son, actions) in zip(values, sons)]
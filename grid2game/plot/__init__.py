@@ -1,5 +1,7 @@
-__all__ = ["PlotGrids", "PlotParams", "PlotTemporalSeries"]
+__all__ = ["PlotGrids", "PlotParams", "PlotTemporalSeries", "FigureCache", "PlotLookahead"]
 
 from grid2game.plot.plot_grid import PlotGrids
 from grid2game.plot.plot_temporal_series import PlotTemporalSeries
 from grid2game.plot.plot_param import PlotParams
+from grid2game.plot.figure_cache import FigureCache
+from grid2game.plot.plot_lookahead import PlotLookahead
@@ -0,0 +1,76 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+"""Shape preserving downsampling of (regularly sampled) time series, used only for display."""
+
+import numpy as np
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points kept by the "Largest Triangle Three Buckets" algorithm (Steinarsson, 2013).
+
+    The time series is supposed to be regularly sampled (which is the case for grid2op environment), so the
+    abscissa used is the index of each point.
+
+    First and last points are always kept.
+    """
+    nb_points = y.shape[0]
+    if n_out >= nb_points or n_out < 3:
+        return np.arange(nb_points)
+
+    x = np.arange(nb_points, dtype=float)
+    res = np.empty(n_out, dtype=int)
+    res[0] = 0
+    res[-1] = nb_points - 1
+    # n_out - 2 buckets between the first and the last point
+    edges = np.linspace(1, nb_points - 1, n_out - 1).astype(int)
+    prev_ = 0
+    for bucket_id in range(n_out - 2):
+        beg_, end_ = edges[bucket_id], edges[bucket_id + 1]
+        next_beg = end_
+        next_end = edges[bucket_id + 2] if bucket_id + 2 < edges.shape[0] else nb_points
+        avg_x = x[next_beg:next_end].mean()
+        avg_y = y[next_beg:next_end].mean()
+        area = np.abs((x[prev_] - avg_x) * (y[beg_:end_] - y[prev_]) -
+                      (x[prev_] - x[beg_:end_]) * (avg_y - y[prev_]))
+        prev_ = beg_ + int(np.argmax(area))
+        res[bucket_id + 1] = prev_
+    return res
+
+
+def _first_match(y, bucket_ids, edges, values):
+    """index of the first point of each bucket equal to `values[bucket]` (start of the bucket if there is none)"""
+    res = edges[:-1].copy()
+    matches = np.flatnonzero(y == values[bucket_ids])
+    found, first = np.unique(bucket_ids[matches], return_index=True)
+    res[found] = matches[first]
+    return res
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points kept by a "min / max" bucketing: the series is split into `n_out // 2` buckets (of
+    almost the same size) and the minimum and the maximum of each bucket are kept (in chronological order).
+
+    Extrema of the series (overflows for example) are always kept, and at most `n_out` points are returned.
+    """
+    nb_points = y.shape[0]
+    nb_bucket = n_out // 2
+    if n_out >= nb_points or nb_bucket < 1:
+        return np.arange(nb_points)
+    edges = np.linspace(0, nb_points, nb_bucket + 1).astype(int)
+    bucket_ids = np.repeat(np.arange(nb_bucket), np.diff(edges))
+    # nan are ignored (as long as the bucket has other values)
+    res = np.concatenate((_first_match(y, bucket_ids, edges, np.fmin.reduceat(y, edges[:-1])),
+                          _first_match(y, bucket_ids, edges, np.fmax.reduceat(y, edges[:-1]))))
+    return np.unique(res)
+
+
+DOWNSAMPLING_METHODS = {"lttb": lttb_indices,
+                        "minmax": minmax_indices}
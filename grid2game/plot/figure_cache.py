@@ -0,0 +1,90 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+from collections import OrderedDict
+from typing import Hashable, List, Union
+
+import orjson
+
+
+def _orjson_default(obj):
+    """handles the few objects orjson does not know how to serialize natively"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "to_plotly_json"):
+        return obj.to_plotly_json()
+    return str(obj)
+
+
+class FigureCache(object):
+    """
+    LRU cache storing already rendered plotly figures, serialized with orjson.
+
+    Figures are stored as bytes (and not as plotly objects) which makes it possible to
+    know exactly how much memory is used by the cache and to bound it.
+
+    When a figure is retrieved, the (json) dictionary representing it is returned. This dictionary
+    can directly be sent to a `dcc.Graph`.
+    """
+    def __init__(self, max_size_mb: float = 64.):
+        self.max_size = int(max_size_mb * 1024 * 1024)  # in bytes
+        self._data = OrderedDict()
+        self._size = 0
+
+        # some statistics
+        self.nb_hit = 0
+        self.nb_miss = 0
+
+    @staticmethod
+    def serialize(fig) -> bytes:
+        """serialize a plotly figure (or a dictionary representing it)"""
+        if hasattr(fig, "to_plotly_json"):
+            fig = fig.to_plotly_json()
+        return orjson.dumps(fig, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def get(self, key: Hashable) -> Union[None, List[dict]]:
+        """retrieve the figures stored with key `key` (and None if they are not in the cache)"""
+        if key is None or key not in self._data:
+            self.nb_miss += 1
+            return None
+        self._data.move_to_end(key)
+        self.nb_hit += 1
+        return [orjson.loads(el) for el in self._data[key]]
+
+    def put(self, key: Hashable, *figs) -> None:
+        """store the figures `figs` with the key `key`"""
+        if key is None:
+            return
+        payloads = tuple(self.serialize(fig) for fig in figs)
+        size = sum(len(el) for el in payloads)
+        if size > self.max_size:
+            # this entry alone would not fit in the cache
+            return
+        if key in self._data:
+            self._size -= sum(len(el) for el in self._data.pop(key))
+        self._data[key] = payloads
+        self._size += size
+        while self._size > self.max_size:
+            _, removed = self._data.popitem(last=False)
+            self._size -= sum(len(el) for el in removed)
+
+    def clear(self) -> None:
+        """remove everything from the cache"""
+        self._data.clear()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        """memory used (in bytes) by the figures stored"""
+        return self._size
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
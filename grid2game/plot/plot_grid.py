@@ -10,6 +10,7 @@ import cmath
 import warnings
 import time
 import copy
+from collections import OrderedDict
 import plotly.graph_objects as go
 import numpy as np
 
@@ -23,7 +24,7 @@ from grid2game.plot.plot_param import PlotParams
 
 
 class PlotGrids(PlotParams):
-    def __init__(self, observation_space):
+    def __init__(self, observation_space, max_substation_zoomed=16):
         super().__init__()
         self.glop_plot = PlotPlotly(observation_space)
         self.observation_space = observation_space
@@ -45,7 +46,9 @@ class PlotGrids(PlotParams):
         self.figure_forecat = None
         self.sub_fig = None
         self._last_sub_clicked = None
-        self.figs_substation_zoomed = []
+        # figures of the substations when zoomed in, built the first time they are displayed (LRU cache)
+        self.figs_substation_zoomed = OrderedDict()
+        self.max_substation_zoomed = max(int(max_substation_zoomed), 1)
         self.objs_info_zoomed = {}
 
         # and the units
@@ -108,6 +111,28 @@ class PlotGrids(PlotParams):
         self._last_rt_step = -1
         self._last_for_step = -1
 
+        # whether the figures (self.figure_rt and self.figure_forecat) do not represent self.obs_rt and
+        # self.obs_forecast (for example because they have been retrieved from a cache)
+        self._rt_fig_outdated = False
+        self._for_fig_outdated = False
+
+    def units_key(self):
+        """represents all the settings (units, sides, etc.) that modifies the appearance of the figures"""
+        return (self.line_info, self.line_side, self.load_info, self.gen_info, self.storage_info)
+
+    def set_observations(self, obs_rt, obs_forecast):
+        """set the observations, without updating the figures (for example if they are retrieved from a cache)"""
+        self.obs_rt = obs_rt
+        self.obs_forecast = obs_forecast
+        self._last_rt_step = obs_rt.current_step
+        self._last_for_step = obs_forecast.current_step
+        self._rt_fig_outdated = True
+        self._for_fig_outdated = True
+
+    def figs_outdated(self):
+        """whether the figures need to be fully redrawn before being modified"""
+        return self._rt_fig_outdated or self._for_fig_outdated
+
     def update_sub_figure(self, grid2op_action, sub_id):
         """update the substation based on the proposed action (implements https://github.com/BDonnot/grid2game/issues/36)"""
         obs = self.obs_rt + grid2op_action
@@ -182,88 +207,97 @@ class PlotGrids(PlotParams):
                          )
         fig.add_trace(tmp)
 
-    def _init_figures_substation_zoomed(self):
-        """init all the figures for the substation, when zoomed in"""
-        self.figs_substation_zoomed = []
-        for sub_id, sub_name in enumerate(self.grid.name_sub):
-            tmp_fig = go.Figure()
-            (posx, posy) = self.layout[sub_name]
-            tmp_fig.add_shape(type="circle",
-                              xref="x", yref="y",
-                              fillcolor=self._sub_fill_color_1bus,
-                              x0=posx - self._r_sub_zoom,
-                              y0=posy - self._r_sub_zoom,
-                              x1=posx + self._r_sub_zoom,
-                              y1=posy + self._r_sub_zoom,
-                              line_color=self._sub_fill_color_1bus,
-                              opacity=0.5
-                              )
-            tmp_fig.add_shape(type="circle",
-                              xref="x", yref="y",
-                              x0=posx - self._dist_bus_1 * self._r_sub_zoom,
-                              y0=posy - self._dist_bus_1 * self._r_sub_zoom,
-                              x1=posx + self._dist_bus_1 * self._r_sub_zoom,
-                              y1=posy + self._dist_bus_1 * self._r_sub_zoom,
-                              line=dict(color=self.col_bus1, dash=self.style_bus1)
-                              )
-            tmp_fig.add_shape(type="circle",
-                              xref="x", yref="y",
-                              x0=posx - self._dist_bus_2 * self._r_sub_zoom,
-                              y0=posy - self._dist_bus_2 * self._r_sub_zoom,
-                              x1=posx + self._dist_bus_2 * self._r_sub_zoom,
-                              y1=posy + self._dist_bus_2 * self._r_sub_zoom,
-                              line=dict(color=self.col_bus2, dash=self.style_bus2)
-                              )
-            tmp_fig.add_trace(go.Scatter(x=[posx],
-                                         y=[posy],
-                                         text=[sub_name],
-                                         mode="text",
-                                         name=sub_name,
-                                         showlegend=False
-                                         ))
-
-            pos_objs = {}
-            # draw the objects connected to it
-            # dict_ = self.grid.get_obj_connect_to(substation_id=obj_id)  # TODO weird bug
-            dict_ = self.observation_space.get_obj_connect_to(substation_id=sub_id)
-            for load_id in dict_["loads_id"]:
-                nm_this_obj = self.grid.name_load[load_id]
-                pos_in_sub = self.grid.load_to_sub_pos[load_id]
-                pos_topo_vect = self.grid.load_pos_topo_vect[load_id]
-                self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_load,
-                                         tmp_fig, pos_objs, pos_in_sub, pos_topo_vect)
-            for gen_id in dict_["generators_id"]:
-                nm_this_obj = self.grid.name_gen[gen_id]
-                pos_in_sub = self.grid.gen_to_sub_pos[gen_id]
-                pos_topo_vect = self.grid.gen_pos_topo_vect[gen_id]
-                self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_gen,
+    def _get_figure_substation_zoomed(self, sub_id):
+        """retrieve the figure of the substation `sub_id` when zoomed in (it is built if not already in the cache)"""
+        if sub_id in self.figs_substation_zoomed:
+            self.figs_substation_zoomed.move_to_end(sub_id)
+        else:
+            self.figs_substation_zoomed[sub_id] = self._init_figure_substation_zoomed(sub_id)
+            while len(self.figs_substation_zoomed) > self.max_substation_zoomed:
+                self.figs_substation_zoomed.popitem(last=False)
+        return self.figs_substation_zoomed[sub_id]
+
+    def _init_figure_substation_zoomed(self, sub_id):
+        """init the figure for the substation `sub_id`, when zoomed in"""
+        sub_name = self.grid.name_sub[sub_id]
+        tmp_fig = go.Figure()
+        (posx, posy) = self.layout[sub_name]
+        tmp_fig.add_shape(type="circle",
+                          xref="x", yref="y",
+                          fillcolor=self._sub_fill_color_1bus,
+                          x0=posx - self._r_sub_zoom,
+                          y0=posy - self._r_sub_zoom,
+                          x1=posx + self._r_sub_zoom,
+                          y1=posy + self._r_sub_zoom,
+                          line_color=self._sub_fill_color_1bus,
+                          opacity=0.5
+                          )
+        tmp_fig.add_shape(type="circle",
+                          xref="x", yref="y",
+                          x0=posx - self._dist_bus_1 * self._r_sub_zoom,
+                          y0=posy - self._dist_bus_1 * self._r_sub_zoom,
+                          x1=posx + self._dist_bus_1 * self._r_sub_zoom,
+                          y1=posy + self._dist_bus_1 * self._r_sub_zoom,
+                          line=dict(color=self.col_bus1, dash=self.style_bus1)
+                          )
+        tmp_fig.add_shape(type="circle",
+                          xref="x", yref="y",
+                          x0=posx - self._dist_bus_2 * self._r_sub_zoom,
+                          y0=posy - self._dist_bus_2 * self._r_sub_zoom,
+                          x1=posx + self._dist_bus_2 * self._r_sub_zoom,
+                          y1=posy + self._dist_bus_2 * self._r_sub_zoom,
+                          line=dict(color=self.col_bus2, dash=self.style_bus2)
+                          )
+        tmp_fig.add_trace(go.Scatter(x=[posx],
+                                     y=[posy],
+                                     text=[sub_name],
+                                     mode="text",
+                                     name=sub_name,
+                                     showlegend=False
+                                     ))
+
+        pos_objs = {}
+        # draw the objects connected to it
+        # dict_ = self.grid.get_obj_connect_to(substation_id=obj_id)  # TODO weird bug
+        dict_ = self.observation_space.get_obj_connect_to(substation_id=sub_id)
+        for load_id in dict_["loads_id"]:
+            nm_this_obj = self.grid.name_load[load_id]
+            pos_in_sub = self.grid.load_to_sub_pos[load_id]
+            pos_topo_vect = self.grid.load_pos_topo_vect[load_id]
+            self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_load,
+                                     tmp_fig, pos_objs, pos_in_sub, pos_topo_vect)
+        for gen_id in dict_["generators_id"]:
+            nm_this_obj = self.grid.name_gen[gen_id]
+            pos_in_sub = self.grid.gen_to_sub_pos[gen_id]
+            pos_topo_vect = self.grid.gen_pos_topo_vect[gen_id]
+            self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_gen,
+                                     tmp_fig, pos_objs, pos_in_sub, pos_topo_vect)
+        for line_id in dict_["lines_or_id"]:
+            nm_this_obj = self.grid.name_line[line_id]
+            pos_in_sub = self.grid.line_or_to_sub_pos[line_id]
+            pos_topo_vect = self.grid.line_or_pos_topo_vect[line_id]
+            self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_line, tmp_fig,
+                                     pos_objs, pos_in_sub, pos_topo_vect, "or")
+        for line_id in dict_["lines_ex_id"]:
+            nm_this_obj = self.grid.name_line[line_id]
+            pos_in_sub = self.grid.line_ex_to_sub_pos[line_id]
+            pos_topo_vect = self.grid.line_ex_pos_topo_vect[line_id]
+            self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_line, tmp_fig,
+                                     pos_objs, pos_in_sub, pos_topo_vect, "ex")
+        if "storages_id" in dict_:
+            # storage units were introduced in grid2op 1.5, this is a "if" for backward compatibility
+            for stor_id in dict_["storages_id"]:
+                nm_this_obj = self.grid.name_storage[stor_id]
+                pos_in_sub = self.grid.storage_to_sub_pos[stor_id]
+                pos_topo_vect = self.grid.storage_pos_topo_vect[stor_id]
+                self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_storage,
                                          tmp_fig, pos_objs, pos_in_sub, pos_topo_vect)
-            for line_id in dict_["lines_or_id"]:
-                nm_this_obj = self.grid.name_line[line_id]
-                pos_in_sub = self.grid.line_or_to_sub_pos[line_id]
-                pos_topo_vect = self.grid.line_or_pos_topo_vect[line_id]
-                self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_line, tmp_fig,
-                                         pos_objs, pos_in_sub, pos_topo_vect, "or")
-            for line_id in dict_["lines_ex_id"]:
-                nm_this_obj = self.grid.name_line[line_id]
-                pos_in_sub = self.grid.line_ex_to_sub_pos[line_id]
-                pos_topo_vect = self.grid.line_ex_pos_topo_vect[line_id]
-                self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_line, tmp_fig,
-                                         pos_objs, pos_in_sub, pos_topo_vect, "ex")
-            if "storages_id" in dict_:
-                # storage units were introduced in grid2op 1.5, this is a "if" for backward compatibility
-                for stor_id in dict_["storages_id"]:
-                    nm_this_obj = self.grid.name_storage[stor_id]
-                    pos_in_sub = self.grid.storage_to_sub_pos[stor_id]
-                    pos_topo_vect = self.grid.storage_pos_topo_vect[stor_id]
-                    self._add_element_to_sub(nm_this_obj, posx, posy, self._marker_storage,
-                                             tmp_fig, pos_objs, pos_in_sub, pos_topo_vect)
-            tmp_fig.layout.update({
-                                   "xaxis": {'visible': False},
-                                   "yaxis": {'visible': False},
-                                   "margin": dict(l=0, r=0, t=0, b=0)}
-                                  )
-            self.figs_substation_zoomed.append((tmp_fig, pos_objs))
+        tmp_fig.layout.update({
+                               "xaxis": {'visible': False},
+                               "yaxis": {'visible': False},
+                               "margin": dict(l=0, r=0, t=0, b=0)}
+                              )
+        return tmp_fig, pos_objs
 
     def retrieve_obj_info(self, obj_info):
         if obj_info[self.grid.LOA_COL] != -1:
@@ -299,7 +333,7 @@ class PlotGrids(PlotParams):
 
     def get_object_clicked_sub(self, clickData):
         """handles which object is clicked on when a substation is being zoomed in"""
-        _, dict_sub = self.figs_substation_zoomed[self._last_sub_clicked]
+        _, dict_sub = self._get_figure_substation_zoomed(self._last_sub_clicked)
         res = (None, 0)
         if clickData is not None:
             pts = clickData['points'][0]
@@ -311,7 +345,7 @@ class PlotGrids(PlotParams):
 
     def _get_res_sub_clicked(self, obj_id, obs=None):
         # draw the substation
-        self.sub_fig, _ = self.figs_substation_zoomed[obj_id]
+        self.sub_fig, _ = self._get_figure_substation_zoomed(obj_id)
         self._last_sub_clicked = obj_id
 
         # add the right color to which the object is connected
@@ -425,8 +459,8 @@ class PlotGrids(PlotParams):
         self.figure_forecat = go.Figure()
         self.sub_fig = go.Figure()
 
-        # to initialized the zoomed in substations layout
-        self._init_figures_substation_zoomed()
+        # the zoomed in substations figures are built only when they are clicked on
+        self.figs_substation_zoomed.clear()
 
         self.obs_rt = obs_rt
         self.obs_forecast = obs_forecast
@@ -458,6 +492,7 @@ class PlotGrids(PlotParams):
         beg_ = time.perf_counter()
         self._last_rt_time = obs_rt.current_step
         self.obs_rt = obs_rt
+        self._rt_fig_outdated = False
         self._update_all_elements(is_forecast=False)
         self._update_all_figures_all_values(forecast_only=False)
         tmp = time.perf_counter() - beg_
@@ -472,6 +507,7 @@ class PlotGrids(PlotParams):
         beg_ = time.perf_counter()
         self._last_for_step = obs_forecast.current_step
         self.obs_forecast = obs_forecast
+        self._for_fig_outdated = False
         self._update_all_elements(is_forecast=True)
         self._update_all_figures_all_values(forecast_only=True)
         tmp = time.perf_counter() - beg_
@@ -1142,6 +1178,24 @@ class PlotGrids(PlotParams):
                           showlegend=False)
         traces.append(tmp_)
 
+    def get_figure_contingencies(self, worst_rho):
+        """
+        a copy (as a dictionary, which is much faster to build than a plotly figure) of the real time figure where
+        the powerlines are colored (and labeled) by their highest flow after any single powerline outage
+        (`worst_rho`, see `grid2game.analysis.ContingencyResults.worst_rho_per_line`)
+        """
+        fig = self.figure_rt.to_dict()
+        traces = {}
+        for nm in self.grid.name_line:
+            id_ = self.ids[nm]
+            color, width = self._get_line_color(worst_rho[id_])
+            traces[nm + "_img"] = {"line": dict(dash=None if self.obs_rt.line_status[id_] else "dash",
+                                                color=color, width=width)}
+            traces[nm + "_value"] = {"text": [f" {100. * worst_rho[id_]:.0f}%" if worst_rho[id_] > 0.75 else ""]}
+        for trace in fig["data"]:
+            trace.update(traces.get(trace.get("name"), {}))
+        return fig
+
     def _one_line(self, name, obs, dict_traces):
         """draw one powerline"""
         # retrieve its id
@@ -1151,24 +1205,7 @@ class PlotGrids(PlotParams):
         connected = obs.line_status[id_]
 
         # coloring
-        rho = obs.rho[id_]
-        color = self.line_color_ok
-        width = 1
-        # TODO handle line color differently
-        if rho > 1.0:
-            color = "darkred"
-            width = 3
-        elif rho > 0.95:
-            color = "red"
-        elif rho > 0.90:
-            color = "coral"
-        elif rho > 0.85:
-            color = "orange red"
-        elif rho > 0.75:
-            color = "orange"
-        elif rho > 0.50:
-            color = "darkblue"
-
+        color, width = self._get_line_color(obs.rho[id_])
         line_style = dict(dash=None if connected else "dash",
                           color=color, width=width)
         dict_traces[name+"_img"] = {"line": line_style}
@@ -0,0 +1,54 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import numpy as np
+import plotly.graph_objects as go
+
+from grid2game.plot.plot_param import PlotParams
+
+
+class PlotLookahead(PlotParams):
+    """
+    "forecast strip": highest flow at each of the next steps of the current state when a policy is followed
+    (see `Env.lookahead`), a game over is displayed as a black bar
+    """
+    def __init__(self, height=130):
+        super().__init__()
+        self.figure = go.Figure()
+        self.figure.add_trace(go.Bar(x=[], y=[], name="max_rho", text=[], textposition="inside", hoverinfo="x+text"))
+        self.figure.update_xaxes(showgrid=False)
+        self.figure.update_yaxes(range=[0., 120.], showgrid=False, ticksuffix="%")
+        self.figure.update_layout(height=int(height),
+                                  margin=dict(l=0, r=0, t=30, b=0),
+                                  plot_bgcolor='rgba(0,0,0,0)',
+                                  showlegend=False,
+                                  title=dict(text="", font=dict(size=14), x=0.5))
+
+    def update(self, results) -> go.Figure:
+        """display these results (None to display nothing)"""
+        if results is None or not len(results.max_rho):
+            self.figure.update_traces(x=[], y=[], text=[], selector=dict(name="max_rho"))
+            self.figure.update_layout(title=dict(text=""))
+            return self.figure
+        max_rho = np.asarray(results.max_rho)
+        game_over = ~np.isfinite(max_rho)
+        colors = ["black" if go_ else self._get_line_color(rho)[0] for rho, go_ in zip(max_rho, game_over)]
+        self.figure.update_traces(x=[f"{ts:%H:%M}" for ts in results.time_stamps],
+                                  y=np.where(game_over, 120., 100. * np.minimum(max_rho, 1.2)),
+                                  text=["game over" if go_ else f"{100. * rho:.0f}%"
+                                        for rho, go_ in zip(max_rho, game_over)],
+                                  marker=dict(color=colors),
+                                  selector=dict(name="max_rho"))
+        if results.game_over:
+            summary = f"game over in {results.survival + 1} steps"
+        else:
+            summary = f"no game over in the next {results.survival} steps"
+        policy = results.policy.replace("_", " ")
+        self.figure.update_layout(title=dict(text=f"Next steps ({policy}): {summary}, "
+                                                  f"max flow {100. * max_rho[~game_over].max(initial=0.):.0f}%"))
+        return self.figure
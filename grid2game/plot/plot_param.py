@@ -130,6 +130,26 @@ class PlotParams(object):
                                  opacity=0.7
                                  )
 
+    def _get_line_color(self, rho):
+        """color and width of a powerline with this flow"""
+        color = self.line_color_ok
+        width = 1
+        # TODO handle line color differently
+        if rho > 1.0:
+            color = "darkred"
+            width = 3
+        elif rho > 0.95:
+            color = "red"
+        elif rho > 0.90:
+            color = "coral"
+        elif rho > 0.85:
+            color = "orange red"
+        elif rho > 0.75:
+            color = "orange"
+        elif rho > 0.50:
+            color = "darkblue"
+        return color, width
+
     def _set_layout(self, fig):
         """set the layout of the figure, for now called only once"""
         # see https://dash.plotly.com/interactive-graphing
@@ -9,6 +9,7 @@
 import plotly.colors as pc
 import plotly.graph_objects as go
 import time
+import numpy as np
 
 try:
     from grid2op.PlotGrid.config import NUKE_COLOR, THERMAL_COLOR, WIND_COLOR, SOLAR_COLOR, HYDRO_COLOR
@@ -24,10 +25,11 @@ except ImportError as exc_:
                   DeprecationWarning)
 
 from grid2game.plot.plot_param import PlotParams
+from grid2game.plot.downsampling import DOWNSAMPLING_METHODS
 
 
 class PlotTemporalSeries(object):
-    def __init__(self, tree):
+    def __init__(self, tree, max_points_per_trace=1000, downsampling="lttb"):
         # super().__init__()
 
         # maybe in the parameters
@@ -42,6 +44,36 @@ class PlotTemporalSeries(object):
         # height
         self.height = 500
 
+        # name of the traces (in the order they are added to the figures) and the data they display
+        self._load_gen_series = [("Sum Hydro", "_sum_hydro"),
+                                 ("Sum Wind", "_sum_wind"),
+                                 ("Sum Solar", "_sum_solar"),
+                                 ("Sum Nuclear", "_sum_nuclear"),
+                                 ("Sum Thermal", "_sum_thermal"),
+                                 ("Total Load", "_sum_load"),
+                                 ("Import / export", "_sum_import_export"),
+                                 ]
+        self._line_cap_series = [("Highest line capacity", "_max_line_flow"),
+                                 ("2nd highest line cap.", "_secondmax_line_flow"),
+                                 ("3rd highest line cap.", "_thirdmax_line_flow"),
+                                 ]
+        self._overflow_trace_id = len(self._line_cap_series)
+
+        # what is currently displayed on the browser (to send only the new points when possible)
+        self._last_node_displayed = None
+        self._nb_points_displayed = 0  # number of points of the data already displayed
+        self._nb_points_sent = 0  # number of points on each trace on the browser (after downsampling)
+
+        # downsampling of the data, for display only
+        if downsampling not in DOWNSAMPLING_METHODS:
+            raise RuntimeError(f"Unknown downsampling method \"{downsampling}\". "
+                               f"Available methods are {sorted(DOWNSAMPLING_METHODS.keys())}")
+        self.max_points_per_trace = int(max_points_per_trace)
+        self._downsample = DOWNSAMPLING_METHODS[downsampling]
+        # range of the x axis zoomed in by the user (None if no zoom)
+        self._x_range_load_gen = None
+        self._x_range_line_cap = None
+
         self.fig_load_gen = None
         self.fig_line_cap = None
         self.init_figures(tree)
@@ -91,7 +123,8 @@ class PlotTemporalSeries(object):
         self.fig_line_cap.update_layout(title={'text': "Line capacity"},
                                         xaxis_title='date and time',
                                         yaxis_title="Capacity (%)",
-                                        height=int(self.height))
+                                        height=int(self.height),
+                                        uirevision="line_cap")  # keep the zoom of the user when data change
 
         tmp_ = go.Scatter(x=data._datetimes,
                           y=data._sum_hydro,
@@ -147,7 +180,8 @@ class PlotTemporalSeries(object):
         self.fig_load_gen.update_layout(title={'text': "Power production and consumption"},
                                         xaxis_title='date and time',
                                         yaxis_title="Power (MW)",
-                                        height=int(self.height))
+                                        height=int(self.height),
+                                        uirevision="load_gen")  # keep the zoom of the user when data change
 
     def update_trace(self, env, tree):
         if not env.do_i_display():
@@ -156,39 +190,136 @@ class PlotTemporalSeries(object):
 
         data = tree.temporal_data
         beg_ = time.perf_counter()
-        self.fig_load_gen.update_traces(x=data._datetimes,
-                                        y=data._sum_hydro,
-                                        selector=dict(name="Sum Hydro"))
-        self.fig_load_gen.update_traces(x=data._datetimes,
-                                        y=data._sum_wind,
-                                        selector=dict(name="Sum Wind"))
-        self.fig_load_gen.update_traces(x=data._datetimes,
-                                        y=data._sum_solar,
-                                        selector=dict(name="Sum Solar"))
-        self.fig_load_gen.update_traces(x=data._datetimes,
-                                        y=data._sum_nuclear,
-                                        selector=dict(name="Sum Nuclear"))
-        self.fig_load_gen.update_traces(x=data._datetimes,
-                                        y=data._sum_load,
-                                        selector=dict(name="Total Load"))
-        self.fig_load_gen.update_traces(x=data._datetimes,
-                                        y=data._sum_import_export,
-                                        selector=dict(name="Import / export"))
-        self.fig_load_gen.update_traces(x=data._datetimes,
-                                        y=data._sum_thermal,
-                                        selector=dict(name="Sum Thermal"))
-
-        self.fig_line_cap.update_traces(x=data._datetimes,
-                                        y=data._max_line_flow,
-                                        selector=dict(name="Highest line capacity"))
-        self.fig_line_cap.update_traces(x=data._datetimes,
-                                        y=data._secondmax_line_flow,
-                                        selector=dict(name="2nd highest line cap."))
-        self.fig_line_cap.update_traces(x=data._datetimes,
-                                        y=data._thirdmax_line_flow,
-                                        selector=dict(name="3rd highest line cap."))
+        datetimes = np.array(data._datetimes, dtype=object)
+        nb_sent = self._update_fig_downsampled(self.fig_load_gen, self._load_gen_series,
+                                               data, datetimes, self._x_range_load_gen)
+        nb_sent_ = self._update_fig_downsampled(self.fig_line_cap, self._line_cap_series,
+                                                data, datetimes, self._x_range_line_cap)
         self.fig_line_cap.update_traces(x=(data._datetimes[0], data._datetimes[-1]),
+                                        y=(1., 1.),
                                         selector=dict(name="Overflow limit"))
+        self._last_node_displayed = tree.current_node
+        self._nb_points_displayed = len(data._datetimes)
+        self._nb_points_sent = max(nb_sent, nb_sent_)
         self._timer_update += time.perf_counter() - beg_
         # print(f"temporal series: {self._timer_update = }")
         return self.fig_load_gen, self.fig_line_cap
+
+    def _indices_in_range(self, datetimes, x_range):
+        """indices of the points in the range `x_range` (zoomed in by the user), with one more
+        point on each side so that the lines go to the border of the figure"""
+        nb_points = datetimes.shape[0]
+        if x_range is None:
+            return np.arange(nb_points)
+        x_min, x_max = x_range
+        as_dt64 = datetimes.astype("datetime64[ms]")
+        beg_ = max(int(np.searchsorted(as_dt64, x_min, side="left")) - 1, 0)
+        end_ = min(int(np.searchsorted(as_dt64, x_max, side="right")) + 1, nb_points)
+        return np.arange(beg_, end_)
+
+    def _update_fig_downsampled(self, fig, series, data, datetimes, x_range) -> int:
+        """update the traces of the figure with (at most) `self.max_points_per_trace` points each, and return
+        the maximum number of points of the traces"""
+        indices = self._indices_in_range(datetimes, x_range)
+        res = 0
+        for trace_name, attr_nm in series:
+            vals = np.asarray(getattr(data, attr_nm))[indices]
+            kept = self._downsample(vals, self.max_points_per_trace)
+            fig.update_traces(x=datetimes[indices[kept]].tolist(),
+                              y=vals[kept],
+                              selector=dict(name=trace_name))
+            res = max(res, kept.shape[0])
+        return res
+
+    @staticmethod
+    def _get_x_range(relayout_data):
+        """retrieve the range of the x axis from the "relayoutData" of a dcc.Graph (None means "everything") """
+        if relayout_data is None or "xaxis.autorange" in relayout_data:
+            return None
+        if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+            x_min, x_max = relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+        elif "xaxis.range" in relayout_data:
+            x_min, x_max = relayout_data["xaxis.range"]
+        else:
+            # no modification of the x axis
+            return False
+        return (np.datetime64(str(x_min).replace(" ", "T"), "ms"),
+                np.datetime64(str(x_max).replace(" ", "T"), "ms"))
+
+    def set_zoom(self, relayout_load_gen=None, relayout_line_cap=None) -> bool:
+        """the user zoomed (in or out) in one of the temporal graph, returns whether the data displayed
+        need to be updated"""
+        res = False
+        x_range = self._get_x_range(relayout_load_gen)
+        if x_range is not False:
+            res = res or x_range != self._x_range_load_gen
+            self._x_range_load_gen = x_range
+        x_range = self._get_x_range(relayout_line_cap)
+        if x_range is not False:
+            res = res or x_range != self._x_range_line_cap
+            self._x_range_line_cap = x_range
+        return res
+
+    def _is_after_last_displayed(self, node) -> bool:
+        """whether `node` is the last node displayed, or one of its descendant"""
+        last_node = self._last_node_displayed
+        if last_node is None:
+            return False
+        while node is not None and node.step > last_node.step:
+            node = node.father
+        return node is last_node
+
+    def reset_display(self):
+        """the state of the figures on the browser is unknown, next update will need to send everything"""
+        self._last_node_displayed = None
+        self._nb_points_displayed = 0
+
+    def get_update(self, env, tree, force_redraw=False):
+        """
+        Computes what needs to be sent to the browser to update the temporal figures.
+
+        If the current node is a descendant of the last node displayed, only the new points are sent
+        (in the format of the `extendData` property of dash `dcc.Graph`). Otherwise (for example if the
+        user clicked on another branch of the timeline) the whole figures are updated.
+
+        Returns
+        -------
+        fig_load_gen, fig_line_cap, extend_load_gen, extend_line_cap
+            Each of these can be ``None`` (meaning "nothing to update"). Either the figures or the "extend" are
+            ``None``.
+        """
+        if not env.do_i_display():
+            # display of the temporal figures should not be updated (for example because i run the episode until
+            # the end)
+            return None, None, None, None
+
+        node = tree.current_node
+        data = tree.temporal_data
+        nb_new_points = len(data._datetimes) - self._nb_points_displayed
+        too_many_points = self._nb_points_sent + nb_new_points > 1.5 * self.max_points_per_trace
+        if force_redraw or too_many_points or not self._is_after_last_displayed(node):
+            # the whole figures are sent (and downsampled if needed)
+            fig_load_gen, fig_line_cap = self.update_trace(env, tree)
+            return fig_load_gen, fig_line_cap, None, None
+
+        nb_points = len(data._datetimes)
+        if nb_points <= self._nb_points_displayed:
+            # nothing new to display
+            self._last_node_displayed = node
+            return None, None, None, None
+
+        beg_ = time.perf_counter()
+        new_x = data._datetimes[self._nb_points_displayed:]
+        extend_load_gen = [{"x": [new_x for _ in self._load_gen_series],
+                            "y": [getattr(data, attr_nm)[self._nb_points_displayed:]
+                                  for _, attr_nm in self._load_gen_series]},
+                           list(range(len(self._load_gen_series)))]
+        extend_line_cap = [{"x": [new_x for _ in self._line_cap_series] + [new_x],
+                            "y": [getattr(data, attr_nm)[self._nb_points_displayed:]
+                                  for _, attr_nm in self._line_cap_series] + [[1. for _ in new_x]]},
+                           list(range(len(self._line_cap_series))) + [self._overflow_trace_id]]
+        self._last_node_displayed = node
+        self._nb_points_displayed = nb_points
+        self._nb_points_sent += len(new_x)
+        self._timer_update += time.perf_counter() - beg_
+        return None, None, extend_load_gen, extend_line_cap
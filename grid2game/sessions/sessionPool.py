@@ -0,0 +1,213 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import dash
+import flask
+
+
+class SessionPool(object):
+    """
+    Keep one session (environment, tree, figures etc.) per user of the application.
+
+    Each browser is identified by a cookie. At most `max_sessions` sessions are kept in memory. Sessions that
+    are not used for more than `idle_timeout` seconds are evicted, and when the pool is full the least recently
+    used session (that is not used by a callback) is evicted to make room for a new one. If `spill_dir` is not
+    None, the tree of an evicted session is saved there and is restored when the user comes back.
+
+    Notes
+    -----
+    Sessions are kept in the memory of the process, so if the app is served by gunicorn, only one worker
+    (with multiple threads) should be used.
+    """
+    COOKIE_NAME = "grid2game_session"
+
+    def __init__(self, make_session, max_sessions=30, idle_timeout=1800., spill_dir=None, logger=None):
+        self._make_session = make_session
+        self.max_sessions = int(max_sessions)
+        self.idle_timeout = float(idle_timeout)
+        self.spill_dir = spill_dir
+        if self.spill_dir is not None:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+        self._sessions = OrderedDict()  # session id -> session (least recently used first)
+        self._last_access = {}  # session id -> time of the last access
+        self._in_use = {}  # session id -> number of callbacks currently using the session
+        self._pending = {}  # session id -> event set when the session is created (or evicted)
+        self._spilled = {}  # session id -> path where the session is saved
+        self._lock = threading.Lock()
+
+        if logger is None:
+            import logging
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger.getChild("SessionPool")
+
+    def register(self, flask_server):
+        """give a session id (stored in a cookie) to each new browser connecting to the flask server"""
+        @flask_server.after_request
+        def _set_session_cookie(response):
+            if flask.request.cookies.get(self.COOKIE_NAME) is None:
+                response.set_cookie(self.COOKIE_NAME, uuid.uuid4().hex, httponly=True, samesite="Lax")
+            return response
+
+    @staticmethod
+    def is_valid_id(session_id):
+        """session ids are sent by the browser, they are checked before being used (eg in a path)"""
+        return session_id is not None and re.fullmatch("[0-9a-f]{32}", session_id) is not None
+
+    def get(self, session_id, create=True):
+        """
+        retrieve (or create, if `create` is True) the session with id `session_id`, returns None if it cannot be
+        created (or is not in memory, if `create` is False).
+
+        The session cannot be evicted until `release` is called.
+        """
+        if not self.is_valid_id(session_id):
+            self.logger.warning(f"get: invalid session id \"{session_id}\"")
+            return None
+
+        with self._lock:
+            idle = self._pop_idle()
+        self._evict(idle, f"after {self.idle_timeout:.0f}s of inactivity")
+
+        while True:
+            lru = []
+            with self._lock:
+                if session_id in self._sessions:
+                    self._sessions.move_to_end(session_id)
+                    self._last_access[session_id] = time.time()
+                    self._in_use[session_id] += 1
+                    return self._sessions[session_id]
+                if not create:
+                    return None
+                event = self._pending.get(session_id)
+                if event is None:
+                    if len(self._sessions) + len(self._pending) >= self.max_sessions:
+                        lru = self._pop_lru()
+                        if not lru:
+                            self.logger.error(f"get: impossible to create a new session, the maximum number "
+                                              f"of sessions ({self.max_sessions}) is reached and they are all "
+                                              f"used")
+                            return None
+                    else:
+                        # this thread creates the session
+                        self._pending[session_id] = threading.Event()
+                        spilled_path = self._spilled.pop(session_id, None)
+                        break
+            if lru:
+                # the pool is full, room is made for the new session (that can be taken by another thread)
+                self._evict(lru, "to make room for a new session")
+            else:
+                # the session is being created (or evicted) by another thread
+                event.wait()
+
+        try:
+            session = self._make_session()
+            if spilled_path is not None:
+                try:
+                    session.restore_session(spilled_path)
+                    self.logger.info(f"get: session {session_id} restored from {spilled_path}")
+                except Exception as exc_:
+                    self.logger.error(f"get: impossible to restore the session {session_id}: {exc_}")
+                os.remove(spilled_path)
+            with self._lock:
+                self._sessions[session_id] = session
+                self._last_access[session_id] = time.time()
+                self._in_use[session_id] = 1
+            self.logger.info(f"get: session {session_id} created ({len(self)} sessions in memory)")
+        finally:
+            with self._lock:
+                self._pending.pop(session_id).set()
+        return session
+
+    def release(self, session_id):
+        """the session retrieved with `get` is not used anymore"""
+        with self._lock:
+            if session_id in self._in_use:
+                self._in_use[session_id] -= 1
+                self._last_access[session_id] = time.time()
+
+    def _pop_idle(self):
+        """remove from the pool the sessions not used for too long, lock must be held"""
+        now = time.time()
+        idle = [sid for sid in self._sessions
+                if self._in_use[sid] == 0 and now - self._last_access[sid] > self.idle_timeout]
+        return [self._pop(session_id) for session_id in idle]
+
+    def _pop_lru(self):
+        """remove from the pool the least recently used session not used by a callback (if any), lock must be held"""
+        for session_id in self._sessions:
+            if self._in_use[session_id] == 0:
+                return [self._pop(session_id)]
+        return []
+
+    def _pop(self, session_id):
+        """remove a session from the pool before it is evicted, lock must be held"""
+        session = self._sessions.pop(session_id)
+        del self._last_access[session_id]
+        del self._in_use[session_id]
+        # `get` waits until the session is saved (so that it can be restored)
+        self._pending[session_id] = threading.Event()
+        return session_id, session
+
+    def _evict(self, sessions, reason):
+        """spill to disk (if possible) and close the sessions removed by `_pop_idle` or `_pop_lru`, lock must not be
+        held"""
+        for session_id, session in sessions:
+            path = None
+            try:
+                if self.spill_dir is not None:
+                    path = os.path.join(self.spill_dir, f"{session_id}.npz")
+                    try:
+                        session.save_session(path)
+                    except Exception as exc_:
+                        path = None
+                        self.logger.error(f"_evict: impossible to save the session {session_id}: {exc_}")
+                session.close()
+                self.logger.info(f"_evict: session {session_id} evicted {reason}")
+            finally:
+                with self._lock:
+                    if path is not None:
+                        self._spilled[session_id] = path
+                    self._pending.pop(session_id).set()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @property
+    def nb_spilled(self):
+        """number of sessions saved on the hard drive"""
+        return len(self._spilled)
+
+
+class SessionDispatcher(object):
+    """forwards the dash callbacks to the session of the user who triggered them"""
+    def __init__(self, session_pool):
+        self._session_pool = session_pool
+
+    def __getattr__(self, name):
+        session_pool = self._session_pool
+
+        def _callback(*args, **kwargs):
+            session_id = flask.request.cookies.get(SessionPool.COOKIE_NAME)
+            session = session_pool.get(session_id)
+            if session is None:
+                raise dash.exceptions.PreventUpdate
+            try:
+                return getattr(session, name)(*args, **kwargs)
+            finally:
+                session_pool.release(session_id)
+        _callback.__name__ = name
+        return _callback
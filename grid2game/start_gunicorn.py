@@ -8,6 +8,7 @@
 
 import flask
 from grid2game.VizServer import VizServer
+from grid2game.envs import Env
 server = flask.Flask(__name__)  # define flask app.server
 
 dev = False
@@ -30,8 +31,18 @@ args.assistant_path = assistant_path
 args.assistant_seed = assistant_seed
 args.g2op_param = None
 args.g2op_config = None
-
-
+# each user has its own environment (gunicorn should be used with only one worker)
+# each open tab keeps a thread busy (it listens to the updates of its session) so gunicorn needs more threads than
+# sessions, with some headroom for the other requests, eg:
+# gunicorn --preload --workers 1 --threads 40 grid2game.start_gunicorn:server
+args.max_sessions = 30
+args.session_timeout = 1800.
+args.session_spill_dir = ""
+
+
+# with "gunicorn --preload" the app (and the grid2op environment) is built once, before the worker is forked: the
+# environments of the sessions are copies of it (see `Env.preload`) and a restarted worker does not build it again
+Env.preload(args.env_name, test=args.is_test)
 viz_server = VizServer(server=server, build_args=args)
 app = viz_server.my_app
 
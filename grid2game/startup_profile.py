@@ -0,0 +1,125 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+# NB: this module is imported before anything else when the app starts, it should only use the standard library
+
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler(object):
+    """
+    Measures where the startup time goes (used with `grid2game --profile_startup`): the time of each phase of the
+    startup and, like `python -X importtime`, the time spent importing each module.
+
+    The imports are timed by wrapping `__import__`: the time of a module is the time of its first import, its
+    "self" time excludes the modules it imports. Only the imports of the thread that started the profiler are
+    measured. Nothing is measured if `enabled` is False.
+    """
+    def __init__(self, enabled=True, nb_max=15):
+        self.enabled = bool(enabled)
+        self.nb_max = int(nb_max)
+        self.phases = []  # (name, duration)
+        self.imports = []  # (module name, depth, self time, cumulative time)
+        self._recorded = set()
+        self._beg = None
+        self._stack = []  # time spent in the imports made by the modules being imported
+        self._original_import = None
+        self._thread_id = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        if exc_type is None and self.enabled:
+            print(self.report())
+        return False
+
+    def start(self) -> None:
+        """start measuring the imports"""
+        if not self.enabled or self._original_import is not None:
+            return
+        self._beg = time.perf_counter()
+        self._thread_id = threading.get_ident()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self) -> None:
+        """stop measuring the imports"""
+        if self._original_import is None:
+            return
+        builtins.__import__ = self._original_import
+        self._original_import = None
+
+    def record(self, name, duration) -> None:
+        """add a phase that has already been measured"""
+        if self.enabled:
+            self.phases.append((name, float(duration)))
+
+    @contextmanager
+    def phase(self, name):
+        """measure the time of a phase of the startup"""
+        beg_ = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - beg_)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module_name = name
+        if level > 0 and globals is not None:
+            # relative import
+            package = globals.get("__package__") or ""
+            package = package.rsplit(".", level - 1)[0] if level > 1 else package
+            module_name = f"{package}.{name}" if name else package
+        if module_name in sys.modules or threading.get_ident() != self._thread_id:
+            return self._original_import(name, globals, locals, fromlist, level)
+        depth = len(self._stack)
+        self._stack.append(0.)
+        beg_ = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - beg_
+            children = self._stack.pop()
+            # a failed import (eg an optional dependency) is counted in the module that tried it
+            if module_name in sys.modules:
+                if self._stack:
+                    self._stack[-1] += cumulative
+                # importing "a.b" imports "a" first, which can import "a.b" itself
+                if module_name not in self._recorded:
+                    self._recorded.add(module_name)
+                    self.imports.append((module_name, depth, cumulative - children, cumulative))
+
+    def report(self) -> str:
+        """the time of each phase, of the imports of each package and the slowest imports"""
+        total = time.perf_counter() - self._beg if self._beg is not None else 0.
+        lines = [f"Startup time: {total:.3f}s"]
+        for name, duration in self.phases:
+            lines.append(f"    {name:<40} {duration:8.3f}s")
+
+        import_time = sum(cumulative for _, depth, _, cumulative in self.imports if depth == 0)
+        lines.append(f"Imports: {len(self.imports)} modules in {import_time:.3f}s, time by package (excluding the "
+                     f"packages they import):")
+        by_package = {}
+        for module_name, _, self_time, _ in self.imports:
+            package = module_name.split(".")[0]
+            duration, nb_modules = by_package.get(package, (0., 0))
+            by_package[package] = (duration + self_time, nb_modules + 1)
+        for package, (duration, nb_modules) in sorted(by_package.items(), key=lambda el: -el[1][0])[:self.nb_max]:
+            lines.append(f"    {package:<40} {duration:8.3f}s ({nb_modules} modules)")
+
+        lines.append("Slowest imports (including the modules they import):")
+        for module_name, _, _, cumulative in sorted(self.imports, key=lambda el: -el[3])[:self.nb_max]:
+            lines.append(f"    {module_name:<40} {cumulative:8.3f}s")
+        return "\n".join(lines)
@@ -1,6 +1,14 @@
 from .my_agent import MyAgent
 
+# number of worker processes used by each assistant to simulate its candidate actions (0: in the main process). Each
+# worker holds a grid2op environment and each session loads its own assistant, so they are not used by default.
+NB_WORKERS = 0
+
 
 def make_agent(env, path):
-    res = MyAgent(env.action_space)
+    backend_cls = type(env.backend)
+    res = MyAgent(env.action_space,
+                  env_path=env.get_path_env(),
+                  backend_cls=getattr(backend_cls, "_INIT_GRID_CLS", backend_cls),
+                  nb_workers=NB_WORKERS)
     return res
@@ -6,10 +6,41 @@
 # SPDX-License-Identifier: MPL-2.0
 # This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
 
+import copy
+import logging
+import multiprocessing
+import pickle
+
 import numpy as np
 from grid2op.dtypes import dt_float
 from grid2op.Agent import GreedyAgent
 
+from grid2game.worker_pool import WorkerPool, get_worker_args, get_worker_env
+
+
+def _is_clear_winner(rho, actual_dispatch, has_error, rho_to_act, redisp_to_act):
+    """after this action the agent would not even look for another action on the next step"""
+    return not has_error and rho.max() < rho_to_act and np.sum(np.abs(actual_dispatch)) <= redisp_to_act
+
+
+def _simulate_candidates(task):
+    """simulate some candidate actions in a worker process, stops when any worker found a clear winner"""
+    obs_bytes, candidates, early_stop, rho_to_act, redisp_to_act = task
+    obs = pickle.loads(obs_bytes)
+    action_space = get_worker_env().action_space
+    stop_event, = get_worker_args()
+    res = []
+    for idx, act_vect in candidates:
+        if stop_event.is_set():
+            break
+        sim_obs, sim_reward, sim_has_error, _ = obs.simulate(action_space.from_vect(act_vect))
+        res.append((idx, sim_reward, sim_has_error, sim_obs.rho, sim_obs.actual_dispatch))
+        if early_stop and _is_clear_winner(sim_obs.rho, sim_obs.actual_dispatch, sim_has_error,
+                                           rho_to_act, redisp_to_act):
+            stop_event.set()
+            break
+    return res
+
 
 class MyAgent(GreedyAgent):
     """
@@ -17,24 +48,72 @@ class MyAgent(GreedyAgent):
     this environment allows to switch on / off powerline constantly without any "cooldown".
 
     Only works correctly for "l2rpn_case14_sandbox" at the moment !
+
+    When there are many candidate actions they are simulated in `nb_workers` worker processes (this requires
+    the path of the environment and the class of its backend, they are created the first time they are needed).
+    The search stops as soon as a candidate is a "clear winner" (see `early_stop`): in that case, with worker
+    processes, the action chosen can depend on which candidates have been simulated first.
     """
+    # kinds of candidate actions
+    DO_NOTHING = 0
+    CURTAIL = 1
+    REDISPATCH = 2
+    LINE = 3
 
-    def __init__(self, action_space):
+    def __init__(self, action_space, env_path=None, backend_cls=None, nb_workers=0):
         GreedyAgent.__init__(self, action_space)
+        self.logger = logging.getLogger(__name__)
         self.tested_action_curtail = None
         self.tested_action_redisp = None
         self.tested_action_lines = None
+        # all the candidates (see `_build_candidates`)
+        self._candidate_actions = None
+        self._candidate_kind = None
+        self._candidate_vects = None
+        self._candidate_redisp = None
+        self._candidate_line_set = None
+        self._candidate_valid = None
+        self._tested_idx = None  # candidates tested at the last step
         self.use_reward = False
         self.alpha_redisp = 0.0003  # to limit the total amount of redispatching
         self.alpha_overflow = 1.  # to limit the total amount of redispatching
         self.exponent_cap = 2
+        # the agent looks for an action only if a powerline is above this or if there is too much redispatching
+        self.rho_to_act = 0.95
+        self.redisp_to_act = 5.
+        # stop simulating as soon as an action brings back the grid in a state where the agent would not act
+        self.early_stop = True
+
+        self.nb_workers = int(nb_workers) if env_path is not None and backend_cls is not None else 0
+        self.min_candidates_parallel = 2 * self.nb_workers  # below that, pickling the observation is not worth it
+        self._env_path = env_path
+        self._backend_cls = backend_cls
+        self._pool = None
+        self._stop_event = None
+
+    def __getstate__(self):
+        """the worker processes cannot be copied (nor pickled): the copy simulates the actions sequentially"""
+        state = self.__dict__.copy()
+        state["nb_workers"] = 0
+        state["_pool"] = None
+        state["_stop_event"] = None
+        return state
+
+    @property
+    def is_deterministic(self):
+        """the same action is chosen for the same observation (not the case with early stop in the worker processes)"""
+        return self.nb_workers == 0 or not self.early_stop
 
     def get_score_to_aim(self, sim_obs):
-        cap = np.maximum((1 - sim_obs.rho), 0.)
+        return self._get_scores(sim_obs.rho[None], sim_obs.actual_dispatch[None])[0]
+
+    def _get_scores(self, rhos, actual_dispatchs):
+        """scores of several simulated states at once (one state per row)"""
+        cap = np.maximum((1 - rhos), 0.)
         cap = cap ** self.exponent_cap
-        cap = np.mean(cap)
-        redisp = np.sum(np.abs(sim_obs.actual_dispatch))
-        nb_powerline_overflow = np.sum(sim_obs.rho > 1.)
+        cap = np.mean(cap, axis=1)
+        redisp = np.sum(np.abs(actual_dispatchs), axis=1)
+        nb_powerline_overflow = np.sum(rhos > 1., axis=1)
         return cap - self.alpha_redisp * redisp - self.alpha_overflow * nb_powerline_overflow
 
     def act(self, observation, reward, done=False):
@@ -64,38 +143,124 @@ class MyAgent(GreedyAgent):
         """
         self.tested_action = self._get_tested_action(observation)
         if len(self.tested_action) > 1:
+            # actions not simulated (see `early_stop`) are left to nan
             self.resulting_rewards = np.full(shape=len(self.tested_action), fill_value=np.NaN, dtype=dt_float)
-            sim_obs_saved = []
-            for i, action in enumerate(self.tested_action):
-                simul_obs, simul_reward, simul_has_error, simul_info = observation.simulate(action)
-                if not self.use_reward:
-                    simul_reward = self.get_score_to_aim(simul_obs)
-                    sim_obs_saved.append(simul_obs)
-                self.resulting_rewards[i] = simul_reward
-            reward_idx = int(np.argmax(self.resulting_rewards))  # rewards.index(max(rewards))
+            if self.nb_workers > 0 and len(self.tested_action) >= self.min_candidates_parallel:
+                self._simulate_parallel(observation)
+            else:
+                self._simulate_sequential(observation)
+            reward_idx = int(np.nanargmax(self.resulting_rewards))  # rewards.index(max(rewards))
             best_action = self.tested_action[reward_idx]
         else:
             best_action = self.tested_action[0]
         if observation.current_step % 10 == 0:
             if observation.dim_alarms > 0:
+                # the candidate actions are reused at each step, they are not modified
+                best_action = copy.deepcopy(best_action)
                 best_action.raise_alarm = [0]
         return best_action
 
+    def _store_results(self, simulated, rewards, rhos, actual_dispatchs):
+        """fill `resulting_rewards` for the tested actions simulated (all the scores are computed at once)"""
+        if not simulated:
+            return
+        if not self.use_reward:
+            rewards = self._get_scores(np.stack(rhos), np.stack(actual_dispatchs))
+        self.resulting_rewards[simulated] = rewards
+
+    def _simulate_sequential(self, observation):
+        """simulate the tested actions one after the other"""
+        simulated, rewards, rhos, actual_dispatchs = [], [], [], []
+        for i, action in enumerate(self.tested_action):
+            simul_obs, simul_reward, simul_has_error, simul_info = observation.simulate(action)
+            simulated.append(i)
+            rewards.append(simul_reward)
+            rhos.append(simul_obs.rho)
+            actual_dispatchs.append(simul_obs.actual_dispatch)
+            if self.early_stop and _is_clear_winner(simul_obs.rho, simul_obs.actual_dispatch, simul_has_error,
+                                                    self.rho_to_act, self.redisp_to_act):
+                break
+        self._store_results(simulated, rewards, rhos, actual_dispatchs)
+
+    def _simulate_parallel(self, observation):
+        """simulate the tested actions in the worker processes (sequentially if they cannot be used)"""
+        if self._pool is None:
+            self._stop_event = multiprocessing.get_context("spawn").Event()
+            self._pool = WorkerPool(self.nb_workers, self._env_path, self._backend_cls,
+                                    initargs=(self._stop_event,), logger=self.logger)
+        self._stop_event.clear()
+        obs_bytes = pickle.dumps(observation)
+        tested_vects = self._candidate_vects[self._tested_idx]
+        # the candidates are dealt so that each worker starts with the most promising ones
+        tasks = [(obs_bytes,
+                  [(i, tested_vects[i]) for i in range(worker_id, len(self.tested_action), self.nb_workers)],
+                  self.early_stop, self.rho_to_act, self.redisp_to_act)
+                 for worker_id in range(self.nb_workers)]
+        results = self._pool.map(_simulate_candidates, tasks)
+        if results is None:
+            # the worker processes cannot be used
+            self.close()
+            self.nb_workers = 0
+            self._simulate_sequential(observation)
+            return
+        results = [el for res in results for el in res]
+        self._store_results([i for i, *_ in results],
+                            [simul_reward for _, simul_reward, *_ in results],
+                            [rho for *_, rho, _ in results],
+                            [actual_dispatch for *_, actual_dispatch in results])
+
+    def close(self):
+        """stop the worker processes (if any)"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+            self._stop_event = None
+
+    def _build_candidates(self):
+        """
+        all the actions the agent can test, built once: kept with their vector representation
+        and what they modify (one row per action) to select them with vectorized masks
+        """
+        self.tested_action_curtail = self.get_all_unitary_curtail(num_bin=5, min_value=0.8)
+        self.tested_action_redisp = self.action_space.get_all_unitary_redispatch(self.action_space,
+                                                                                 num_down=2, num_up=2)
+        self.tested_action_lines = [self.action_space({"set_line_status": [(14, -1)]}),
+                                    self.action_space({"set_line_status": [(14, +1)]}),
+                                    ]
+        groups = [(self.DO_NOTHING, [self.action_space({})]),
+                  (self.CURTAIL, self.tested_action_curtail),
+                  (self.REDISPATCH, self.tested_action_redisp),
+                  (self.LINE, self.tested_action_lines)]
+        self._candidate_actions = [act for _, acts in groups for act in acts]
+        self._candidate_kind = np.array([kind for kind, acts in groups for _ in acts], dtype=int)
+        self._candidate_vects = np.stack([act.to_vect() for act in self._candidate_actions])
+        self._candidate_redisp = np.stack([act.redispatch for act in self._candidate_actions])
+        self._candidate_line_set = np.stack([act.line_set_status for act in self._candidate_actions])
+        # redispatching is only possible on dispatchable generators
+        self._candidate_valid = np.all(self._candidate_redisp[:, ~self.action_space.gen_redispatchable] == 0.,
+                                       axis=1)
+
+    def _get_feasible(self, observation):
+        """mask of the candidate actions that can have an effect in this observation"""
+        # the generators must be able to move (at least a bit) in the direction of the redispatching
+        redisp = self._candidate_redisp
+        can_move = ((redisp > 0.) & (observation.gen_p < observation.gen_pmax)) | \
+                   ((redisp < 0.) & (observation.gen_p > observation.gen_pmin))
+        redisp_ok = np.all((redisp == 0.) | can_move, axis=1)
+        # the status of the powerlines must change, and they must not be in cooldown
+        line_set = self._candidate_line_set
+        changes = ((line_set == 1) & ~observation.line_status) | ((line_set == -1) & observation.line_status)
+        line_ok = np.all((line_set == 0) | (changes & (observation.time_before_cooldown_line == 0)), axis=1)
+        return self._candidate_valid & redisp_ok & line_ok
+
     def _get_tested_action(self, observation):
-        if self.tested_action_curtail is None:
-            res = self.get_all_unitary_curtail(num_bin=5, min_value=0.8)
-            self.tested_action_curtail = res
-        if self.tested_action_redisp is None:
-            res = self.action_space.get_all_unitary_redispatch(self.action_space, num_down=2, num_up=2)
-            self.tested_action_redisp = res
-        if self.tested_action_lines is None:
-            self.tested_action_lines = [self.action_space({"set_line_status": [(14, -1)]}),
-                                        self.action_space({"set_line_status": [(14, +1)]}),
-                                        ]
-        res = [self.action_space({})]  # add the do nothing
+        if self._candidate_actions is None:
+            self._build_candidates()
+        to_test = self._candidate_kind == self.DO_NOTHING
 
         # for speed i consider i try redispatching only if a powerline on the grid is above 90%
-        if observation.rho.max() >= 0.95 or np.sum(np.abs(observation.actual_dispatch)) > 5:
+        if observation.rho.max() >= self.rho_to_act or \
+                np.sum(np.abs(observation.actual_dispatch)) > self.redisp_to_act:
 
             # even in grid2op i need to keep some sort of "primary / secondary reserve", in this case 15MW
             # and i also ensure that i have 20 MW available on gen 0 and 10 on gen 1 (for increase of load)
@@ -103,17 +268,15 @@ class MyAgent(GreedyAgent):
             gen_ratio -= observation.gen_p[observation.gen_redispatchable]
             gen_ratio = np.sum(np.maximum(gen_ratio, 0.))
             if gen_ratio >= 20 and observation.gen_p[0] <= 120 and observation.gen_p[1] <= 115:
-                res += self.tested_action_curtail
-                res += self.tested_action_redisp
+                to_test |= (self._candidate_kind == self.CURTAIL) | (self._candidate_kind == self.REDISPATCH)
 
-            if observation.rho.max() >= 0.95:
+            if observation.rho.max() >= self.rho_to_act:
                 # i add the line actions just in case of emergency
-                res += self.tested_action_lines
+                to_test |= self._candidate_kind == self.LINE
 
-        # I attempt to reconnect powerline if can reconnect some
-        line_stat_s = observation.line_status
-        cooldown = observation.time_before_cooldown_line
-        return res
+            to_test &= self._get_feasible(observation)
+        self._tested_idx = np.flatnonzero(to_test)
+        return [self._candidate_actions[i] for i in self._tested_idx]
 
     def get_all_unitary_curtail(self, num_bin=10, min_value=0.5):
         action_space = self.action_space
@@ -6,8 +6,15 @@
 # SPDX-License-Identifier: MPL-2.0
 # This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
 
-__all__ = ["Link", "EnvTree", "Node"]
+__all__ = ["Link", "EnvTree", "Node", "export_current_branch", "EpisodeLogger",
+           "export_tree", "read_tree", "ObservationStore",
+           "AssistantMemo"]
 
 from grid2game.tree.envTree import EnvTree
 from grid2game.tree.link import Link
 from grid2game.tree.node import Node
+from grid2game.tree.episodeExport import export_current_branch
+from grid2game.tree.episodeLogger import EpisodeLogger
+from grid2game.tree.treeExport import export_tree, read_tree
+from grid2game.tree.observationStore import ObservationStore
+from grid2game.tree.assistantMemo import AssistantMemo
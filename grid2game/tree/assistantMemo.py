@@ -0,0 +1,68 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class AssistantMemo(object):
+    """
+    Remembers the actions of the assistant for the states already seen (eg when the same state is reached again
+    in another branch of the tree), so that the assistant is not called again.
+
+    It is only used for the assistants that declare themselves deterministic (attribute `is_deterministic`
+    set to True): their action must only depend on the observation, the reward and the done flag.
+    At most `max_size` actions are remembered (the oldest ones are forgotten first).
+    """
+    def __init__(self, max_size=1024):
+        self.max_size = max(int(max_size), 1)
+        self._actions = OrderedDict()  # digest of the state -> action of the assistant
+        self._assistant = None  # the actions remembered are the ones of this assistant
+        self._lock = threading.Lock()
+        self.nb_hits = 0
+        self.nb_misses = 0
+
+    @staticmethod
+    def is_usable(assistant) -> bool:
+        """whether the actions of this assistant can be remembered"""
+        return bool(getattr(assistant, "is_deterministic", False))
+
+    @staticmethod
+    def _get_key(obs, reward, done):
+        return hashlib.blake2b(obs.to_vect().tobytes(), digest_size=16).digest(), reward, done
+
+    def act(self, assistant, obs, reward, done):
+        """action of the assistant in this state (the assistant is called only if it is not known)"""
+        if not self.is_usable(assistant):
+            return assistant.act(obs, reward, done)
+        key = self._get_key(obs, reward, done)
+        with self._lock:
+            if assistant is not self._assistant:
+                # the assistant changed, what is remembered is not valid anymore
+                self._actions.clear()
+                self._assistant = assistant
+            res = self._actions.get(key)
+            if res is not None:
+                self._actions.move_to_end(key)
+                self.nb_hits += 1
+                return res
+            self.nb_misses += 1
+        res = assistant.act(obs, reward, done)
+        with self._lock:
+            if assistant is self._assistant:
+                self._actions[key] = res
+                while len(self._actions) > self.max_size:
+                    self._actions.popitem(last=False)
+        return res
+
+    def clear(self) -> None:
+        """forget all the actions"""
+        with self._lock:
+            self._actions.clear()
+            self._assistant = None
@@ -8,7 +8,7 @@
 
 import copy
 import re
-from typing import Union
+from typing import List, Union
 
 import numpy as np
 import plotly
@@ -19,7 +19,9 @@ from grid2op.Agent import BaseAgent
 from grid2op.Environment import BaseEnv
 from grid2op.Observation import BaseObservation
 
+from grid2game.tree.assistantMemo import AssistantMemo
 from grid2game.tree.node import Node
+from grid2game.tree.observationStore import ObservationStore
 
 
 class EnvTree(object):
@@ -27,18 +29,57 @@ class EnvTree(object):
     Store the whole studied environment as a tree
 
     And also implements the possibility to plot it.
+
+    When the tree gets big, the timeline is rendered with WebGL (above `webgl_threshold` nodes displayed)
+    and the "linear chains" (succession of nodes without any action, branching or event) are
+    collapsed into single segments (above `collapse_threshold` nodes in the displayed part of the timeline).
+    These chains are expanded when the user zooms in the timeline.
+
+    A "risk" can be given to each node (see `set_risk`, eg by a `grid2game.analysis.BranchScreener`), the nodes
+    with a risk above `risk_threshold` are highlighted in the timeline.
     """
-    def __init__(self, logger=None):
+    # name of the traces of the timeline, in the order of the "category" of each node
+    NODE_TRACES = ("nodes", "nodes_game_over", "nodes_success", "nodes_alert", "nodes_illegal", "nodes_assistant_act")
+    NODE_NORMAL = 0
+    NODE_GAME_OVER = 1
+    NODE_SUCCESS = 2
+    NODE_ALERT = 3
+    NODE_ILLEGAL = 4
+    NODE_ASSISTANT_ACT = 5
+
+    def __init__(self, logger=None, webgl_threshold=5000, collapse_threshold=1000,
+                 obs_keyframe_interval=16, obs_cache_size=64, assistant_memo_size=1024, risk_threshold=1.):
         self._all_nodes = []
         self._current_node = None
         self._last_action = None
         self.__is_init = False
         self.fig_timeline = None
 
-        self.Xn = None
-        self.Yn = None
+        # position of each node in the timeline (see `Xn` and `Yn`), the buffers grow by doubling their size
+        self._xn_buf = None
+        self._yn_buf = None
+        self._nb_pos = 0
+
+        # information about each node (indexed by node id) cached for the timeline
+        self._father_ids = []  # -1 for the root
+        self._nb_sons = []
+        self._categories = []  # see NODE_TRACES and `get_categories`
+        self._no_assistant_yet = set()  # "normal" nodes whose assistant action is not known yet
+        self._edge_texts = []  # text of the action leading to each node
+        self._edge_noop = []  # whether the action leading to each node does nothing
+        self._risks = []  # risk of each node, nan if it is not known
+        self.risk_threshold = float(risk_threshold)
 
         self.margin_for_plot = 0.5
+        self.webgl_threshold = int(webgl_threshold)
+        self.collapse_threshold = int(collapse_threshold)
+        self._use_webgl = False
+        self._x_range = None  # part of the timeline displayed (None if the user did not zoom)
+        self._episode_logger = None  # optional, to stream the new nodes on the hard drive
+        # observations of the nodes, stored as differences between a node and its father
+        self._obs_store = ObservationStore(keyframe_interval=obs_keyframe_interval, cache_size=obs_cache_size)
+        # actions of the (deterministic) assistant for the states already seen, 0 to disable
+        self._assistant_memo = AssistantMemo(assistant_memo_size) if assistant_memo_size > 0 else None
 
         if logger is None:
             import logging
@@ -56,17 +97,101 @@ class EnvTree(object):
                     glop_env=env.copy(),
                     obs=obs,
                     reward=None, done=False, info=None,
-                    logger=self.logger)
+                    logger=self.logger,
+                    obs_store=self._obs_store,
+                    assistant_memo=self._assistant_memo)
         self._all_nodes.append(node)
+        self._register_node(node, edge_text="", edge_noop=True)
         self._current_node = node
         self.__is_init = True
+        if self._episode_logger is not None:
+            self._episode_logger.new_episode(env, node)
+        self._use_webgl = False
+        self._x_range = None
         self.init_plot_timeline()
-        self.Xn = np.array([0])
-        self.Yn = np.array([0])
+        self._set_positions(np.array([0]), np.array([0.]))
+
+    @property
+    def Xn(self) -> Union[np.ndarray, None]:
+        """abscissa of each node in the timeline (indexed by node id)"""
+        if self._xn_buf is None:
+            return None
+        return self._xn_buf[:self._nb_pos]
+
+    @property
+    def Yn(self) -> Union[np.ndarray, None]:
+        """ordinate of each node in the timeline (indexed by node id)"""
+        if self._yn_buf is None:
+            return None
+        return self._yn_buf[:self._nb_pos]
+
+    def _set_positions(self, Xn, Yn) -> None:
+        """position of all the nodes"""
+        capacity = max(16, 2 * Xn.shape[0])
+        self._xn_buf = np.zeros(capacity, dtype=float)
+        self._yn_buf = np.zeros(capacity, dtype=float)
+        self._xn_buf[:Xn.shape[0]] = Xn
+        self._yn_buf[:Yn.shape[0]] = Yn
+        self._nb_pos = Xn.shape[0]
+
+    def _append_position(self, x, y) -> None:
+        """position of a new node (amortized constant time)"""
+        if self._nb_pos == self._xn_buf.shape[0]:
+            self._xn_buf = np.concatenate((self._xn_buf, np.zeros_like(self._xn_buf)))
+            self._yn_buf = np.concatenate((self._yn_buf, np.zeros_like(self._yn_buf)))
+        self._xn_buf[self._nb_pos] = x
+        self._yn_buf[self._nb_pos] = y
+        self._nb_pos += 1
+
+    def set_episode_logger(self, episode_logger) -> None:
+        """stream all the nodes created from now on with `episode_logger` (see `EpisodeLogger`), None to stop"""
+        self._episode_logger = episode_logger
+
+    def _register_node(self, node: Node, edge_text: str, edge_noop: bool) -> None:
+        """store the information needed to plot the node (only its category can change, see `get_categories`)"""
+        father = node.father
+        self._father_ids.append(father.id if father is not None else -1)
+        self._nb_sons.append(0)
+        if father is not None:
+            self._nb_sons[father.id] += 1
+        self._edge_texts.append(edge_text)
+        self._edge_noop.append(edge_noop)
+        self._risks.append(np.nan)
+
+        if node.done:
+            if node.step != node.obs.max_step:
+                category = type(self).NODE_GAME_OVER
+            else:
+                category = type(self).NODE_SUCCESS
+        elif node.prev_action_is_illegal:
+            category = type(self).NODE_ILLEGAL
+        elif np.any(node.obs.time_since_last_alarm == 0):
+            category = type(self).NODE_ALERT
+        elif node._assistant_action is not None and node._assistant_action.can_affect_something():
+            category = type(self).NODE_ASSISTANT_ACT
+        else:
+            category = type(self).NODE_NORMAL
+            if node._assistant_action is None:
+                # the assistant action is computed later (eg for the states imported or planned)
+                self._no_assistant_yet.add(node.id)
+        self._categories.append(category)
+
+    def get_categories(self) -> np.ndarray:
+        """category of each node (see NODE_TRACES), updated for the nodes whose assistant action is now known"""
+        for node_id in list(self._no_assistant_yet):
+            assistant_action = self._all_nodes[node_id]._assistant_action
+            if assistant_action is None:
+                continue
+            self._no_assistant_yet.discard(node_id)
+            if assistant_action.can_affect_something():
+                self._categories[node_id] = type(self).NODE_ASSISTANT_ACT
+        return np.array(self._categories, dtype=int)
 
     def init_plot_timeline(self) -> None:
         """initialize the plot for the timeline"""
         self.fig_timeline = go.Figure()
+        # WebGL is much faster than SVG when lots of points are displayed
+        scatter_cls = go.Scattergl if self._use_webgl else go.Scatter
 
         # plot the edges / link / actions
         color_links = 'rgb(210,210,210)'
@@ -74,7 +199,7 @@ class EnvTree(object):
         col_realtime = 'rgba(255, 140, 0, 1)'
 
         # the edges / links / action
-        self.fig_timeline.add_trace(go.Scatter(x=[],
+        self.fig_timeline.add_trace(scatter_cls(x=[],
                                                y=[],
                                                mode='lines',
                                                name="edges",
@@ -83,7 +208,7 @@ class EnvTree(object):
                                                text=[],
                                                ))
 
-        self.fig_timeline.add_trace(go.Scatter(x=[],
+        self.fig_timeline.add_trace(scatter_cls(x=[],
                                                y=[],
                                                mode='markers',
                                                name='edges_center',
@@ -99,7 +224,7 @@ class EnvTree(object):
 
         # plot the vertices / node / observations
         # regular vertices
-        self.fig_timeline.add_trace(go.Scatter(x=[],
+        self.fig_timeline.add_trace(scatter_cls(x=[],
                                                y=[],
                                                mode='markers',
                                                name='nodes',
@@ -113,7 +238,7 @@ class EnvTree(object):
                                                opacity=0.8
                                                ))
         # game over vertices
-        self.fig_timeline.add_trace(go.Scatter(x=[],
+        self.fig_timeline.add_trace(scatter_cls(x=[],
                                                y=[],
                                                mode='markers',
                                                name='nodes_game_over',
@@ -127,7 +252,7 @@ class EnvTree(object):
                                                ))
 
         #  success vertices
-        self.fig_timeline.add_trace(go.Scatter(x=[],
+        self.fig_timeline.add_trace(scatter_cls(x=[],
                                                y=[],
                                                mode='markers',
                                                name='nodes_success',
@@ -141,7 +266,7 @@ class EnvTree(object):
                                                ))
 
         # alert vertices
-        self.fig_timeline.add_trace(go.Scatter(x=[],
+        self.fig_timeline.add_trace(scatter_cls(x=[],
                                                y=[],
                                                mode='markers',
                                                name='nodes_alert',
@@ -155,7 +280,7 @@ class EnvTree(object):
                                                ))
 
         # illegal vertices
-        self.fig_timeline.add_trace(go.Scatter(x=[],
+        self.fig_timeline.add_trace(scatter_cls(x=[],
                                                y=[],
                                                mode='markers',
                                                name='nodes_illegal',
@@ -169,7 +294,7 @@ class EnvTree(object):
                                                ))
 
         # assistant did action vertices
-        self.fig_timeline.add_trace(go.Scatter(x=[],
+        self.fig_timeline.add_trace(scatter_cls(x=[],
                                                y=[],
                                                mode='markers',
                                                name='nodes_assistant_act',
@@ -181,9 +306,24 @@ class EnvTree(object):
                                                hoverinfo='text',
                                                opacity=0.8
                                                ))
-        
+
+        # vertices with a high risk (drawn above the others)
+        self.fig_timeline.add_trace(scatter_cls(x=[],
+                                               y=[],
+                                               mode='markers',
+                                               name='nodes_risky',
+                                               marker=dict(symbol='circle-open',
+                                                           size=20,
+                                                           color='red',
+                                                           line=dict(width=2)
+                                                           ),
+                                               text=[],
+                                               hoverinfo='text',
+                                               opacity=0.8
+                                               ))
+
         # real time vertical bar
-        self.fig_timeline.add_trace(go.Scatter(x=[0, 0],
+        self.fig_timeline.add_trace(scatter_cls(x=[0, 0],
                                                y=[-10, 10],
                                                mode='lines',
                                                name="real_time",
@@ -203,7 +343,8 @@ class EnvTree(object):
                                         })
         self.fig_timeline.update_layout(margin=dict(l=0, r=0, t=0, b=0),
                                         # height=int(50),
-                                        showlegend=False)
+                                        showlegend=False,
+                                        uirevision="timeline")  # keep the zoom of the user
         
     def make_step(self,
                   assistant: Union[BaseAgent, None],  # TODO have a member with this
@@ -221,22 +362,117 @@ class EnvTree(object):
             self._current_node = res.son
         else:
             # first time i do this action, so i store everything
-            current_env = self._current_node._glop_env.copy()
+            current_env = self.restore_env(self._current_node).copy()
             _obs, _reward, _done, _info = current_env.step(chosen_action)
             node = Node(assistant=assistant,
                         obs=_obs, reward=_reward, done=_done, info=_info,
                         glop_env=current_env,
                         id_=len(self._all_nodes),
                         father=self._current_node,
-                        logger=self.logger)
+                        logger=self.logger,
+                        obs_store=self._obs_store,
+                        assistant_memo=self._assistant_memo)
             # TODO check if node exist ! (not using id !)
-            self._current_node.add_son(chosen_action, node)
-            self._current_node = node
-            self._all_nodes.append(node)
+            self._add_son(chosen_action, node)
 
-            # recompute the position of the node
-            # TODO optimize here to compute only the last position, and not recompute all previous positions each time !
-            self.Xn, self.Yn = self.layout_manual()
+    def _add_son(self, action: BaseAction, node: Node) -> None:
+        """add a newly created node (son of the current node), it becomes the current node"""
+        father = self._current_node
+        father.add_son(action, node)
+        self._current_node = node
+        self._all_nodes.append(node)
+        edge_noop = not action.can_affect_something()
+        edge_text = "∅" if edge_noop else re.sub("\n", "<br>", action.__str__())
+        self._register_node(node, edge_text=edge_text, edge_noop=edge_noop)
+        if self._episode_logger is not None:
+            self._episode_logger.log_node(node, action)
+
+        # compute the position of the node
+        if len(father.get_actions_to_sons()) == 1:
+            # the tree did not branch, the new node is put on the right of its father, nothing else moves
+            self._append_position(node.step, self._yn_buf[father.id])
+        else:
+            # a new branch is created, the layout is recomputed
+            self._set_positions(*self.layout_manual())
+
+    def add_computed_steps(self,
+                           assistant: Union[BaseAgent, None],
+                           actions: List[BaseAction],
+                           observations: List[BaseObservation],
+                           rewards: List[float],
+                           dones: List[bool],
+                           infos: List[dict]) -> None:
+        """
+        add, after the current node, the states reached with `actions` (for example read from the logs of a grid2op
+        runner) without simulating them.
+
+        The grid2op environments of these states are restored (by replaying the actions) only if a new
+        action is performed from one of them (see `restore_env`). The action of the assistant is computed only when
+        needed.
+        """
+        if not self.__is_init:
+            raise RuntimeError("You are trying to use a non initialized envTree.")
+        for action, obs, reward, done, info in zip(actions, observations, rewards, dones, infos):
+            res = self._current_node.son_for_this_action(action)
+            if res is not None:
+                self._current_node = res.son
+                continue
+            node = Node(assistant=assistant,
+                        obs=obs, reward=reward, done=done, info=info,
+                        glop_env=None,
+                        id_=len(self._all_nodes),
+                        father=self._current_node,
+                        logger=self.logger,
+                        lazy_assistant=True,
+                        obs_store=self._obs_store,
+                        assistant_memo=self._assistant_memo)
+            self._add_son(copy.deepcopy(action), node)
+
+    def add_computed_son(self,
+                         father: Node,
+                         action: BaseAction,
+                         glop_env: BaseEnv,
+                         obs: BaseObservation,
+                         reward: float,
+                         done: bool,
+                         info: dict,
+                         assistant: Union[BaseAgent, None] = None) -> Node:
+        """
+        add to `father` the son reached with `action`, the step being computed outside of the tree (for example
+        by a planner), `glop_env` is the grid2op environment after this step. The son becomes the current node.
+
+        The action of the assistant is computed only when needed.
+        """
+        if not self.__is_init:
+            raise RuntimeError("You are trying to use a non initialized envTree.")
+        self._current_node = father
+        node = Node(assistant=assistant,
+                    obs=obs, reward=reward, done=done, info=info,
+                    glop_env=glop_env,
+                    id_=len(self._all_nodes),
+                    father=father,
+                    logger=self.logger,
+                    lazy_assistant=True,
+                    obs_store=self._obs_store,
+                    assistant_memo=self._assistant_memo)
+        self._add_son(copy.deepcopy(action), node)
+        return node
+
+    def restore_env(self, node: Node) -> BaseEnv:
+        """return the grid2op environment of a node, it is restored from its closest ancestor if needed"""
+        if node.has_glop_env:
+            return node._glop_env
+        to_replay = []
+        ancestor = node
+        while not ancestor.has_glop_env:
+            to_replay.append(ancestor)
+            ancestor = ancestor.father
+        self.logger.info(f"restore_env: replaying {len(to_replay)} steps to restore the state of node {node.id}")
+        glop_env = ancestor._glop_env.copy()
+        for son in reversed(to_replay):
+            glop_env.step(son.father.get_actions_to_sons()[son.father_id].action)
+        node.set_glop_env(glop_env)
+        return glop_env
 
     def go_to_node(self, node: Node):
         """set the current node of the tree to be this node"""
@@ -318,85 +554,118 @@ class EnvTree(object):
             Yn.append(pos_y)
         return np.array(Xn), np.array(Yn)
 
-    def node_info(self):
+    def set_timeline_range(self, relayout_data) -> bool:
+        """the user zoomed (in or out) in the timeline, returns whether the timeline needs to be updated"""
+        if relayout_data is None:
+            return False
+        if "xaxis.autorange" in relayout_data:
+            x_range = None
+        elif "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+            x_range = (float(relayout_data["xaxis.range[0]"]), float(relayout_data["xaxis.range[1]"]))
+        elif "xaxis.range" in relayout_data:
+            x_range = tuple(float(el) for el in relayout_data["xaxis.range"])
+        else:
+            # the x axis has not been modified
+            return False
+        res = x_range != self._x_range
+        self._x_range = x_range
+        return res
+
+    def _get_visible_nodes(self) -> np.ndarray:
+        """
+        computes which nodes are displayed on the timeline.
+
+        Nodes inside a "linear chain" (normal node, with one son, which father has only one son, and reached and
+        left with an action that does nothing) are hidden if too many nodes would be displayed in the
+        part of the timeline looked at.
+        """
+        nb_nodes = len(self._all_nodes)
+        if nb_nodes <= self.collapse_threshold:
+            return np.ones(nb_nodes, dtype=bool)
+
+        father_ids = np.array(self._father_ids)
+        nb_sons = np.array(self._nb_sons)
+        edge_noop = np.array(self._edge_noop)
+        collapsible = (self.get_categories() == type(self).NODE_NORMAL) & (nb_sons == 1) & edge_noop
+        collapsible[0] = False  # the root is always displayed
+        collapsible[1:] &= nb_sons[father_ids[1:]] == 1
+        # the action going out of a collapsed node should also do nothing
+        son_noop = np.zeros(nb_nodes, dtype=bool)
+        son_noop[father_ids[1:]] = edge_noop[1:]  # nodes with one son only are relevant here
+        collapsible &= son_noop
+        # the risky nodes are always displayed
+        collapsible &= ~(np.array(self._risks) >= self.risk_threshold)
+        collapsible[self._current_node.id] = False
+
+        if self._x_range is not None:
+            # the user zoomed in, the chains are expanded if there are not too many nodes to display
+            in_range = (self.Xn >= self._x_range[0]) & (self.Xn <= self._x_range[1])
+            if np.sum(in_range) <= self.collapse_threshold:
+                collapsible &= ~in_range
+        return ~collapsible
+
+    def node_info(self, visible=None):
         """computes which type of information should be displayed on which node in the timeline"""
-        Xe = []
-        Ye = []
-        texts = []
-        Xe_c = []
-        Ye_c = []
-        for node in self._all_nodes:
-            # run through all the node and connect it to its children, if any
-            my_x = self.Xn[node.id]
-            my_y = self.Yn[node.id]
-            for link in node.get_actions_to_sons():
-                if link.son is not None:
-                    # This link has a son
-                    tmp_x = self.Xn[link.son.id]
-                    tmp_y = self.Yn[link.son.id]
-                    Xe += [my_x, tmp_x, None]
-                    Ye += [my_y, tmp_y, None]
-                    Xe_c.append(0.5 * (my_x + tmp_x))
-                    Ye_c.append(0.5 * (my_y + tmp_y))
-                    txt = "∅"
-                    if link.action.can_affect_something():
-                        txt = re.sub("\n", "<br>", link.action.__str__())
-                    texts.append(txt)
+        father_ids = np.array(self._father_ids)
+        nb_nodes = father_ids.shape[0]
+        if visible is None:
+            visible = np.ones(nb_nodes, dtype=bool)
+
+        # each displayed node is linked to its closest displayed ancestor
+        if np.all(visible):
+            ancestors = father_ids
+        else:
+            ancestors = np.full(nb_nodes, -1, dtype=int)
+            closest_visible = np.arange(nb_nodes)
+            for node_id in range(1, nb_nodes):
+                father_id = father_ids[node_id]
+                ancestors[node_id] = closest_visible[father_id]
+                if not visible[node_id]:
+                    closest_visible[node_id] = closest_visible[father_id]
+        edge_to = np.flatnonzero(visible[1:]) + 1
+        edge_from = ancestors[edge_to]
+
+        nb_edges = edge_to.shape[0]
+        Xe = np.full(3 * nb_edges, np.nan)
+        Ye = np.full(3 * nb_edges, np.nan)
+        Xe[0::3] = self.Xn[edge_from]
+        Xe[1::3] = self.Xn[edge_to]
+        Ye[0::3] = self.Yn[edge_from]
+        Ye[1::3] = self.Yn[edge_to]
+        Xe_c = 0.5 * (self.Xn[edge_from] + self.Xn[edge_to])
+        Ye_c = 0.5 * (self.Yn[edge_from] + self.Yn[edge_to])
+        texts = [self._edge_texts[to_] if from_ == father_ids[to_]
+                 else f"∅ ({int(self.Xn[to_] - self.Xn[from_])} steps)"
+                 for from_, to_ in zip(edge_from, edge_to)]
         return Xe, Ye, Xe_c, Ye_c, texts
 
     def plot_plotly(self) -> plotly.graph_objects.Figure:
         # see https://plotly.com/python/tree-plots/
 
         # retrieve the layout
-        Xe, Ye, Xe_c, Ye_c, texts = self.node_info()
-
-        # now filter them based on game over or not
-        node_normal = []
-        node_game_over = []
-        node_sucess = []
-        node_alert = []
-        node_illegal = []
-        node_assistant_act = []
-        for node in self._all_nodes:
-            if node.done:
-                if node.step != self._current_node.obs.max_step:
-                    node_game_over.append(node.id)
-                else:
-                    node_sucess.append(node.id)
-            elif node.prev_action_is_illegal:
-                node_illegal.append(node.id)
-            elif np.any(node.obs.time_since_last_alarm == 0):
-                node_alert.append(node.id)
-            elif node._assistant_action is not None and node._assistant_action.can_affect_something():
-                node_assistant_act.append(node.id)
-            else:
-                node_normal.append(node.id)
-
-        # and now plot the figure
-        self.fig_timeline.update_traces(x=self.Xn[node_normal],
-                                        y=self.Yn[node_normal],
-                                        text=[f"{id_}" for id_ in node_normal],
-                                        selector=dict(name="nodes"))
-        self.fig_timeline.update_traces(x=self.Xn[node_game_over],
-                                        y=self.Yn[node_game_over],
-                                        text=[f"{id_}" for id_ in node_game_over],
-                                        selector=dict(name="nodes_game_over"))
-        self.fig_timeline.update_traces(x=self.Xn[node_sucess],
-                                        y=self.Yn[node_sucess],
-                                        text=[f"{id_}" for id_ in node_sucess],
-                                        selector=dict(name="nodes_success"))
-        self.fig_timeline.update_traces(x=self.Xn[node_alert],
-                                        y=self.Yn[node_alert],
-                                        text=[f"{id_}" for id_ in node_alert],
-                                        selector=dict(name="nodes_alert"))
-        self.fig_timeline.update_traces(x=self.Xn[node_illegal],
-                                        y=self.Yn[node_illegal],
-                                        text=[f"{id_}" for id_ in node_illegal],
-                                        selector=dict(name="nodes_illegal"))
-        self.fig_timeline.update_traces(x=self.Xn[node_assistant_act],
-                                        y=self.Yn[node_assistant_act],
-                                        text=[f"{id_}" for id_ in node_assistant_act],
-                                        selector=dict(name="nodes_assistant_act"))
+        visible = self._get_visible_nodes()
+        Xe, Ye, Xe_c, Ye_c, texts = self.node_info(visible)
+
+        use_webgl = np.sum(visible) > self.webgl_threshold
+        if use_webgl != self._use_webgl:
+            # the type of the traces changes, the figure is rebuilt
+            self._use_webgl = use_webgl
+            self.init_plot_timeline()
+
+        # now filter them based on their category (game over, alert etc.)
+        categories = self.get_categories()
+        for category, trace_name in enumerate(type(self).NODE_TRACES):
+            node_ids = np.flatnonzero(visible & (categories == category))
+            self.fig_timeline.update_traces(x=self.Xn[node_ids],
+                                            y=self.Yn[node_ids],
+                                            text=[f"{id_}" for id_ in node_ids],
+                                            selector=dict(name=trace_name))
+        risks = np.array(self._risks)
+        node_ids = np.flatnonzero(visible & (risks >= self.risk_threshold))
+        self.fig_timeline.update_traces(x=self.Xn[node_ids],
+                                        y=self.Yn[node_ids],
+                                        text=[f"{id_} (risk: {100. * risks[id_]:.0f}%)" for id_ in node_ids],
+                                        selector=dict(name="nodes_risky"))
         self.fig_timeline.update_traces(x=Xe,
                                         y=Ye,
                                         selector=dict(name="edges"))
@@ -417,8 +686,18 @@ class EnvTree(object):
         del self._all_nodes
         self._all_nodes = []
         self._current_node = None
-        self.Xn = None
-        self.Yn = None
+        self._obs_store.clear()
+        self._xn_buf = None
+        self._yn_buf = None
+        self._nb_pos = 0
+        self._father_ids = []
+        self._nb_sons = []
+        self._categories = []
+        self._no_assistant_yet = set()
+        self._edge_texts = []
+        self._edge_noop = []
+        self._risks = []
+        self._x_range = None
         self.__is_init = False
 
     @property
@@ -428,10 +707,12 @@ class EnvTree(object):
 
     def get_last_action(self) -> BaseAction:
         """retrieve the last action performed on the grid"""
-        res = self._current_node._glop_env.action_space()
+        # the root always has its grid2op environment
+        action_space = self._all_nodes[0]._glop_env.action_space
+        res = action_space()
         if self._current_node.id == 0:
             # it's the root of the tree, last action does not exist, but i say it's do nothing
-            res = self._current_node._glop_env.action_space()
+            res = action_space()
         else:
             father = self._current_node.father
             for link in father.get_actions_to_sons():
@@ -476,14 +757,39 @@ class EnvTree(object):
         # and make sure it's the right coordinates
         posx = pts["x"]
         posy = pts["y"]
-        for pt_index, node in enumerate(self._all_nodes):
-            th_x = self.Xn[pt_index]
-            th_y = self.Yn[pt_index]
-            if th_x == posx and th_y == posy:
-                # It's the right coordinates, i move there
-                self.go_to_node(node)
+        node_ids = np.flatnonzero((self.Xn == posx) & (self.Yn == posy))
+        if node_ids.shape[0]:
+            # It's the right coordinates, i move there
+            self.go_to_node(self._all_nodes[node_ids[-1]])
         return 1
 
+    def get_current_branch(self, with_future=False):
+        """
+        return the list of nodes from the root to the current node (both included), and then down to a leaf
+        (following the last son created each time) if `with_future`
+        """
+        res = [self._current_node]
+        while res[-1].father is not None:
+            res.append(res[-1].father)
+        res = res[::-1]
+        if with_future:
+            sons = self._current_node.get_actions_to_sons()
+            while sons:
+                res.append(sons[-1].son)
+                sons = res[-1].get_actions_to_sons()
+        return res
+
+    def set_risk(self, node: Node, risk: float) -> bool:
+        """set the risk of a node, returns False if this node is not in the tree anymore"""
+        if node.id >= len(self._all_nodes) or self._all_nodes[node.id] is not node:
+            return False
+        self._risks[node.id] = float(risk)
+        return True
+
+    def get_risk(self, node: Node) -> float:
+        """risk of a node (nan if it is not known)"""
+        return self._risks[node.id]
+
     def get_current_action_list(self):
         """return the list of actions from the current point in the tree up to the root"""
         res = []
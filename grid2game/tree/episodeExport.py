@@ -0,0 +1,96 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import logging
+import time
+
+import numpy as np
+from grid2op.dtypes import dt_bool, dt_float
+
+
+def export_current_branch(env_tree, path_save, env_seed=None, agent_seed=None, logger=None) -> "EpisodeData":
+    """
+    save the branch of the tree from the root to the current node in `path_save`, with the same layout as
+    a grid2op runner (it can be read with `EpisodeData.from_disk`).
+
+    Everything is taken from the nodes of the tree: nothing is simulated again.
+    """
+    # imported here: grid2op.Episode imports the plotting libraries of grid2op, which are slow to import
+    from grid2op.Episode import EpisodeData
+
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    beg_ = time.perf_counter()
+    nodes = env_tree.get_current_branch()
+    root_env = nodes[0]._glop_env
+    # imported states might not have a grid2op environment (see `EnvTree.add_computed_steps`)
+    last_env = next(node._glop_env for node in reversed(nodes) if node.has_glop_env)
+    nb_step = len(nodes) - 1
+
+    # same shapes as in the runner: the arrays have the size of the scenario, and are "nan" after the last step
+    nb_timestep_max = max(root_env.chronics_handler.max_timestep(), nb_step)
+    actions = np.full((nb_timestep_max, root_env.action_space.n), fill_value=np.nan, dtype=dt_float)
+    env_actions = np.full((nb_timestep_max, root_env._helper_action_env.n), fill_value=np.nan, dtype=dt_float)
+    observations = np.full((nb_timestep_max + 1, root_env.observation_space.n), fill_value=np.nan, dtype=dt_float)
+    rewards = np.full(nb_timestep_max, fill_value=np.nan, dtype=dt_float)
+    times = np.full(nb_timestep_max, fill_value=np.nan, dtype=dt_float)
+    disc_lines = np.full((nb_timestep_max, root_env.backend.n_line), fill_value=np.nan, dtype=dt_bool)
+    attack = np.full((nb_timestep_max, root_env._opponent_action_space.n), fill_value=0., dtype=dt_float)
+
+    observations[0] = nodes[0].obs.to_vect()
+    no_env_modif = root_env._helper_action_env().to_vect()
+    cum_reward = 0.
+    for step, node in enumerate(nodes[1:]):
+        obs, reward, done, info = node.get_obs_rewar_done_info()
+        # the environment stored in the node is the one right after the step that led to it
+        node_env = node._glop_env
+        actions[step] = node.father.get_actions_to_sons()[node.father_id].action.to_vect()
+        observations[step + 1] = obs.to_vect()
+        rewards[step] = reward
+        times[step] = 0.  # the time the assistant took is not stored
+        if info.get("disc_lines") is not None:
+            disc_lines[step] = info["disc_lines"]
+        if node_env is not None:
+            # (imported states might not have a grid2op environment, the modifications of the environment and the
+            # attacks are not known for them)
+            env_actions[step] = node_env._env_modification.to_vect()
+            opp_attack = node_env._oppSpace.last_attack
+            if opp_attack is not None:
+                attack[step] = opp_attack.to_vect()
+        else:
+            # saved as "no modification": grid2op reads a row of nan as the end of the episode
+            env_actions[step] = no_env_modif
+        cum_reward += float(reward)
+
+    episode = EpisodeData(actions=actions,
+                          env_actions=env_actions,
+                          observations=observations,
+                          rewards=rewards,
+                          disc_lines=disc_lines,
+                          times=times,
+                          observation_space=root_env.observation_space,
+                          action_space=root_env.action_space,
+                          helper_action_env=root_env._helper_action_env,
+                          path_save=path_save,
+                          disc_lines_templ=np.full((1, root_env.backend.n_line), fill_value=False, dtype=dt_bool),
+                          attack_templ=np.full((1, root_env._oppSpace.action_space.size()),
+                                               fill_value=0., dtype=dt_float),
+                          attack=attack,
+                          attack_space=root_env._opponent_action_space,
+                          logger=logger,
+                          name=root_env.chronics_handler.get_name(),
+                          other_rewards=[])
+    episode.set_parameters(root_env)
+    episode.set_meta(last_env, nb_step, cum_reward, env_seed, agent_seed)
+    # contrary to a runner, the branch can stop before the episode is over (see `Env.load_episode`)
+    episode.meta["grid2game_done"] = bool(nodes[-1].done)
+    episode.set_episode_times(last_env, 0., beg_, time.perf_counter())
+    episode.to_disk()
+    logger.info(f"export_current_branch: {nb_step} steps saved in {episode.episode_path} "
+                f"in {time.perf_counter() - beg_:.2f}s")
+    return episode
@@ -0,0 +1,174 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import datetime
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+
+import numpy as np
+
+
+class EpisodeLogger(object):
+    """
+    Streams the nodes added to an `EnvTree` on the hard drive, while the game is played.
+
+    Each episode (each reset of the tree) is written in its own directory, as compressed chunks of at most
+    `chunk_size` nodes ("chunk_xxxxxx.npz"). A chunk is written when it is full, or when no node has been added for
+    `flush_interval` seconds, so that almost nothing is lost if the server stops.
+
+    The data are converted and written by a background thread, the steps of the game are not slowed down.
+    Use `EpisodeLogger.read` to retrieve the data of an episode.
+    """
+    META_FILE = "episode_meta.json"
+
+    def __init__(self, log_dir, chunk_size=256, flush_interval=5., logger=None):
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger.getChild("EpisodeLogger")
+
+        self.chunk_size = int(chunk_size)
+        self.flush_interval = float(flush_interval)
+        # each logger (eg each user of the app) has its own directory
+        self.run_dir = os.path.join(os.path.abspath(log_dir),
+                                    f"{datetime.datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}")
+        os.makedirs(self.run_dir)
+
+        self._queue = queue.Queue()
+        self._nb_episode = 0
+        self._episode_dir = None  # only used by the writing thread
+        self._nb_chunk = 0  # only used by the writing thread
+        self._action_size = None  # only used by the writing thread
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def new_episode(self, env, root_node):
+        """a new tree has been created (the environment has been reset), with root `root_node`"""
+        self._nb_episode += 1
+        meta = {"episode": self._nb_episode,
+                "chronics_id": f"{env.chronics_handler.get_id()}",
+                "chronics_name": f"{env.chronics_handler.get_name()}",
+                "seed_used": None if env.seed_used is None else int(env.seed_used),
+                "date": f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S}",
+                "action_size": int(env.action_space.n),
+                "observation_size": int(env.observation_space.n)}
+        self._queue.put(("episode", meta))
+        self._queue.put(("node", (root_node, None)))
+
+    def log_node(self, node, action):
+        """a new node, reached with `action` from its father, has been added to the tree"""
+        self._queue.put(("node", (node, action)))
+
+    def flush(self, timeout=None) -> bool:
+        """write all the nodes logged so far, returns False if this is not done after `timeout` seconds"""
+        event = threading.Event()
+        self._queue.put(("flush", event))
+        return event.wait(timeout)
+
+    def close(self):
+        """write everything and stop the writing thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    @property
+    def episode_dir(self):
+        """directory of the last episode (None if no episode started yet)"""
+        if self._nb_episode == 0:
+            return None
+        return os.path.join(self.run_dir, f"episode_{self._nb_episode:04d}")
+
+    def _write_loop(self):
+        pending = []
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # nothing happened for some time, what has been logged is written
+                self._write_chunk(pending)
+                pending = []
+                continue
+            if item is None:
+                self._write_chunk(pending)
+                return
+            kind, data = item
+            if kind == "node":
+                pending.append(data)
+                if len(pending) >= self.chunk_size:
+                    self._write_chunk(pending)
+                    pending = []
+            elif kind == "episode":
+                self._write_chunk(pending)
+                pending = []
+                self._episode_dir = os.path.join(self.run_dir, f"episode_{data['episode']:04d}")
+                self._nb_chunk = 0
+                self._action_size = data["action_size"]
+                os.makedirs(self._episode_dir, exist_ok=True)
+                with open(os.path.join(self._episode_dir, self.META_FILE), "w", encoding="utf-8") as f:
+                    json.dump(obj=data, fp=f, indent=4, sort_keys=True)
+            elif kind == "flush":
+                self._write_chunk(pending)
+                pending = []
+                data.set()
+
+    def _write_chunk(self, pending):
+        """write some nodes in a new chunk of the current episode"""
+        if not pending or self._episode_dir is None:
+            return
+        try:
+            nb_node = len(pending)
+            arrays = {"node_ids": np.array([node.id for node, _ in pending], dtype=int),
+                      "father_ids": np.array([node.father.id if node.father is not None else -1
+                                              for node, _ in pending], dtype=int),
+                      "observations": np.stack([node.obs.to_vect() for node, _ in pending]),
+                      # the action of the root is not defined
+                      "actions": np.full((nb_node, self._action_size), fill_value=np.nan, dtype=np.float32),
+                      "rewards": np.full(nb_node, fill_value=np.nan, dtype=np.float32),
+                      "done": np.zeros(nb_node, dtype=bool),
+                      "is_illegal": np.zeros(nb_node, dtype=bool),
+                      "is_ambiguous": np.zeros(nb_node, dtype=bool),
+                      "exceptions": np.full(nb_node, fill_value="", dtype=object)}
+            for i, (node, action) in enumerate(pending):
+                obs, reward, done, info = node.get_obs_rewar_done_info()
+                if action is not None:
+                    arrays["actions"][i] = action.to_vect()
+                if reward is not None:
+                    arrays["rewards"][i] = reward
+                arrays["done"][i] = bool(done)
+                arrays["is_illegal"][i] = node.prev_action_is_illegal
+                arrays["is_ambiguous"][i] = node.prev_action_is_ambiguous
+                if info is not None and info.get("exception"):
+                    arrays["exceptions"][i] = "; ".join(f"{el}" for el in info["exception"])
+            arrays["exceptions"] = arrays["exceptions"].astype(str)
+
+            # the chunk is written in a temporary file first so that a chunk on the hard drive is never incomplete
+            path = os.path.join(self._episode_dir, f"chunk_{self._nb_chunk:06d}.npz")
+            with open(f"{path}.tmp", "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(f"{path}.tmp", path)
+            self._nb_chunk += 1
+        except Exception as exc_:
+            self.logger.error(f"_write_chunk: impossible to write {len(pending)} nodes in "
+                              f"\"{self._episode_dir}\": {exc_}")
+
+    @staticmethod
+    def read(episode_dir):
+        """read all the chunks of an episode, returns the meta data and the concatenated arrays"""
+        with open(os.path.join(episode_dir, EpisodeLogger.META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        chunks = []
+        for path in sorted(glob.glob(os.path.join(episode_dir, "chunk_*.npz"))):
+            with np.load(path) as data:
+                chunks.append({key: data[key] for key in data.files})
+        if not chunks:
+            return meta, {}
+        return meta, {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
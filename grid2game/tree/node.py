@@ -15,7 +15,9 @@ from grid2op.Agent import BaseAgent
 from grid2op.Environment import BaseEnv
 from grid2op.Observation import BaseObservation
 
+from grid2game.tree.assistantMemo import AssistantMemo
 from grid2game.tree.link import Link
+from grid2game.tree.observationStore import ObservationStore
 from grid2game.tree.temporalNodeData import TemporalNodeData
 
 
@@ -30,7 +32,10 @@ class Node(object):
                  reward: Union[float, None],
                  done: Union[bool, None],
                  info: Union[dict, None],
-                 logger: Union[logging.Logger, None]):
+                 logger: Union[logging.Logger, None],
+                 lazy_assistant: bool = False,
+                 obs_store: Union[ObservationStore, None] = None,
+                 assistant_memo: Union[AssistantMemo, None] = None):
         self._id: int = id_
         self._father_id: Union[None, int] = None  # None if its the root
         # we should get: self.father._act_to_sons[self._father_id].son is self
@@ -49,14 +54,23 @@ class Node(object):
         else:
             self.prev_action_is_illegal = info["is_illegal"]
             self.prev_action_is_ambiguous = info["is_ambiguous"]
-        # current state of the grid
-        self._obs: BaseObservation = obs
+        # current state of the grid, stored in `obs_store` (if any) as a difference with the one of the father
+        self._obs_store: Union[ObservationStore, None] = obs_store
+        if obs_store is not None:
+            self._obs = obs_store.encode(obs, father._obs if father is not None else None)
+        else:
+            self._obs = obs
         self._reward: Union[float, None] = reward
         self._done: Union[bool, None] = done
         self._info: Union[dict, None]= info
-        self._glop_env: BaseEnv = glop_env
+        # None if the state has been imported (it is restored only if needed, see `EnvTree.restore_env`)
+        self._glop_env: Union[BaseEnv, None] = glop_env
+        self._assistant: Union[BaseAgent, None] = assistant
         self._assistant_action: Union[BaseAction, None] = None
-        self.fill_assistant(assistant)
+        # actions of the assistant already computed for the same state (if any)
+        self._assistant_memo: Union[AssistantMemo, None] = assistant_memo
+        if not lazy_assistant:
+            self.fill_assistant(assistant)
 
         # links to my "sons"
         self._act_to_sons: List[Link] = []
@@ -69,10 +83,13 @@ class Node(object):
         """fill the action the assistant would have done in this node"""
         if assistant is not None:
             try:
-                self._assistant_action = assistant.act(self._obs, self._reward, self._done)
+                if self._assistant_memo is not None:
+                    self._assistant_action = self._assistant_memo.act(assistant, self.obs, self._reward, self._done)
+                else:
+                    self._assistant_action = assistant.act(self.obs, self._reward, self._done)
             except Exception as exc_:
                 self.logger.error(f"Exception {exc_} when using the assistant. Assistant action replaced by do nothing.")
-                self._assistant_action = self._glop_env.action_space()
+                self._assistant_action = assistant.action_space()
 
     def son_for_this_action(self, action: BaseAction) -> Union[Link, None]:
         """retrieve the link (if it exists) corresponding to the action `action` performed at this node"""
@@ -122,15 +139,27 @@ class Node(object):
         """
         return self._father_id
 
+    def set_glop_env(self, glop_env: BaseEnv) -> None:
+        """set the grid2op environment of this node (after the state has been restored)"""
+        self._glop_env = glop_env
+
+    @property
+    def has_glop_env(self) -> bool:
+        """whether the grid2op environment of this node is available (it is not for imported states)"""
+        return self._glop_env is not None
+
     def clear(self) -> None:
         """clear this node"""
-        self._glop_env.close()
+        if self._glop_env is not None:
+            self._glop_env.close()
 
     def get_obs_rewar_done_info(self) -> Tuple[BaseObservation, float, bool, dict]:
-        return self._obs, self._reward, self._done, self._info
+        return self.obs, self._reward, self._done, self._info
 
     @property
     def obs(self) -> BaseObservation:
+        if self._obs_store is not None:
+            return self._obs_store.decode(self._obs)
         return self._obs
 
     @property
@@ -147,6 +176,6 @@ class Node(object):
             return self._assistant_action
         else:
             if self._assistant is not None:
-                self.fill_assistant(self.assistant)
+                self.fill_assistant(self._assistant)
                 return self._assistant_action
         return None
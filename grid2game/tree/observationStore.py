@@ -0,0 +1,144 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from grid2op.Observation import BaseObservation
+
+
+class EncodedObservation(object):
+    """an observation stored either entirely (keyframe) or as the values that changed compared to its father"""
+    __slots__ = ("obs_cls", "father", "depth", "vect", "mask", "values", "extras")
+
+    def __init__(self, obs_cls, father, depth, vect, mask, values, extras):
+        self.obs_cls = obs_cls
+        self.father = father  # None for a keyframe
+        self.depth = depth  # number of deltas to apply after the keyframe
+        self.vect = vect  # only for a keyframe
+        self.mask = mask  # values that changed compared to the father (packed bits)
+        self.values = values  # new values of what changed
+        self.extras = extras  # attributes of the observation not in its vector representation
+
+
+class ObservationStore(object):
+    """
+    Stores the observations of the nodes of a tree in a compact way.
+
+    Consecutive observations of a branch are almost identical (topology, status, cooldowns etc.), so only
+    one observation every `keyframe_interval` is stored entirely, the others are stored as the values that
+    changed compared to the observation of their father. The attributes that are not part of the vector
+    representation of the observation (eg what is needed to "simulate") are kept, and shared with the father
+    when they did not change.
+
+    The last `cache_size` observations decoded are kept in a cache.
+    """
+    # caches of grid2op, they are recomputed when needed
+    NOT_STORED = ("_vectorized", "_dictionnarized", "_connectivity_matrix_", "_bus_connectivity_matrix_")
+
+    def __init__(self, keyframe_interval=16, cache_size=64):
+        self.keyframe_interval = max(int(keyframe_interval), 1)
+        self.cache_size = max(int(cache_size), 1)
+        self._cache = OrderedDict()  # EncodedObservation -> decoded observation
+        self._layouts = {}  # observation class -> position of each attribute in the vector representation
+        self._lock = threading.RLock()  # the observations can be read by other threads (eg EpisodeLogger)
+
+    def encode(self, obs: BaseObservation, father: "EncodedObservation" = None) -> EncodedObservation:
+        """encode `obs`, whose father (in the tree) has been encoded as `father` (None for the root)"""
+        obs_cls = type(obs)
+        vect_attrs = set(obs_cls.attr_list_vect)
+        father_extras = father.extras if father is not None else {}
+        extras = {}
+        for attr_nm, attr in obs.__dict__.items():
+            if attr_nm in vect_attrs or attr_nm in self.NOT_STORED:
+                continue
+            father_attr = father_extras.get(attr_nm)
+            if isinstance(attr, np.ndarray) and isinstance(father_attr, np.ndarray) and \
+                    np.array_equal(attr, father_attr, equal_nan=True):
+                # same as the father, memory is shared
+                attr = father_attr
+            extras[attr_nm] = attr
+
+        vect = obs.to_vect()
+        with self._lock:
+            if obs_cls not in self._layouts:
+                self._layouts[obs_cls] = self._get_layout(obs)
+            if father is None or father.depth + 1 >= self.keyframe_interval:
+                res = EncodedObservation(obs_cls, None, 0, vect.copy(), None, None, extras)
+            else:
+                father_vect = self._decode_vect(father)
+                changed = (vect != father_vect) & ~(np.isnan(vect) & np.isnan(father_vect))
+                res = EncodedObservation(obs_cls, father, father.depth + 1, None,
+                                         np.packbits(changed), vect[changed], extras)
+            # the observation is likely to be used soon
+            self._put_in_cache(res, obs)
+        return res
+
+    def decode(self, encoded: EncodedObservation) -> BaseObservation:
+        """retrieve the observation encoded in `encoded`"""
+        with self._lock:
+            res = self._cache.get(encoded)
+            if res is not None:
+                self._cache.move_to_end(encoded)
+                return res
+            vect = self._decode_vect(encoded)
+            res = encoded.obs_cls.__new__(encoded.obs_cls)
+            res.__dict__.update(encoded.extras)
+            for attr_nm in self.NOT_STORED:
+                setattr(res, attr_nm, None)
+            for attr_nm, beg_, end_, dtype, shape in self._layouts[encoded.obs_cls]:
+                attr = vect[beg_:end_].astype(dtype)
+                setattr(res, attr_nm, attr.reshape(shape) if shape is not None else attr[0])
+            self._put_in_cache(encoded, res)
+        return res
+
+    @staticmethod
+    def _get_layout(obs):
+        """position, type and shape of each attribute of `obs` in its vector representation"""
+        res = []
+        beg_ = 0
+        for attr_nm in type(obs).attr_list_vect:
+            attr = getattr(obs, attr_nm)
+            if isinstance(attr, np.ndarray):
+                dtype, shape, size = attr.dtype, attr.shape, attr.size
+            else:
+                dtype, shape, size = np.array(attr).dtype, None, 1
+            res.append((attr_nm, beg_, beg_ + size, dtype, shape))
+            beg_ += size
+        return res
+
+    def _decode_vect(self, encoded: EncodedObservation) -> np.ndarray:
+        """vector representation of an encoded observation, lock must be held"""
+        to_apply = []
+        current = encoded
+        while True:
+            cached = self._cache.get(current)
+            if cached is not None:
+                vect = cached.to_vect().copy()
+                break
+            if current.father is None:
+                vect = current.vect.copy()
+                break
+            to_apply.append(current)
+            current = current.father
+        for delta in reversed(to_apply):
+            changed = np.unpackbits(delta.mask, count=vect.shape[0]).astype(bool)
+            vect[changed] = delta.values
+        return vect
+
+    def _put_in_cache(self, encoded, obs):
+        self._cache[encoded] = obs
+        self._cache.move_to_end(encoded)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        """remove all the observations from the cache"""
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,120 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import os
+
+import numpy as np
+
+TREE_FORMATS = ("npy", "npz", "parquet")
+VECTOR_COLUMNS = ("actions", "observations")
+
+
+def tree_to_columns(env_tree, with_observations=False) -> dict:
+    """
+    one column (numpy array indexed by node id) for each information about the nodes of the tree.
+
+    "actions" (action leading to each node, nan for the root) and "observations" (only if `with_observations`)
+    are 2d arrays.
+    """
+    nodes = env_tree._all_nodes
+    nb_node = len(nodes)
+    current_branch = np.zeros(nb_node, dtype=bool)
+    current_branch[[node.id for node in env_tree.get_current_branch()]] = True
+    infos = [node.get_obs_rewar_done_info() for node in nodes]
+
+    res = {"node_id": np.arange(nb_node),
+           "father_id": np.array(env_tree._father_ids, dtype=int),
+           "step": np.array([node.step for node in nodes], dtype=int),
+           "reward": np.array([reward if reward is not None else np.nan for _, reward, _, _ in infos],
+                              dtype=np.float32),
+           "done": np.array([bool(done) for _, _, done, _ in infos], dtype=bool),
+           "is_illegal": np.array([node.prev_action_is_illegal for node in nodes], dtype=bool),
+           "is_ambiguous": np.array([node.prev_action_is_ambiguous for node in nodes], dtype=bool),
+           "max_rho": np.array([obs.rho.max() for obs, _, _, _ in infos], dtype=np.float32),
+           "nb_overflow": np.array([(obs.rho > 1.).sum() for obs, _, _, _ in infos], dtype=int),
+           "category": env_tree.get_categories(),
+           "on_current_branch": current_branch,
+           }
+    action_space = nodes[0]._glop_env.action_space
+    actions = np.full((nb_node, action_space.n), fill_value=np.nan, dtype=np.float32)
+    for node in nodes[1:]:
+        actions[node.id] = node.father.get_actions_to_sons()[node.father_id].action.to_vect()
+    res["actions"] = actions
+    if with_observations:
+        res["observations"] = np.stack([obs.to_vect() for obs, _, _, _ in infos]).astype(np.float32)
+    return res
+
+
+def export_tree(env_tree, path, format="npy", with_observations=False) -> str:
+    """
+    export all the nodes of the tree, in a columnar format, for offline analyses.
+
+    - "npy": one (uncompressed) ".npy" file per column in the directory `path`, they can be memory mapped
+      (see `read_tree`)
+    - "npz": all the columns in the compressed numpy file `path`
+    - "parquet": parquet file `path` (requires pyarrow), the vector columns are stored as fixed size lists
+
+    Returns the path of what has been written.
+    """
+    if format not in TREE_FORMATS:
+        raise RuntimeError(f"export_tree: unknown format \"{format}\", available formats are {TREE_FORMATS}")
+    columns = tree_to_columns(env_tree, with_observations=with_observations)
+
+    if format == "npy":
+        os.makedirs(path, exist_ok=True)
+        for name, column in columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), column)
+    elif format == "npz":
+        if not path.endswith(".npz"):
+            path = f"{path}.npz"
+        np.savez_compressed(path, **columns)
+    else:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc_:
+            raise RuntimeError("export_tree: pyarrow is required to export the tree in the parquet format "
+                               "(\"pip install pyarrow\")") from exc_
+        arrays = {}
+        for name, column in columns.items():
+            if column.ndim == 2:
+                arrays[name] = pa.FixedSizeListArray.from_arrays(pa.array(column.ravel()), column.shape[1])
+            else:
+                arrays[name] = pa.array(column)
+        pq.write_table(pa.table(arrays), path, compression="zstd")
+    return path
+
+
+def read_tree(path, mmap_mode="r", columns=None) -> dict:
+    """
+    read what has been written by `export_tree`, returns a dictionary {column name: numpy array}.
+
+    The columns exported with the "npy" format are memory mapped (unless `mmap_mode` is None): only the
+    parts of the arrays actually used are read from the hard drive.
+    """
+    if os.path.isdir(path):
+        names = [fn[:-4] for fn in sorted(os.listdir(path)) if fn.endswith(".npy")]
+        if columns is not None:
+            names = [name for name in names if name in columns]
+        return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in names}
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files if columns is None or name in columns}
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc_:
+        raise RuntimeError("read_tree: pyarrow is required to read a parquet file (\"pip install pyarrow\")") from exc_
+    table = pq.read_table(path, columns=columns, memory_map=mmap_mode is not None)
+    res = {}
+    for name in table.column_names:
+        column = table.column(name).combine_chunks()
+        if name in VECTOR_COLUMNS:
+            res[name] = column.flatten().to_numpy().reshape(len(column), -1)
+        else:
+            res[name] = column.to_numpy(zero_copy_only=False)
+    return res
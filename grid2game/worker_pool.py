@@ -0,0 +1,123 @@
+# Copyright (c) 2019-2022, RTE (https://www.rte-france.com)
+# See AUTHORS.txt
+# This Source Code Form is subject to the terms of the Mozilla Public License, version 2.0.
+# If a copy of the Mozilla Public License, version 2.0 was not distributed with this file,
+# you can obtain one at http://mozilla.org/MPL/2.0/.
+# SPDX-License-Identifier: MPL-2.0
+# This file is part of Grid2Game, Grid2Game a gamified platform to interact with grid2op environments.
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# grid2op environment (and extra arguments) of a worker process, see `_init_worker`
+_WORKER_ENV = None
+_WORKER_ARGS = ()
+
+# pools shared by all the users of this process, see `get_shared_pool`
+_SHARED_POOLS = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def _init_worker(env_path, backend_cls, args):
+    """create an environment with the same grid in the worker process, so that the observations can be unpickled"""
+    global _WORKER_ENV, _WORKER_ARGS
+    import grid2op
+    _WORKER_ENV = grid2op.make(env_path, backend=backend_cls())
+    _WORKER_ARGS = args
+
+
+def get_worker_env():
+    """the grid2op environment of this worker process"""
+    return _WORKER_ENV
+
+
+def get_worker_args() -> tuple:
+    """the extra arguments (`initargs` of the pool) of this worker process"""
+    return _WORKER_ARGS
+
+
+class WorkerPool(object):
+    """
+    `nb_workers` processes (spawned the first time they are needed), each with a grid2op environment made from
+    `env_path` (with a `backend_cls` backend) that can be used by the functions they run with `get_worker_env`.
+
+    If the processes cannot be used (eg the environment cannot be made in them, or this process is itself a
+    daemonic worker) `map` returns None and the pool is not used anymore: the caller does the computations itself.
+    """
+    def __init__(self, nb_workers, env_path, backend_cls, initargs=(), logger=None):
+        if logger is None:
+            self.logger = logging.getLogger(__name__)
+        else:
+            self.logger = logger.getChild("WorkerPool")
+        self.nb_workers = int(nb_workers)
+        self._env_path = env_path
+        self._backend_cls = backend_cls
+        self._initargs = tuple(initargs)
+        self._executor = None
+        self.broken = self.nb_workers <= 0
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if multiprocessing.current_process().daemon:
+            raise RuntimeError("daemonic processes (eg a worker of \"grid2game evaluate\") "
+                               "cannot have worker processes")
+        # contrary to a `multiprocessing.Pool`, it stops (instead of starting new processes forever) if
+        # the initialization of a worker fails
+        self._executor = ProcessPoolExecutor(self.nb_workers,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker,
+                                             initargs=(self._env_path, self._backend_cls, self._initargs))
+
+    def map(self, fn, tasks):
+        """results of `fn` for each task, computed in the worker processes (None if they cannot be used)"""
+        with self._lock:
+            if self.broken:
+                return None
+            try:
+                if self._executor is None:
+                    self._start()
+                executor = self._executor
+            except Exception as exc_:
+                self._break(exc_)
+                return None
+        try:
+            return list(executor.map(fn, tasks))
+        except Exception as exc_:
+            with self._lock:
+                self._break(exc_)
+            return None
+
+    def _break(self, exc_):
+        """the worker processes cannot be used, lock must be held"""
+        if not self.broken:
+            self.logger.error(f"map: impossible to use the worker processes ({exc_}), the computations are now "
+                              f"done in the main process")
+        self.broken = True
+        self._shutdown()
+
+    def _shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def close(self) -> None:
+        """stop the worker processes (if any)"""
+        with self._lock:
+            self._shutdown()
+
+
+
+def get_shared_pool(nb_workers, env_path, backend_cls, logger=None) -> WorkerPool:
+    """
+    pool of worker processes shared by all the callers (eg all the sessions) of this process that use the same
+    environment, the number of workers is the one of the first call
+    """
+    key = (env_path, backend_cls)
+    with _SHARED_LOCK:
+        pool = _SHARED_POOLS.get(key)
+        if pool is None:
+            pool = WorkerPool(nb_workers, env_path, backend_cls, logger=logger)
+            _SHARED_POOLS[key] = pool
+        return pool
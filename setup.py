@@ -33,6 +33,9 @@ pkgs = {
         ],
         "recommended": [
             "lightsim2grid"
+        ],
+        "parquet": [
+            "pyarrow"
         ]
     }
 }